@@ -3,7 +3,7 @@ import logging
 from pathlib import Path
 # import sentry_sdk
 from functools import wraps
-from flask import Flask, Response, jsonify, request
+from flask import Flask, Response, jsonify, request, stream_with_context, url_for
 from flask.logging import default_handler
 
 import jwt
@@ -25,7 +25,11 @@ from jsonschema import validate, ValidationError
 import simplejson as json
 
 from arctic_office_projects_api.utils import RequestFormatter, generate_neutral_id
-from arctic_office_projects_api.extensions import db, migrate
+from arctic_office_projects_api.extensions import db, migrate, compression
+from arctic_office_projects_api.representations import JSONProvider
+from arctic_office_projects_api.exports import ResourceExport, export_resources, export_formats
+from arctic_office_projects_api.snapshots import StaticSnapshots
+from arctic_office_projects_api.importers.gtr_client import gtr_client
 from arctic_office_projects_api.errors import (
     error_handler_generic_bad_request,
     error_handler_generic_not_found,
@@ -35,12 +39,19 @@ from arctic_office_projects_api.errors import (
 from arctic_office_projects_api.commands import (
     seeding_cli_group,
     importing_cli_group,
+    exporting_cli_group,
+    import_worker_command,
 )
 
 from arctic_office_projects_api.importers import generate_category_term_ltree_path
 from arctic_office_projects_api.routes import index_route, healthcheck_route
 
-from arctic_office_projects_api.importers.gtr import import_gateway_to_research_grant_interactively
+from arctic_office_projects_api.importers.gtr import (
+    import_gateway_to_research_grant_interactively,
+    gtr_mapping_index,
+)
+from arctic_office_projects_api.importers.journal import ImportJournal, failed_grant_import_details
+from arctic_office_projects_api.bulk_importer.import_grants import resolve_parent_grant_references
 
 from arctic_office_projects_api.schemas import ProjectSchema
 from arctic_office_projects_api.models import Project
@@ -108,12 +119,35 @@ def auth_required():
 
 def create_app(config_name):
     app = Flask(__name__)
+    app.json = JSONProvider(app)
 
     app.config["SQLALCHEMY_DATABASE_URI"] = os.getenv("SQLALCHEMY_DATABASE_URI") or None
     app.config["APP_PAGE_SIZE"] = int(os.getenv('APP_PAGE_SIZE') or 10)
+    app.config["APP_COMPRESSION_MIN_SIZE"] = int(os.getenv('APP_COMPRESSION_MIN_SIZE') or 1024)
+    app.config["APP_COMPRESSION_CACHE_SIZE"] = int(os.getenv('APP_COMPRESSION_CACHE_SIZE') or 256)
+    app.config["APP_EXPORT_BATCH_SIZE"] = int(os.getenv('APP_EXPORT_BATCH_SIZE') or 500)
+    app.config["APP_STATIC_SNAPSHOT_PATH"] = os.getenv('APP_STATIC_SNAPSHOT_PATH') or None
+    app.config["APP_GTR_CONNECT_TIMEOUT"] = float(os.getenv('APP_GTR_CONNECT_TIMEOUT') or 10)
+    app.config["APP_GTR_READ_TIMEOUT"] = float(os.getenv('APP_GTR_READ_TIMEOUT') or 60)
+    app.config["APP_GTR_MAX_RETRIES"] = int(os.getenv('APP_GTR_MAX_RETRIES') or 5)
+    app.config["APP_GTR_BACKOFF_FACTOR"] = float(os.getenv('APP_GTR_BACKOFF_FACTOR') or 1)
+    app.config["APP_GTR_BACKOFF_MAX"] = float(os.getenv('APP_GTR_BACKOFF_MAX') or 60)
+    app.config["APP_GTR_RETRY_AFTER_MAX"] = float(os.getenv('APP_GTR_RETRY_AFTER_MAX') or 300)
+    app.config["APP_GTR_POOL_SIZE"] = int(os.getenv('APP_GTR_POOL_SIZE') or 10)
+    app.config["APP_GTR_RATE_LIMIT"] = float(os.getenv('APP_GTR_RATE_LIMIT') or 2)
+    app.config["APP_GTR_RATE_BURST"] = int(os.getenv('APP_GTR_RATE_BURST') or 5)
+    app.config["APP_GTR_FETCH_WORKERS"] = int(os.getenv('APP_GTR_FETCH_WORKERS') or 4)
+    app.config["APP_GTR_CACHE_PATH"] = os.getenv('APP_GTR_CACHE_PATH') or None
+    app.config["APP_GTR_CACHE_MAX_AGE"] = float(os.getenv('APP_GTR_CACHE_MAX_AGE') or 0) or None
+    app.config["APP_GTR_FIXTURES_MODE"] = os.getenv('APP_GTR_FIXTURES_MODE') or None
+    app.config["APP_GTR_FIXTURES_PATH"] = os.getenv('APP_GTR_FIXTURES_PATH') or None
+    app.config["APP_GTR_FIXTURES_LATENCY"] = float(os.getenv('APP_GTR_FIXTURES_LATENCY') or 0)
 
     db.init_app(app)
     migrate.init_app(app, db)
+    compression.init_app(app)
+    StaticSnapshots(app)
+    gtr_client.init_app(app)
 
     app.auth = auth_required
 
@@ -138,6 +172,8 @@ def create_app(config_name):
     # CLI commands
     app.cli.add_command(seeding_cli_group)
     app.cli.add_command(importing_cli_group)
+    app.cli.add_command(exporting_cli_group)
+    app.cli.add_command(import_worker_command)
 
     # Routes
     app.add_url_rule("/", "index", index_route, methods=["get", "options"])
@@ -180,23 +216,53 @@ def create_app(config_name):
         """
         Post json data containing several grant reference `lead-project`
         records to import a GtR grants in bulk
+
+        Records may also include `id` and `parent-id` values (as in bulk import CSV files), to link the grants in a
+        split award to their lead grant.
         """
         if request.method == "POST":
             data = request.get_json()
             if not data:
                 return jsonify({"error": "No JSON body provided"}), 400
 
-        for grant_data in data:
-
-            import_gateway_to_research_grant_interactively(
-                grant_data["grant-reference"],
-                grant_data["lead-project"]
-            )
+        if not isinstance(data, list):
+            return jsonify({"error": "Invalid grants", "detail": "Grants must be given as a list"}), 400
+        for index, grant in enumerate(data):
+            grant_reference = grant.get("grant-reference") if isinstance(grant, dict) else None
+            if not isinstance(grant_reference, str) or not grant_reference:
+                return jsonify({
+                    "error": "Invalid grant",
+                    "detail": f"Grant {index} does not have a 'grant-reference'",
+                    "grant": grant
+                }), 400
+            if grant.get("lead-project") not in (None, "", 0, 1, "0", "1"):
+                return jsonify({
+                    "error": "Invalid grant",
+                    "detail": f"Grant {grant_reference} has an invalid 'lead-project' value, "
+                              f"'{grant['lead-project']}', it must be 0 or 1",
+                    "grant": grant
+                }), 400
+
+        journal = ImportJournal.start(source="/post-gtr-grant-bulk")
+        journal.enqueue(resolve_parent_grant_references([dict(grant) for grant in data]))
 
         return jsonify({
-            "message": "All grants attempted",
+            "message": "Grants queued for import",
+            "job": journal.run_id,
             "data": data
-        }), 201
+        }), 202, {"Location": url_for("import_job", job_id=journal.run_id)}
+
+    @app.route("/jobs/<int:job_id>")
+    @app.auth()
+    def import_job(job_id):
+        """
+        Returns the progress of grants queued for import (e.g. by `/post-gtr-grant-bulk`), and the outcome of each
+        grant imported so far
+        """
+        try:
+            return jsonify(ImportJournal(run_id=job_id).progress())
+        except KeyError:
+            return jsonify({"error": f"Job {job_id} not found"}), 404
 
     @app.route("/post-organisations", methods=["POST", "OPTIONS"])
     @app.auth()
@@ -377,6 +443,8 @@ def create_app(config_name):
     def post_organisation_data():
         """
         Post data for an organisation to add to the project_organisations table
+
+        If the organisation is already mapped, its mapping is updated.
         """
         if request.method == "POST":
             data = request.get_json()
@@ -385,14 +453,15 @@ def create_app(config_name):
 
         organisation_data = data
 
-        organisation_resource = Project_Organisations(
-            organisation_id=organisation_data["organisation_id"],
-            organisation_name=organisation_data["organisation_name"],
-            organisation_ror=organisation_data["organisation_ror"]
-        )
+        organisation_resource = Project_Organisations.query.filter_by(
+            organisation_id=organisation_data["organisation_id"]
+        ).one_or_none() or Project_Organisations(organisation_id=organisation_data["organisation_id"])
+        organisation_resource.organisation_name = organisation_data["organisation_name"]
+        organisation_resource.organisation_ror = organisation_data["organisation_ror"]
 
         db.session.add(organisation_resource)
         db.session.commit()
+        gtr_mapping_index.invalidate("organisations")
 
         return jsonify({
             "message": "Organisation added",
@@ -404,6 +473,8 @@ def create_app(config_name):
         """
         Post data for a person to add to the project_people table
         This is in case GtR does not have a record of a person's Orcid
+
+        If the person is already mapped, their mapping is updated.
         """
         if request.method == "POST":
             data = request.get_json()
@@ -411,15 +482,18 @@ def create_app(config_name):
             return jsonify({"error": "No JSON body provided"}), 400
 
         person_data = data
+        gtr_person_id = person_data["gtr_person"].rstrip("/").split("/")[-1]
 
-        person_resource = Project_People(
-            name=person_data["name"],
-            gtr_person=person_data["gtr_person"],
-            orcid=person_data["orcid"]
-        )
+        person_resource = Project_People.query.filter_by(
+            gtr_person_id=gtr_person_id
+        ).one_or_none() or Project_People(gtr_person_id=gtr_person_id)
+        person_resource.name = person_data["name"]
+        person_resource.gtr_person = person_data["gtr_person"]
+        person_resource.orcid = person_data["orcid"]
 
         db.session.add(person_resource)
         db.session.commit()
+        gtr_mapping_index.invalidate("people")
 
         return jsonify({
             "message": "Person added",
@@ -430,6 +504,8 @@ def create_app(config_name):
     def post_subject_data():
         """
         Post data for a subject to add to the project_subject table
+
+        If the subject is already mapped, its mapping is updated.
         """
         if request.method == "POST":
             data = request.get_json()
@@ -438,13 +514,14 @@ def create_app(config_name):
 
         subject_data = data
 
-        subject_resource = Project_Subjects(
-            subject_text=subject_data["subject_text"],
-            gcmd_link_code=subject_data["gcmd_link_code"]
-        )
+        subject_resource = Project_Subjects.query.filter_by(
+            subject_text=subject_data["subject_text"]
+        ).one_or_none() or Project_Subjects(subject_text=subject_data["subject_text"])
+        subject_resource.gcmd_link_code = subject_data["gcmd_link_code"]
 
         db.session.add(subject_resource)
         db.session.commit()
+        gtr_mapping_index.invalidate("subjects")
 
         return jsonify({
             "message": "Subject added",
@@ -455,6 +532,8 @@ def create_app(config_name):
     def post_topic_data():
         """
         Post data for a subject to add to the project_topic table
+
+        If the topic is already mapped, its mapping is updated.
         """
         if request.method == "POST":
             data = request.get_json()
@@ -463,15 +542,16 @@ def create_app(config_name):
 
         topic_data = data
 
-        topic_resource = Project_Topics(
-            topic_id=topic_data["topic_id"],
-            topic_name=topic_data["topic_name"],
-            gcmd_link_name=topic_data["gcmd_link_name"],
-            gcmd_link_code=topic_data["gcmd_link_code"],
-        )
+        topic_resource = Project_Topics.query.filter_by(
+            topic_id=topic_data["topic_id"]
+        ).one_or_none() or Project_Topics(topic_id=topic_data["topic_id"])
+        topic_resource.topic_name = topic_data["topic_name"]
+        topic_resource.gcmd_link_name = topic_data["gcmd_link_name"]
+        topic_resource.gcmd_link_code = topic_data["gcmd_link_code"]
 
         db.session.add(topic_resource)
         db.session.commit()
+        gtr_mapping_index.invalidate("topics")
 
         return jsonify({
             "message": "Topic added",
@@ -1694,15 +1774,55 @@ def create_app(config_name):
         except MultipleResultsFound:  # pragma: no cover
             raise UnprocessableEntity()  # pragma: no cover
 
-    # Show import exception_log.txt
+    # Exports
+    @app.route("/exports/<resource>")
+    @app.auth()
+    def exports(resource: str):
+        """
+        Streams all instances of a resource, as flat records with related resource IDs, in a single response
+
+        Records are returned as newline delimited JSON by default, or as comma separated values using a 'format=csv'
+        query string parameter, or by listing 'text/csv' in the 'Accept' request header.
+
+        :type resource: str
+        :param resource: name of the resource to export (e.g. 'projects')
+        """
+        if resource not in export_resources:
+            raise NotFound()
+
+        export_format = request.args.get("format")
+        if export_format is None:
+            export_format = "ndjson"
+            if request.accept_mimetypes.best_match(
+                [export_formats["ndjson"], export_formats["csv"]]
+            ) == export_formats["csv"] and export_formats["csv"] in request.accept_mimetypes.values():
+                export_format = "csv"
+        if export_format not in export_formats:
+            raise BadRequest()
+
+        export = ResourceExport(resource, batch_size=app.config["APP_EXPORT_BATCH_SIZE"])
+        return Response(
+            stream_with_context(export.stream(export_format)),
+            mimetype=export_formats[export_format],
+        )
+
+    # Show import errors
     @app.route("/exception-log")
     @app.auth()
     def exception_log():
         """
-        Returns the contents of the exception_log.txt file
+        Returns why grants could not be imported, from the import journal
+
+        Optionally limited to a single import run, using the `run` query parameter.
+
+        If set, the contents of the legacy log file given by the `IMPORT_EXCEPTION_LOG` env var are returned instead.
         """
         log_file = os.getenv("IMPORT_EXCEPTION_LOG")
 
+        if log_file is None:
+            run_id = request.args.get("run", type=int)
+            return Response("\n".join(failed_grant_import_details(run_id=run_id)), mimetype="text/plain")
+
         if not os.path.exists(log_file):
             return Response("Log file not found", status=404, mimetype="text/plain")
 
@@ -12,6 +12,23 @@ def grant_reference_valid(grant_reference):
     return False
 
 
+def resolve_parent_grant_references(grants):
+    """
+    Adds the grant reference of the parent (lead) grant of each grant in a split award, as 'parent-grant-reference'
+
+    Parents are given by their 'id' in 'parent-id', and must be in the same list. Grants without a parent, whose
+    parent is not listed, or that are given as their own parent (as lead grants sometimes are), have a
+    'parent-grant-reference' of None.
+    """
+    grant_references = {grant["id"]: grant["grant-reference"] for grant in grants if grant.get("id") is not None}
+    for grant in grants:
+        parent_grant_reference = grant_references.get(grant.get("parent-id"))
+        if parent_grant_reference == grant["grant-reference"]:
+            parent_grant_reference = None
+        grant["parent-grant-reference"] = parent_grant_reference
+    return grants
+
+
 def gtr_csv_to_json(csv_file):
 
     data_list = []
@@ -28,6 +45,7 @@ def gtr_csv_to_json(csv_file):
             row["id"] = int(row["id"])
             row["lead-project"] = int(row["lead-project"])
             data_list.append(row)
+    resolve_parent_grant_references(data_list)
 
     # Create the final JSON structure
     projects_json = {"data": data_list}
@@ -36,35 +54,10 @@ def gtr_csv_to_json(csv_file):
 
 def import_grants(csv_file):
 
-    projects_json = gtr_csv_to_json(csv_file)
+    # Grants are imported in a single process, see 'flask import grants --help'
+    subprocess.run(["flask", "import", "grants", csv_file], shell=False)  # nosec
 
-    data = projects_json
-    lead_project = "0"
 
-    for project in data["data"]:
-        try:
-            lead_project_bool = project["lead-project"]
-            if lead_project_bool == 1:
-                lead_project = "1"
-            else:
-                lead_project = "0"
-        except Exception:
-            lead_project = "0"
-            print("No lead-project")
-
-        if grant_reference_valid(project["grant-reference"]):  # nosec
-            subprocess.run(  # nosec
-                [
-                    "flask",
-                    "import",
-                    "grant",
-                    "gtr",
-                    project["grant-reference"],
-                    lead_project,
-                ],
-                shell=False,  # nosec
-            )
-
-
-csv_file = "/usr/src/app/arctic_office_projects_api/bulk_importer/csvs/all-projects-2024-10-17.csv"
-import_grants(csv_file)
+if __name__ == "__main__":
+    csv_file = "/usr/src/app/arctic_office_projects_api/bulk_importer/csvs/all-projects-2024-10-17.csv"
+    import_grants(csv_file)
@@ -1,6 +1,11 @@
+import json
+
+from datetime import timedelta
+
 # noinspection PyPackageRequirements
-from click import argument, Path, Choice, echo, style
-from flask.cli import AppGroup
+from click import argument, command, option, Path, Choice, FloatRange, IntRange, UsageError, echo, style
+from flask import current_app
+from flask.cli import AppGroup, with_appcontext
 
 from arctic_office_projects_api.importers import (
     import_category_terms_from_file_interactively,
@@ -8,7 +13,16 @@ from arctic_office_projects_api.importers import (
 )
 from arctic_office_projects_api.importers.gtr import (
     import_gateway_to_research_grant_interactively,
+    import_gateway_to_research_grants_interactively,
+    refresh_gateway_to_research_grants_interactively,
+    run_gateway_to_research_import_workers,
+    format_grant_import_summary,
+    format_unmapped_mappings_summary,
 )
+from arctic_office_projects_api.importers.journal import ImportJournal
+from arctic_office_projects_api.importers.metrics import format_import_metrics_summary, summarise_import_metrics
+from arctic_office_projects_api.bulk_importer.import_grants import gtr_csv_to_json, grant_reference_valid
+from arctic_office_projects_api.snapshots import StaticSnapshotWriter
 from arctic_office_projects_api.seeding import (
     seed_predictable_test_resources,
     seed_random_test_resources,
@@ -33,6 +47,42 @@ def seed_random_mock_projects():
 
 importing_cli_group = AppGroup("import", help="Import data.")
 
+report_option = option(
+    "--report",
+    "report_path",
+    envvar="APP_IMPORT_REPORT_PATH",
+    type=Path(dir_okay=False, writable=True),
+    help="Path to write a JSON report of import metrics to [env: APP_IMPORT_REPORT_PATH]",
+)
+
+
+def report_import_metrics(journal: ImportJournal, results: list, report_path: str = None):
+    """
+    Reports metrics for grants imported in an import run, as a table, and optionally as a JSON file
+
+    :type journal: ImportJournal
+    :param journal: journal for the import run
+    :type results: list
+    :param results: import outcomes, as returned by 'ImportJournal.grants'
+    :type report_path: str
+    :param report_path: path to write the report to, or None to not write a report
+    """
+    summary = summarise_import_metrics(results)
+    if summary["grants"] > 0:
+        echo(f"\nImport metrics\n{format_import_metrics_summary(summary)}")
+
+    if report_path is not None:
+        report = {
+            "run": journal.run_id,
+            "summary": summary,
+            "grants": [
+                {key: result[key] for key in ("grant_reference", "status", "duration", "metrics")} for result in results
+            ],
+        }
+        with open(report_path, "w") as report_file:
+            json.dump(report, report_file, indent=2)
+        echo(f"Import report written to '{report_path}'")
+
 
 @importing_cli_group.command("categories")
 @argument("file_path", type=Path(exists=True))
@@ -56,3 +106,158 @@ def import_grant_from_provider(grant_provider, grant_reference, lead_project):
     """Import a research grant from a provider"""
     if grant_provider == "gtr":
         import_gateway_to_research_grant_interactively(grant_reference, lead_project)
+
+
+@importing_cli_group.command("grants")
+@argument("csv_file_path", type=Path(exists=True, dir_okay=False))
+@option(
+    "--workers",
+    envvar="APP_IMPORT_WORKERS",
+    type=IntRange(min=1),
+    default=4,
+    show_default=True,
+    help="Number of grants to import at once [env: APP_IMPORT_WORKERS]",
+)
+@option(
+    "--resume",
+    "resume_run_id",
+    type=int,
+    help="ID of an interrupted import run to continue, skipping grants that already finished",
+)
+@option(
+    "--retry-failed",
+    "retry_run_id",
+    type=int,
+    help="ID of an import run to continue, re-importing only grants that were not imported, updated or unchanged",
+)
+@report_option
+def import_grants_from_file(csv_file_path, workers, resume_run_id, retry_run_id, report_path):
+    """Import research grants from Gateway to Research, listed in a CSV file"""
+    if resume_run_id is not None and retry_run_id is not None:
+        raise UsageError("'--resume' and '--retry-failed' cannot be used together")
+
+    grants = gtr_csv_to_json(csv_file_path)["data"]
+    if resume_run_id is None and retry_run_id is None:
+        journal = ImportJournal.start(source=csv_file_path)
+    else:
+        try:
+            journal = ImportJournal.resume(run_id=resume_run_id if resume_run_id is not None else retry_run_id)
+        except KeyError as e:
+            raise UsageError(e.args[0])
+
+        if resume_run_id is not None:
+            finished_grant_references = set(journal.finished_grant_references())
+            grants = [grant for grant in grants if grant["grant-reference"] not in finished_grant_references]
+        else:
+            failed_grant_references = set(journal.failed_grant_references())
+            grants = [grant for grant in grants if grant["grant-reference"] in failed_grant_references]
+    echo(f"Import run: {journal.run_id}")
+
+    valid_grants = []
+    for grant in grants:
+        if grant_reference_valid(grant["grant-reference"]):
+            valid_grants.append(grant)
+        else:
+            journal.grant_started(grant["grant-reference"])
+            journal.grant_finished(grant["grant-reference"], status="invalid")
+
+    results = import_gateway_to_research_grants_interactively(valid_grants, workers=workers, journal=journal)
+    echo(format_grant_import_summary(results))
+    unmapped_summary = format_unmapped_mappings_summary(results)
+    if unmapped_summary is not None:
+        echo(f"\n{unmapped_summary}")
+    report_import_metrics(journal, results, report_path=report_path)
+
+
+@importing_cli_group.command("refresh")
+@option(
+    "--stale-after",
+    envvar="APP_IMPORT_REFRESH_STALE_AFTER",
+    type=FloatRange(min=0),
+    default=24,
+    show_default=True,
+    help="Hours after which an imported grant should be refreshed [env: APP_IMPORT_REFRESH_STALE_AFTER]",
+)
+@option(
+    "--max-seconds",
+    envvar="APP_IMPORT_REFRESH_MAX_SECONDS",
+    type=FloatRange(min=0),
+    help="Seconds to spend refreshing grants, no limit if not set [env: APP_IMPORT_REFRESH_MAX_SECONDS]",
+)
+@option(
+    "--max-requests",
+    envvar="APP_IMPORT_REFRESH_MAX_REQUESTS",
+    type=IntRange(min=0),
+    help="Number of GTR API requests to make, no limit if not set [env: APP_IMPORT_REFRESH_MAX_REQUESTS]",
+)
+@option(
+    "--shallow",
+    is_flag=True,
+    envvar="APP_IMPORT_REFRESH_SHALLOW",
+    help="Only fetch people and publications for grants whose GTR links have changed [env: APP_IMPORT_REFRESH_SHALLOW]",
+)
+@report_option
+def refresh_grants(stale_after, max_seconds, max_requests, shallow, report_path):
+    """Refresh stale research grants from Gateway to Research, least recently synced first"""
+    journal = ImportJournal.start(source="refresh")
+    echo(f"Import run: {journal.run_id}")
+
+    results = refresh_gateway_to_research_grants_interactively(
+        stale_after=timedelta(hours=stale_after),
+        max_seconds=max_seconds,
+        max_requests=max_requests,
+        journal=journal,
+        shallow=shallow,
+    )
+    echo(format_grant_import_summary(results))
+    unmapped_summary = format_unmapped_mappings_summary(results)
+    if unmapped_summary is not None:
+        echo(f"\n{unmapped_summary}")
+    report_import_metrics(journal, results, report_path=report_path)
+
+
+@command("worker")
+@option(
+    "--workers",
+    envvar="APP_IMPORT_WORKERS",
+    type=IntRange(min=1),
+    default=4,
+    show_default=True,
+    help="Number of grants to import at once [env: APP_IMPORT_WORKERS]",
+)
+@option(
+    "--poll-interval",
+    envvar="APP_IMPORT_WORKER_POLL_INTERVAL",
+    type=FloatRange(min=0),
+    default=5,
+    show_default=True,
+    help="Seconds to wait before checking for queued grants again [env: APP_IMPORT_WORKER_POLL_INTERVAL]",
+)
+@option("--burst", is_flag=True, help="Stop once there are no grants queued for import")
+@with_appcontext
+def import_worker_command(workers, poll_interval, burst):
+    """Import research grants queued for import (e.g. by the '/post-gtr-grant-bulk' route)"""
+    imported = run_gateway_to_research_import_workers(workers=workers, poll_interval=poll_interval, burst=burst)
+    echo(style(f"Imported {imported} queued grants", fg="green"))
+
+
+exporting_cli_group = AppGroup("export", help="Export data.")
+
+
+@exporting_cli_group.command("static")
+@argument("snapshot_path", type=Path(file_okay=False))
+@option(
+    "--base-url",
+    envvar="APP_URL",
+    required=True,
+    help="URL the API is available at, used for links in documents [env: APP_URL]",
+)
+def export_static_snapshot(snapshot_path, base_url):
+    """Render every document in the read API to a static snapshot"""
+    manifest = StaticSnapshotWriter(current_app, base_url).write(snapshot_path)
+    echo(
+        style(
+            f"Exported {len(manifest['documents'])} documents to static snapshot at '{snapshot_path}'",
+            fg="green",
+        )
+    )
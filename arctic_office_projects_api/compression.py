@@ -0,0 +1,203 @@
+import gzip
+import hashlib
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Optional
+
+from flask import Flask, Response, current_app, request
+
+try:
+    # noinspection PyPackageRequirements
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+
+class CompressedPayloadCache:
+    """
+    Bounded, least recently used, store of compressed response bodies
+
+    Entries are keyed by a digest of the uncompressed body and the content encoding used, so identical responses (such
+    as the same page of a collection requested by different clients) are compressed once and then served as stored.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        """
+        :type max_entries: int
+        :param max_entries: maximum number of compressed bodies to hold, 0 disables the cache
+        """
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, digest: bytes, encoding: str) -> Optional[bytes]:
+        """
+        :type digest: bytes
+        :param digest: digest of the uncompressed body
+        :type encoding: str
+        :param encoding: content encoding of the stored body (e.g. 'gzip')
+
+        :rtype bytes or None
+        :return: compressed body, if held
+        """
+        with self._lock:
+            payload = self._entries.get((digest, encoding))
+            if payload is not None:
+                self._entries.move_to_end((digest, encoding))
+            return payload
+
+    def put(self, digest: bytes, encoding: str, payload: bytes):
+        """
+        :type digest: bytes
+        :param digest: digest of the uncompressed body
+        :type encoding: str
+        :param encoding: content encoding of the compressed body (e.g. 'gzip')
+        :type payload: bytes
+        :param payload: compressed body
+        """
+        if self.max_entries <= 0:
+            return
+
+        with self._lock:
+            self._entries[(digest, encoding)] = payload
+            self._entries.move_to_end((digest, encoding))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def supported_content_encodings() -> list:
+    """
+    Content encodings this application can produce, in order of preference
+
+    Brotli is only available where the optional 'brotli' package is installed.
+
+    :rtype list
+    :return: content encoding tokens
+    """
+    if brotli is not None:
+        return ["br", "gzip"]
+    return ["gzip"]  # pragma: no cover
+
+
+def compress_payload(payload: bytes, encoding: str, level: int = None) -> bytes:
+    """
+    Compresses a response body using a given content encoding
+
+    :type payload: bytes
+    :param payload: uncompressed body
+    :type encoding: str
+    :param encoding: content encoding to use, either 'br' or 'gzip'
+    :type level: int
+    :param level: compression level (gzip: 1-9, brotli quality: 0-11), or None for a sensible default
+
+    :rtype bytes
+    :return: compressed body
+    """
+    if encoding == "br":
+        if brotli is None:  # pragma: no cover
+            raise ValueError("Brotli content encoding requested but the 'brotli' package is not installed")
+        return brotli.compress(payload, quality=5 if level is None else level)
+    if encoding == "gzip":
+        return gzip.compress(payload, compresslevel=6 if level is None else level, mtime=0)
+
+    raise ValueError(f"Unsupported content encoding '{encoding}'")
+
+
+class Compression:
+    """
+    Negotiated response compression
+
+    Compresses suitable responses using gzip or brotli, as negotiated from the 'Accept-Encoding' request header, where
+    a response body is over a minimum size. Compressed bodies are held in a CompressedPayloadCache to avoid compressing
+    the same body again on each request.
+
+    Responses that are streamed, or already have a content encoding (e.g. precompressed files), are left as they are.
+
+    Options:
+    * APP_COMPRESSION_MIN_SIZE - responses smaller than this many bytes are not compressed
+    * APP_COMPRESSION_CACHE_SIZE - number of compressed bodies to keep, 0 disables caching
+    """
+
+    compressible_mimetypes = (
+        "application/json",
+        "application/vnd.api+json",
+        "application/msgpack",
+        "application/vnd.api+msgpack",
+        "text/plain",
+        "text/csv",
+        "text/html",
+    )
+
+    def __init__(self, app: Flask = None):
+        if app is not None:
+            self.init_app(app)  # pragma: no cover
+
+    def init_app(self, app: Flask):
+        """
+        :type app: Flask
+        :param app: Flask application
+        """
+        app.config.setdefault("APP_COMPRESSION_MIN_SIZE", 1024)
+        app.config.setdefault("APP_COMPRESSION_CACHE_SIZE", 256)
+        app.extensions["compression"] = CompressedPayloadCache(max_entries=app.config["APP_COMPRESSION_CACHE_SIZE"])
+        app.after_request(self.compress_response)
+
+    def is_compressible(self, response: Response) -> bool:
+        """
+        Whether a response is suitable for compression, regardless of what the client accepts
+
+        :type response: Response
+        :param response: Flask response
+
+        :rtype bool
+        :return: whether the response can be compressed
+        """
+        if response.status_code < 200 or response.status_code in (204, 206, 304):
+            return False
+        if response.direct_passthrough or response.is_streamed:
+            return False
+        if "Content-Encoding" in response.headers:
+            return False
+        mimetype = response.mimetype or ""
+        if mimetype not in self.compressible_mimetypes and not mimetype.endswith("+json"):
+            return False
+
+        return True
+
+    def compress_response(self, response: Response) -> Response:
+        """
+        Flask 'after request' handler to compress a response where possible
+
+        :type response: Response
+        :param response: Flask response
+
+        :rtype Response
+        :return: Flask response, compressed where negotiated
+        """
+        if not self.is_compressible(response):
+            return response
+
+        response.vary.add("Accept-Encoding")
+
+        payload = response.get_data()
+        if len(payload) < current_app.config["APP_COMPRESSION_MIN_SIZE"]:
+            return response
+
+        encoding = request.accept_encodings.best_match(supported_content_encodings())
+        if encoding is None:
+            return response
+
+        cache = current_app.extensions["compression"]
+        digest = hashlib.sha256(payload).digest()
+        compressed_payload = cache.get(digest, encoding)
+        if compressed_payload is None:
+            compressed_payload = compress_payload(payload, encoding)
+            cache.put(digest, encoding, compressed_payload)
+
+        response.set_data(compressed_payload)
+        response.headers["Content-Encoding"] = encoding
+        return response
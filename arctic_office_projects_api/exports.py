@@ -0,0 +1,174 @@
+import csv
+import io
+
+from typing import Iterator
+
+from flask import current_app
+
+# noinspection PyPackageRequirements
+from sqlalchemy import inspect, select
+
+# noinspection PyPackageRequirements
+from sqlalchemy.orm import selectinload
+
+from arctic_office_projects_api.extensions import db
+from arctic_office_projects_api.models import (
+    Project,
+    Person,
+    Grant,
+    Organisation,
+    CategoryScheme,
+    CategoryTerm,
+    Participant,
+    Allocation,
+    Categorisation,
+)
+from arctic_office_projects_api.schemas import (
+    ProjectSchema,
+    PersonSchema,
+    GrantSchema,
+    OrganisationSchema,
+    CategorySchemeSchema,
+    CategoryTermSchema,
+    ParticipantSchema,
+    AllocationSchema,
+    CategorisationSchema,
+)
+from arctic_office_projects_api.schemas_extension import Relationship
+
+# Resources that can be exported, keyed by the name used in resource routes (e.g. '/projects')
+export_resources = {
+    "projects": (Project, ProjectSchema),
+    "people": (Person, PersonSchema),
+    "grants": (Grant, GrantSchema),
+    "organisations": (Organisation, OrganisationSchema),
+    "category-schemes": (CategoryScheme, CategorySchemeSchema),
+    "categories": (CategoryTerm, CategoryTermSchema),
+    "participants": (Participant, ParticipantSchema),
+    "allocations": (Allocation, AllocationSchema),
+    "categorisations": (Categorisation, CategorisationSchema),
+}
+
+export_formats = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+class ResourceExport:
+    """
+    Streams all instances of a resource, as flat records, in a given format
+
+    Records use the compact representation of each resource (see 'Schema.format_compact_response'), i.e. the fields
+    of the resource's schema, keyed by field name, with related resources given as IDs.
+
+    Instances are read from a server side cursor, in batches, with related resources needed for IDs loaded for each
+    batch as a whole. Memory use is therefore bounded by the batch size, rather than the number of instances.
+    """
+
+    def __init__(self, resource: str, batch_size: int = 500):
+        """
+        :type resource: str
+        :param resource: name of the resource to export, as used in resource routes (e.g. 'projects')
+        :type batch_size: int
+        :param batch_size: number of instances to read from the database at a time
+        """
+        if resource not in export_resources:
+            raise KeyError(f"Resource '{ resource }' cannot be exported")
+
+        self.model, schema_class = export_resources[resource]
+        self.schema = schema_class(compact=True)
+        self.batch_size = batch_size
+
+    @property
+    def field_names(self) -> list:
+        """
+        Names of fields included in each record, in schema order
+
+        :rtype list
+        :return: field names
+        """
+        return list(self.schema.fields.keys())
+
+    def _query(self):
+        """
+        Query for all instances of the resource, ordered by primary key for a stable output
+
+        Relationships used for related IDs are loaded per batch using 'SELECT ... IN' queries, which (unlike joined
+        loading) are compatible with reading instances in batches.
+        """
+        model_relationships = inspect(self.model).relationships.keys()
+        options = []
+        for name, field in self.schema.fields.items():
+            attribute = field.attribute or name
+            if isinstance(field, Relationship) and attribute in model_relationships:
+                options.append(selectinload(getattr(self.model, attribute)))
+
+        return (
+            select(self.model)
+            .options(*options)
+            .order_by(self.model.id)
+            .execution_options(yield_per=self.batch_size)
+        )
+
+    def records(self) -> Iterator[dict]:
+        """
+        Yields each instance of the resource as a record
+
+        :rtype Iterator
+        :return: resource records
+        """
+        for instance in db.session.execute(self._query()).scalars():
+            yield self.schema.dump(instance)["data"]
+
+    def ndjson(self) -> Iterator[str]:
+        """
+        Yields each instance of the resource as a line of newline delimited JSON
+
+        Values are encoded using the application JSON provider, as in other responses.
+
+        :rtype Iterator
+        :return: NDJSON lines
+        """
+        for record in self.records():
+            yield current_app.json.dumps(record, separators=(",", ":")) + "\n"
+
+    def csv(self) -> Iterator[str]:
+        """
+        Yields a header row and each instance of the resource as a row of comma separated values
+
+        Values that are not scalars (i.e. lists of related IDs, date ranges or enumerations) are encoded as JSON.
+
+        :rtype Iterator
+        :return: CSV rows
+        """
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=self.field_names, lineterminator="\n")
+
+        writer.writeheader()
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+
+        for record in self.records():
+            for key, value in record.items():
+                if isinstance(value, (list, dict)):
+                    record[key] = current_app.json.dumps(value, separators=(",", ":"))
+            writer.writerow(record)
+
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+
+    def stream(self, export_format: str) -> Iterator[str]:
+        """
+        :type export_format: str
+        :param export_format: either 'ndjson' or 'csv'
+
+        :rtype Iterator
+        :return: exported resources in the given format
+        """
+        if export_format not in export_formats:
+            raise KeyError(f"Export format '{ export_format }' is not supported")
+
+        return getattr(self, export_format)()
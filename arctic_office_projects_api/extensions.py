@@ -1,6 +1,9 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 
+from arctic_office_projects_api.compression import Compression
+
 # Initialize extensions
 db = SQLAlchemy()
 migrate = Migrate()
+compression = Compression()
@@ -1,22 +1,40 @@
-import requests
+import hashlib
+import json
 import time
 
-from datetime import date, datetime, timezone
-from typing import Dict, Optional, List
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import copy_context
+from datetime import date, datetime, timedelta, timezone
+from functools import wraps
+from threading import Event, Lock
+from typing import Callable, Dict, Iterator, Optional, List
 from urllib.parse import quote as url_encode
 
 from click import echo, style
-from flask import current_app as app
+from flask import current_app as app, has_app_context
 from psycopg2.extras import DateRange
 from requests import HTTPError
 
 # noinspection PyPackageRequirements
-from sqlalchemy import exists, and_
+from sqlalchemy import and_, delete, exists, func, insert, or_, select, tuple_, update
+
+# noinspection PyPackageRequirements
+from sqlalchemy.dialects.postgresql import insert as upsert
+from sqlalchemy.orm.exc import NoResultFound
 from sqlalchemy_utils import Ltree
 
 from arctic_office_projects_api.errors import AppException
 from arctic_office_projects_api.extensions import db
-from arctic_office_projects_api.utils import generate_neutral_id, log_exception_to_file
+from arctic_office_projects_api.importers.gtr_client import gtr_client
+from arctic_office_projects_api.importers.metrics import import_stage, with_import_metrics
+from arctic_office_projects_api.utils import format_table, generate_neutral_id
+from arctic_office_projects_api.importers.journal import (
+    ImportJournal,
+    claim_queued_grant,
+    grant_import_complete_statuses,
+    unmapped_mappings,
+)
 from arctic_office_projects_api.models import (
     Categorisation,
     CategoryScheme,
@@ -64,6 +82,296 @@ class UnmappedGatewayToResearchProjectSubject(AppException):
     )
 
 
+class UnmappedGatewayToResearchMappings(AppException):
+    title = "Unmapped Gateway to Research resources"
+    detail = (
+        "One or more Gateway to Research topics, subjects or organisations referenced by a Gateway to Research project "
+        "have not been mapped to application resources"
+    )
+
+
+def in_app_context(func: Callable) -> Callable:
+    """
+    Wraps a function to run within the current application context, for use in other threads
+
+    Resources look up mappings in the database as they are created, which needs an application context. Each thread
+    pushes its own context, and so uses its own database session.
+
+    The function is also run in a copy of the current context variables, so that work done in other threads is
+    included in any import metrics being recorded (see 'record_import_metrics').
+
+    :type func: callable
+    :param func: function to wrap
+
+    :rtype callable
+    :return: wrapped function
+    """
+    context = copy_context()
+    flask_app = app._get_current_object() if has_app_context() else None
+
+    def _run(*args, **kwargs):
+        if flask_app is None:
+            return func(*args, **kwargs)
+        with flask_app.app_context():
+            return func(*args, **kwargs)
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        return context.copy().run(_run, *args, **kwargs)
+
+    return wrapper
+
+
+class GatewayToResearchResourceMemo:
+    """
+    Run-scoped store of constructed GTR resources, keyed by resource class and URI
+
+    Within an import run (e.g. a bulk import of many grants), the same GTR resources are related to many projects, such
+    as funders (NERC, ESRC, etc.), employers, people and (for split awards) publications. Where a run is active, these
+    resources are constructed once and then reused, rather than fetched again for each project.
+
+    Where the same resource is requested by more than one thread at once, it is fetched by one thread and the others
+    wait for it. Once constructed, only the (compact) resource is kept. Resources that fail to construct (e.g. because
+    they are unmapped) are not kept.
+
+    Resources are only kept while a run is active, and are discarded when the last active run ends.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._runs = 0
+        self._resources = {}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def active(self) -> bool:
+        """
+        :rtype bool
+        :return: whether an import run is active
+        """
+        return self._runs > 0
+
+    @contextmanager
+    def run(self) -> Iterator["GatewayToResearchResourceMemo"]:
+        """
+        Context manager for an import run, within which resources are reused
+
+        Runs can be nested, or overlap in different threads, in which case resources are kept until all runs end.
+        """
+        with self._lock:
+            if self._runs == 0:
+                self.hits = 0
+                self.misses = 0
+            self._runs += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._runs -= 1
+                if self._runs == 0:
+                    self._resources.clear()
+
+    def invalidate(self):
+        """
+        Discards all held resources, e.g. as they include mapped values (such as ORCID iDs) that have changed
+        """
+        with self._lock:
+            self._resources.clear()
+
+    def get(self, resource_class: type, gtr_resource_uri: str) -> "GatewayToResearchResource":
+        """
+        Gets a GTR resource, constructing it if not already held (or if a run isn't active)
+
+        :type resource_class: type
+        :param resource_class: GatewayToResearchResource subclass (e.g. GatewayToResearchPerson)
+        :type gtr_resource_uri: str
+        :param gtr_resource_uri: URI of a Gateway to Research resource
+
+        :rtype GatewayToResearchResource
+        :return: GTR resource
+        """
+        if not self.active:
+            return resource_class(gtr_resource_uri=gtr_resource_uri)
+
+        key = (resource_class, gtr_resource_uri)
+        with self._lock:
+            held_resource = self._resources.get(key)
+            if held_resource is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+                pending_resource = Future()
+                self._resources[key] = pending_resource
+        if isinstance(held_resource, Future):
+            return held_resource.result()
+        if held_resource is not None:
+            return held_resource
+
+        try:
+            resource = resource_class(gtr_resource_uri=gtr_resource_uri)
+        except BaseException as e:
+            with self._lock:
+                self._resources.pop(key, None)
+            pending_resource.set_exception(e)
+            raise
+        with self._lock:
+            if self._resources.get(key) is pending_resource:
+                self._resources[key] = resource
+        pending_resource.set_result(resource)
+        return resource
+
+    def __len__(self):
+        return len(self._resources)
+
+
+# Resources shared between projects in an import run
+gtr_resource_memo = GatewayToResearchResourceMemo()
+
+
+class GatewayToResearchMappingIndex:
+    """
+    Run-scoped index of the mappings between GTR resources and resources in this project
+
+    Mappings are held in database tables (Project_Organisations, Project_People, Project_Subjects and Project_Topics),
+    each with a unique key (a GTR organisation ID, person ID, subject name or topic ID).
+
+    Within an import run, each table is loaded once, the first time it is used, as a dict of keys to values. Outside of
+    a run, each lookup is a single query, using the index on the key column.
+
+    Loaded tables are discarded when the last active run ends, or when they are invalidated (i.e. when mappings are
+    added or changed). As mappings may be changed by another process (e.g. by routes in a web process while import
+    workers run), long running imports can also refresh the index, discarding tables changed since they were loaded.
+    """
+
+    mappings = {
+        "organisations": (Project_Organisations, "organisation_id", "organisation_ror"),
+        "people": (Project_People, "gtr_person_id", "orcid"),
+        "subjects": (Project_Subjects, "subject_text", "gcmd_link_code"),
+        "topics": (Project_Topics, "topic_id", "gcmd_link_code"),
+    }
+
+    def __init__(self):
+        self._lock = Lock()
+        self._runs = 0
+        self._indexes = {}
+        self._versions = {}
+        self.loads = 0
+
+    @property
+    def active(self) -> bool:
+        """
+        :rtype bool
+        :return: whether an import run is active
+        """
+        return self._runs > 0
+
+    @contextmanager
+    def run(self) -> Iterator["GatewayToResearchMappingIndex"]:
+        """
+        Context manager for an import run, within which mapping tables are loaded once
+
+        Runs can be nested, or overlap in different threads, in which case tables are kept until all runs end.
+        """
+        with self._lock:
+            self._runs += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._runs -= 1
+                if self._runs == 0:
+                    self._indexes.clear()
+
+    def invalidate(self, mapping: str = None):
+        """
+        Discards a loaded mapping table, or all tables, so they are loaded again when next used
+
+        :type mapping: str
+        :param mapping: name of a mapping (e.g. 'topics'), or None for all mappings
+        """
+        with self._lock:
+            if mapping is None:
+                self._indexes.clear()
+            else:
+                self._indexes.pop(mapping, None)
+
+    def refresh(self) -> List[str]:
+        """
+        Discards loaded mapping tables that have changed in the database since the index was last refreshed
+
+        Each table is versioned by its number of mappings and when a mapping was last updated, using a single query.
+
+        :rtype list
+        :return: names of mappings that have changed (including all mappings when first refreshed)
+        """
+        versions = db.session.execute(
+            select(
+                *[
+                    select(func.concat(func.count(), "/", func.max(model.updated_at))).scalar_subquery()
+                    for model, _, _ in self.mappings.values()
+                ]
+            )
+        ).one()
+
+        changed = []
+        with self._lock:
+            for mapping, version in zip(self.mappings, versions):
+                if self._versions.get(mapping) != version:
+                    self._versions[mapping] = version
+                    self._indexes.pop(mapping, None)
+                    changed.append(mapping)
+        return changed
+
+    def lookup(self, mapping: str, key: str) -> Optional[str]:
+        """
+        Gets the value mapped to a key
+
+        :type mapping: str
+        :param mapping: name of a mapping (e.g. 'topics')
+        :type key: str
+        :param key: key to look up (e.g. a GTR topic ID)
+
+        :rtype str or None
+        :return: mapped value (which may be None)
+        :raises KeyError: if the key is not mapped
+        """
+        model, key_column, value_column = self.mappings[mapping]
+
+        if not self.active:
+            row = db.session.query(getattr(model, value_column)).filter(getattr(model, key_column) == key).first()
+            if row is None:
+                raise KeyError(key)
+            return row[0]
+
+        with self._lock:
+            index = self._indexes.get(mapping)
+            if index is None:
+                index = dict(db.session.query(getattr(model, key_column), getattr(model, value_column)).all())
+                self._indexes[mapping] = index
+                self.loads += 1
+        return index[key]
+
+
+# Mappings between GTR resources and resources in this project, shared in an import run
+gtr_mapping_index = GatewayToResearchMappingIndex()
+
+# Outcomes of importing a grant, as returned by 'import_gateway_to_research_grant_interactively'
+grant_import_statuses = (
+    "imported",
+    "updated",
+    "unchanged",
+    "not-found",
+    "unmapped",
+    "unmapped-organisation",
+    "unmapped-person",
+    "unmapped-topic",
+    "unmapped-subject",
+    "invalid",
+    "failed",
+)
+
+
 class GatewayToResearchResource:
     """
     Represents the API response for a GTR resource
@@ -71,8 +379,14 @@ class GatewayToResearchResource:
     These have a common structure with each resource identified by a UUID and containing a collection of attributes,
     including a 'links' attribute. This is a list of links to other resources with a 'rel' attribute indicating its
     type/person (e.g. a publication or a person).
+
+    Resources are compact value objects (using '__slots__'), as many are held at once in bulk imports (see
+    'GatewayToResearchResourceMemo'). Subclasses keep only the attributes used by this project, and release the raw GTR
+    response once these are extracted (see '_release_resource').
     """
 
+    __slots__ = ("resource", "resource_uri", "resource_links")
+
     def __init__(self, gtr_resource_uri: str):
         """
         :type gtr_resource_uri: str
@@ -82,6 +396,17 @@ class GatewayToResearchResource:
         self.resource_uri = gtr_resource_uri
         self.resource_links = self._process_resource_links()
 
+    def _release_resource(self, links: bool = True):
+        """
+        Releases the raw GTR response, once the attributes used by this project have been extracted from it
+
+        :type links: bool
+        :param links: whether to also release links to other resources (see '_process_resource_links')
+        """
+        self.resource = None
+        if links:
+            self.resource_links = None
+
     @staticmethod
     def _fetch(gtr_resource_uri: str) -> Optional[dict]:
         """
@@ -93,15 +418,8 @@ class GatewayToResearchResource:
         :rtype dict
         :return GTR API response body - typically a resource
         """
-        time.sleep(2)
         try:
-            gtr_resource_response = requests.get(
-                url=gtr_resource_uri,
-                headers={"accept": "application/vnd.rcuk.gtr.json-v7"},
-                timeout=100,
-            )
-            gtr_resource_response.raise_for_status()
-            return gtr_resource_response.json()
+            return gtr_client.get_json(url=gtr_resource_uri, cached=True)
         except (HTTPError, KeyError, ValueError) as e:
             raise e
 
@@ -180,6 +498,8 @@ class GatewayToResearchOrganisation(GatewayToResearchResource):
     This class is intended to hold any common functionality shared by these related classes.
     """
 
+    __slots__ = ("name", "ror_id")
+
     def __init__(self, gtr_resource_uri: str):
         """
         :type gtr_resource_uri: str
@@ -191,26 +511,23 @@ class GatewayToResearchOrganisation(GatewayToResearchResource):
             raise KeyError("Name element not in GTR organisation")
         self.name = self.resource["name"]
 
-        self.ror_id = self._map_to_ror()
+        with import_stage("map"):
+            self.ror_id = self._map_to_ror()
+        self._release_resource()
 
-    def _ror_dict(resource_uri) -> str:
-
-        gtr_path = "http://gtr.ukri.org/gtr/api/organisations/"
-        _ror_list = []
-
-        project_organisations = Project_Organisations.query.all()
-        for organisation in project_organisations:
-            org_ror_dict = {
-                "organisation_uri": gtr_path + organisation.organisation_id,
-                "ror_uri": organisation.organisation_ror,
-            }
-            _ror_list.append(org_ror_dict)
+    @staticmethod
+    def _ror_dict(resource_uri) -> Optional[str]:
+        """
+        :type resource_uri: str
+        :param resource_uri: URI of a GTR organisation
 
-        for ror_item in _ror_list:
-            if resource_uri == ror_item["organisation_uri"]:
-                return ror_item["ror_uri"]
-            else:
-                return "None"
+        :rtype str or None
+        :return: ROR ID mapped to the GTR organisation, or None if not mapped
+        """
+        try:
+            return gtr_mapping_index.lookup("organisations", resource_uri.rstrip("/").split("/")[-1])
+        except KeyError:
+            return None
 
     def _map_to_ror(self) -> str:
         """
@@ -237,7 +554,7 @@ class GatewayToResearchFunder(GatewayToResearchOrganisation):
     All logic for this resource is defined in it's parent class.
     """
 
-    pass
+    __slots__ = ()
 
 
 class GatewayToResearchEmployer(GatewayToResearchOrganisation):
@@ -247,7 +564,7 @@ class GatewayToResearchEmployer(GatewayToResearchOrganisation):
     All logic for this resource is defined in it's parent class.
     """
 
-    pass
+    __slots__ = ()
 
 
 class GatewayToResearchFund(GatewayToResearchResource):
@@ -257,6 +574,8 @@ class GatewayToResearchFund(GatewayToResearchResource):
     GTR Funds are associate with a GTR Funder (funding organisation).
     """
 
+    __slots__ = ("funder", "duration", "currency", "amount")
+
     def __init__(self, gtr_resource_uri: str):
         """
         :type gtr_resource_uri: str
@@ -264,9 +583,7 @@ class GatewayToResearchFund(GatewayToResearchResource):
         """
         super().__init__(gtr_resource_uri)
 
-        self.funder = GatewayToResearchFunder(
-            gtr_resource_uri=self._find_gtr_funder_link()
-        )
+        self.funder = gtr_resource_memo.get(GatewayToResearchFunder, gtr_resource_uri=self._find_gtr_funder_link())
 
         if "start" not in self.resource:
             raise KeyError("Start date element not in GTR fund")
@@ -289,6 +606,7 @@ class GatewayToResearchFund(GatewayToResearchResource):
             self.resource["valuePounds"]["currencyCode"]
         )
         self.amount = self.resource["valuePounds"]["amount"]
+        self._release_resource()
 
     @staticmethod
     def _map_gtr_fund_currency_code(currency_code: str) -> GrantCurrency:
@@ -356,6 +674,8 @@ class GatewayToResearchPerson(GatewayToResearchResource):
     GTR People are associated with a GTR Employer (host organisation).
     """
 
+    __slots__ = ("employer", "first_name", "surname", "orcid_id")
+
     def __init__(self, gtr_resource_uri: str):
         """
         :type gtr_resource_uri: str
@@ -363,8 +683,8 @@ class GatewayToResearchPerson(GatewayToResearchResource):
         """
         super().__init__(gtr_resource_uri)
 
-        self.employer = GatewayToResearchEmployer(
-            gtr_resource_uri=self._find_gtr_employer_link()
+        self.employer = gtr_resource_memo.get(
+            GatewayToResearchEmployer, gtr_resource_uri=self._find_gtr_employer_link()
         )
 
         self.first_name = None
@@ -379,7 +699,9 @@ class GatewayToResearchPerson(GatewayToResearchResource):
                 self.orcid_id = f"https://orcid.org/{self.resource['orcidId']}"
         else:
             print("Person orcid_id not found in GtR. Using manual entries instead.")
-            self._map_id_to_orcid_ids()
+            with import_stage("map"):
+                self._map_id_to_orcid_ids()
+        self._release_resource()
 
     def _find_gtr_employer_link(self):
         """
@@ -415,24 +737,17 @@ class GatewayToResearchPerson(GatewayToResearchResource):
         In cases where an ORCID iD is known for an individual, but not by GTR, it can be defined manually in this
         method.
 
-        These mappings are currently defined using a simple if statement, but in future a more scalable solution will
-        be needed.
+        These mappings are defined in the Project_People database table.
 
         :rtype srt - initialise: self.orcid_id
         :return for a given GTR resource URI, a corresponding ORCID iD as a URL
         """
         # Extract the UUID from the current person's resource URI
-        gtr_person_uuid = self.resource_uri.split('/')[-1]
-        gtr_people_orcid_id_mappings = {}
-
-        project_people = Project_People.query.all()
-        for person in project_people:
-            row_uuid = person.gtr_person.split('/')[-1] if person.gtr_person else None
-            orcid = person.orcid
-            gtr_people_orcid_id_mappings[row_uuid] = orcid
+        gtr_person_uuid = self.resource_uri.rstrip('/').split('/')[-1]
 
-        # Check if the current person exists in the mapping
-        if gtr_person_uuid not in gtr_people_orcid_id_mappings:
+        try:
+            self.orcid_id = gtr_mapping_index.lookup("people", gtr_person_uuid)
+        except KeyError:
             raise UnmappedGatewayToResearchPerson(meta={
                 'gtr_person': {
                     'resource_uri': self.resource_uri,
@@ -440,20 +755,14 @@ class GatewayToResearchPerson(GatewayToResearchResource):
                 }
             })
 
-        # Assign ORCID ID if the person exists in the mapping
-        if gtr_person_uuid in gtr_people_orcid_id_mappings:
-            self.orcid_id = gtr_people_orcid_id_mappings[gtr_person_uuid]
-        else:
-            # Optional: handle missing mapping gracefully
-            self.orcid_id = None
-            print(f"No ORCID found for {self.resource_uri}")
-
 
 class GatewayToResearchPublication(GatewayToResearchResource):
     """
     Represents a GTR Publication, associated with a GTR Project
     """
 
+    __slots__ = ("doi",)
+
     def __init__(self, gtr_resource_uri: str):
         """
         :type gtr_resource_uri: str
@@ -465,6 +774,7 @@ class GatewayToResearchPublication(GatewayToResearchResource):
             self.doi = self.resource["doi"]
         else:
             self.doi = None
+        self._release_resource()
 
 
 class GatewayToResearchProject(GatewayToResearchResource):
@@ -472,12 +782,42 @@ class GatewayToResearchProject(GatewayToResearchResource):
     Represents a GTR Project, which is considered a grant by this project
 
     GTR projects are associated various other resources, including funding information, publications and people.
+
+    Once the project is fetched, these other resources are independent of each other, and so are fetched concurrently
+    using a bounded pool of threads (within the rate limit shared by all GTR requests). Each resource is then only
+    delayed by those it depends on (i.e. a person's employer), rather than by all the others.
+
+    Shallow projects only fetch the project and its fund (and funder). Their people and publications are None until
+    fetched using 'fetch_people_and_publications'.
+
+    Before any related resources are fetched, the topics and subjects referenced by the project are checked against the
+    mappings needed to import it (see 'find_unmapped'), so that projects that cannot be imported only cost a single
+    request, and all missing mappings are reported at once.
+
+    The raw GTR response is released once the project is constructed, but its links are kept, as they are needed to
+    fetch the people and publications of shallow projects, and to detect changes to them (see 'links_hash').
     """
 
-    def __init__(self, gtr_resource_uri: str):
+    __slots__ = (
+        "identifiers",
+        "research_topics",
+        "research_subjects",
+        "shallow",
+        "fund",
+        "publications",
+        "principle_investigators",
+        "co_investigators",
+        "status",
+        "title",
+        "abstract",
+    )
+
+    def __init__(self, gtr_resource_uri: str, shallow: bool = False):
         """
         :type gtr_resource_uri: str
         :param gtr_resource_uri: URI of a Gateway to Research resource
+        :type shallow: bool
+        :param shallow: whether to fetch only the project and its fund, and not its people and publications
         """
 
         super().__init__(gtr_resource_uri)
@@ -488,12 +828,19 @@ class GatewayToResearchProject(GatewayToResearchResource):
         # print(self.research_topics)
         self.research_subjects = self._process_research_subjects()
         # print(self.research_subjects)
-        self.publications = self._process_publications()
-        # print(self.publications)
-        self.fund = GatewayToResearchFund(gtr_resource_uri=self._find_gtr_fund_link())
-        # print (self.fund)
-        self.principle_investigators = self._process_people(relation="PI_PER")
-        self.co_investigators = self._process_people(relation="COI_PER")
+
+        with import_stage("map"):
+            unmapped = self.find_unmapped()
+        if unmapped:
+            raise UnmappedGatewayToResearchMappings(
+                meta={"gtr_project": {"resource_uri": self.resource_uri}, "unmapped": unmapped}
+            )
+
+        self.shallow = shallow
+        self.publications = None
+        self.principle_investigators = None
+        self.co_investigators = None
+        self._fetch_related(people_and_publications=not shallow)
 
         if "status" not in self.resource:
             raise KeyError("Status element not in GTR project")
@@ -505,6 +852,156 @@ class GatewayToResearchProject(GatewayToResearchResource):
         self.abstract = None
         if "abstractText" in self.resource:
             self.abstract = self.resource["abstractText"]
+        self._release_resource(links=False)
+
+    def find_unmapped(self) -> List[dict]:
+        """
+        Finds mappings needed to import the project that are missing, using only the project resource
+
+        Checks the project's research topics and subjects using the same mappers used to import them, so mappings with
+        an empty value (i.e. unclassified topics and subjects) are not missing.
+
+        Funders and people are checked as their resources are fetched instead, as the mappings they need are only known
+        from these resources (i.e. a person's ORCID iD only needs mapping where GTR does not have one). The project's
+        lead organisation is not checked, as it is not imported (organisations are imported from funders and the
+        employers of people instead).
+
+        :rtype list
+        :return: missing mappings, as dicts with 'mapping', 'key' and 'name' keys
+        """
+        references = [("topics", topic["id"], topic.get("text"), topic) for topic in self.research_topics]
+        references += [("subjects", subject["text"], subject["text"], subject) for subject in self.research_subjects]
+        mappers = {
+            "topics": GatewayToResearchGrantImporter._map_gtr_project_research_topic_to_category_term,
+            "subjects": GatewayToResearchGrantImporter._map_gtr_project_research_subject_to_category_term,
+        }
+
+        unmapped = []
+        for mapping, key, name, reference in references:
+            gap = {"mapping": mapping, "key": key, "name": name}
+            if gap in unmapped:
+                continue
+            try:
+                mappers[mapping](reference)
+            except (UnmappedGatewayToResearchProjectTopic, UnmappedGatewayToResearchProjectSubject):
+                unmapped.append(gap)
+        return unmapped
+
+    def fetch_people_and_publications(self):
+        """
+        Fetches the people and publications of a shallow project, making it a full project
+        """
+        if self.shallow:
+            self._fetch_related(fund=False)
+            self.shallow = False
+
+    def _fetch_related(self, fund: bool = True, people_and_publications: bool = True):
+        """
+        Fetches resources related to the project concurrently
+
+        :type fund: bool
+        :param fund: whether to fetch the project's fund
+        :type people_and_publications: bool
+        :param people_and_publications: whether to fetch the project's people and publications
+        """
+        executor = ThreadPoolExecutor(max_workers=gtr_client.fetch_workers)
+        try:
+            if people_and_publications:
+                publications = self._process_publications(executor=executor)
+            if fund:
+                pending_fund = executor.submit(
+                    in_app_context(GatewayToResearchFund), gtr_resource_uri=self._find_gtr_fund_link()
+                )
+            if people_and_publications:
+                principle_investigators = self._process_people(relation="PI_PER", executor=executor)
+                co_investigators = self._process_people(relation="COI_PER", executor=executor)
+
+            # Results are collected in the order resources were previously fetched in, so any error raised is consistent
+            if people_and_publications:
+                self.publications = [publication.result().doi for publication in publications]
+                # print(self.publications)
+            if fund:
+                self.fund = pending_fund.result()
+                # print (self.fund)
+            if people_and_publications:
+                self.principle_investigators = [person.result() for person in principle_investigators]
+                self.co_investigators = [person.result() for person in co_investigators]
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    @property
+    def project_content(self) -> dict:
+        """
+        Normalised content of the project and its fund, as used for grants and projects in this project
+
+        Available for shallow projects.
+
+        :rtype dict
+        :return: project content, as JSON serialisable values
+        """
+        return {
+            "title": self.title,
+            "abstract": self.abstract,
+            "status": self.status,
+            "identifiers": self.identifiers,
+            "research_topics": self.research_topics,
+            "research_subjects": self.research_subjects,
+            "fund": {
+                "start": self.fund.duration.lower.isoformat(),
+                "end": self.fund.duration.upper.isoformat(),
+                "currency": self.fund.currency.name,
+                "amount": self.fund.amount,
+                "funder": self.fund.funder.ror_id,
+            },
+        }
+
+    @property
+    def content(self) -> dict:
+        """
+        Normalised content of the project, its fund and people, as used for grants and projects in this project
+
+        Used to detect whether a project has changed since it was last imported, regardless of changes to parts of GTR
+        resources that are not used (e.g. link ordering or unrelated attributes).
+
+        :rtype dict
+        :return: project content, as JSON serialisable values
+        """
+        return {
+            **self.project_content,
+            "publications": self.publications,
+            "principle_investigators": [self._person_content(person) for person in self.principle_investigators],
+            "co_investigators": [self._person_content(person) for person in self.co_investigators],
+        }
+
+    @property
+    def links_hash(self) -> str:
+        """
+        Hash of the set of resources the project links to (e.g. its people and publications)
+
+        Used to detect whether a project's people or publications may have changed, without fetching them.
+
+        :rtype str
+        :return: SHA-256 hash, as a hex string
+        """
+        links = sorted([rel, href] for rel, hrefs in self.resource_links.items() for href in hrefs)
+        return hashlib.sha256(json.dumps(links).encode()).hexdigest()
+
+    @staticmethod
+    def _person_content(person: GatewayToResearchPerson) -> dict:
+        """
+        :type person: GatewayToResearchPerson
+        :param person: GTR person
+
+        :rtype dict
+        :return: person content, as JSON serialisable values
+        """
+        return {
+            "resource_uri": person.resource_uri,
+            "first_name": person.first_name,
+            "surname": person.surname,
+            "orcid_id": person.orcid_id,
+            "employer": person.employer.ror_id,
+        }
 
     def _process_identifiers(self) -> Dict[str, List[str]]:
         """
@@ -602,38 +1099,53 @@ class GatewayToResearchProject(GatewayToResearchResource):
 
         return gtr_project_subjects
 
-    def _process_publications(self) -> List[str]:
+    def _process_publications(self, executor: ThreadPoolExecutor) -> List[Future]:
         """
         Fetches each publication associated with a GTR Project
 
         In GTR, publications a full resource, however in this project, they are just a list of DOIs.
 
+        :type executor: ThreadPoolExecutor
+        :param executor: pool to fetch publications in
+
         :rtype list
-        :return list of publication DOIs
+        :return list of pending GTR Publication resources
         """
         publications = []
         if "PUBLICATION" in self.resource_links:
             for publication_uri in self.resource_links["PUBLICATION"]:
-                publication = GatewayToResearchPublication(
-                    gtr_resource_uri=publication_uri
+                publications.append(
+                    executor.submit(
+                        in_app_context(gtr_resource_memo.get),
+                        GatewayToResearchPublication,
+                        gtr_resource_uri=publication_uri,
+                    )
                 )
-                publications.append(publication.doi)
 
         return publications
 
-    def _process_people(self, relation: str) -> List[GatewayToResearchPerson]:
+    def _process_people(self, relation: str, executor: ThreadPoolExecutor) -> List[Future]:
         """
         Fetches people associated with a GTR Project with a given relation
 
         I.e. Fetches all the Co-Investigator's for a project.
 
+        :type relation: str
+        :param relation: GTR link relation (e.g. 'PI_PER')
+        :type executor: ThreadPoolExecutor
+        :param executor: pool to fetch people in
+
         :rtype list
-        :return list of GTR People resources for further processing
+        :return list of pending GTR People resources for further processing
         """
         people = []
         if relation in self.resource_links.keys():
             for person in self.resource_links[relation]:
-                people.append(GatewayToResearchPerson(gtr_resource_uri=person))
+                people.append(
+                    executor.submit(
+                        in_app_context(gtr_resource_memo.get), GatewayToResearchPerson, gtr_resource_uri=person
+                    )
+                )
         return people
 
     def _find_gtr_fund_link(self):
@@ -676,6 +1188,7 @@ class GatewayToResearchGrantImporter:
         gtr_grant_reference: str = None,
         gtr_project_id: str = None,
         lead_project: str = None,
+        parent_grant_reference: str = None,
     ):
         """
         :type gtr_grant_reference: str
@@ -684,13 +1197,17 @@ class GatewayToResearchGrantImporter:
         :param gtr_grant_reference: Gateway to Research project ID (e.g. '87D5AD44-2123-442B-B186-75C3878471BD')
         :type lead_project: bool
         :param lead_project: Is the project/grant the lead for a split award?
+        :type parent_grant_reference: str
+        :param parent_grant_reference: grant reference of the lead grant, for other grants in a split award
         """
         self.grant_reference = gtr_grant_reference
         self.gtr_project_id = gtr_project_id
         self.lead_project = (
             int(lead_project) if lead_project is not None else 0
         )  # Handle NoneType safely
+        self.parent_grant_reference = parent_grant_reference
         self.grant_exists = False
+        self.gtr_project_id_stored = False
 
     def exists(self) -> bool:
         """
@@ -708,29 +1225,89 @@ class GatewayToResearchGrantImporter:
 
         return data_exists
 
-    def update(self, gtr_project_id):
+    def update(self, gtr_project_id, shallow: bool = False) -> bool:
         """
         Updates a Gateway to Research project & grant which have previously been imported
 
+        Where the content of the GTR project (see 'content_hash') is the same as when the grant was last imported or
+        updated, only the time the grant was synced is updated.
+
+        Resources are fetched from GTR, and compared with the grant, before the grant is locked for writing (see
+        '_lock_grant_reference'), so other importers are not blocked while waiting on GTR.
+
+        Shallow updates only fetch the GTR project and its fund. The project's people and publications are only fetched
+        where the resources the project links to have changed since the grant was last synced (see 'links_hash'),
+        otherwise changes to the project and fund (see 'project_content_hash') are updated on their own.
+
+        Where a parent grant reference is set, the grant is linked to its parent, whether or not it has changed.
+
+        Where the GTR project ID was stored when the grant was imported (see 'resolve'), and GTR no longer has a project
+        with that ID, the grant reference is searched for again and the ID found is stored instead.
+
+        :type gtr_project_id: str
+        :param gtr_project_id: Gateway to Research project ID (e.g. '87D5AD44-2123-442B-B186-75C3878471BD')
+        :type shallow: bool
+        :param shallow: whether to only fetch people and publications if the project's links have changed
+
         :rtype bool
-        :return: Whether a GTR project has already been imported as a Grant
+        :return: Whether the GTR project had changed, and so the Grant and Project were updated
         """
 
-        gtr_project = GatewayToResearchProject(
-            gtr_resource_uri=f"https://gtr.ukri.org/gtr/api/projects/{gtr_project_id}"
-        )
+        self.gtr_project_id = gtr_project_id
+        with import_stage("fetch"):
+            gtr_project = self._fetch_gtr_project(shallow=shallow)
+
+        # Hashes are compared, and any further resources fetched, before the grant is locked for writing
+        stored_hashes = db.session.execute(
+            select(Grant.gtr_content_hash, Grant.gtr_project_content_hash, Grant.gtr_links_hash).where(
+                Grant.reference == self.grant_reference
+            )
+        ).one()
+
+        with import_stage("map"):
+            project_content_hash = self.project_content_hash(gtr_project)
+        if shallow and stored_hashes.gtr_links_hash != gtr_project.links_hash:
+            with import_stage("fetch"):
+                gtr_project.fetch_people_and_publications()
+            shallow = False
+        content_hash = None
+        if shallow:
+            changed = stored_hashes.gtr_project_content_hash != project_content_hash
+        else:
+            with import_stage("map"):
+                content_hash = self.content_hash(gtr_project)
+            changed = stored_hashes.gtr_content_hash != content_hash
+
+        with import_stage("persist"):
+            self._lock_grant_reference(self.grant_reference)
+            grant_db_data = (
+                db.session.query(Grant).filter_by(reference=self.grant_reference).first()
+            )
+            grant_db_data.gtr_synced_at = datetime.now(tz=timezone.utc)
+            grant_db_data.gtr_project_id = self.gtr_project_id
+            if self.parent_grant_reference is not None:
+                grant_db_data.parent_id = self._parent_grant_id()
+
+        if not changed:
+            if not shallow:
+                grant_db_data.gtr_project_content_hash = project_content_hash
+                grant_db_data.gtr_links_hash = gtr_project.links_hash
+            with import_stage("persist"):
+                db.session.commit()
+            return False
+        if not shallow:
+            grant_db_data.gtr_content_hash = content_hash
+            grant_db_data.gtr_links_hash = gtr_project.links_hash
+            grant_db_data.publications = gtr_project.publications
 
         # Update the Grant
-        grant_db_data = (
-            db.session.query(Grant).filter_by(reference=self.grant_reference).first()
-        )
+        grant_db_data.gtr_project_content_hash = project_content_hash
         grant_db_data.title = gtr_project.title
         grant_db_data.abstract = gtr_project.abstract
         grant_db_data.status = self._map_gtr_project_status(status=gtr_project.status)
         grant_db_data.duration = gtr_project.fund.duration
         grant_db_data.total_funds_currency = gtr_project.fund.currency
         grant_db_data.total_funds = gtr_project.fund.amount
-        grant_db_data.publications = gtr_project.publications
         grant_db_data.lead_project = self.lead_project
         grant_db_data.funder = Organisation.query.filter_by(
             ror_identifier=gtr_project.fund.funder.ror_id
@@ -747,7 +1324,27 @@ class GatewayToResearchGrantImporter:
         project_db_data.publications = grant_db_data.publications
         project_db_data.lead_project = self.lead_project
 
-        db.session.commit()
+        with import_stage("persist"):
+            db.session.commit()
+        return True
+
+    def resolve(self) -> Optional[str]:
+        """
+        Given a grant reference, find the corresponding GTR project resource ID
+
+        The ID stored when the grant was imported is used where available, as the GTR project for a grant reference
+        does not change. Otherwise GTR is searched for the grant reference (see 'search').
+
+        :rtype str
+        :return ID of a GTR project resource
+        """
+        self.gtr_project_id = db.session.scalar(
+            select(Grant.gtr_project_id).where(Grant.reference == self.grant_reference)
+        )
+        self.gtr_project_id_stored = self.gtr_project_id is not None
+        if not self.gtr_project_id_stored:
+            return self.search()
+        return self.gtr_project_id
 
     def search(self) -> Optional[str]:
         """
@@ -759,14 +1356,10 @@ class GatewayToResearchGrantImporter:
         :return ID of a GTR project resource
         """
         try:
-            gtr_project_response = requests.get(
+            gtr_project_data = gtr_client.get_json(
                 url=f'{"https://gtr.ukri.org/gtr/api/projects"}',
                 params={"q": url_encode(self.grant_reference), "f": "pro.gr"},
-                headers={"accept": "application/vnd.rcuk.gtr.json-v7"},
-                timeout=100,
             )
-            gtr_project_response.raise_for_status()
-            gtr_project_data = gtr_project_response.json()
             if "project" not in gtr_project_data:
                 raise KeyError("Project element not in GTR response")
             if len(gtr_project_data["project"]) != 1:
@@ -781,6 +1374,38 @@ class GatewayToResearchGrantImporter:
         except (HTTPError, KeyError, ValueError) as e:
             raise e
 
+    def _fetch_gtr_project(self, shallow: bool = False) -> GatewayToResearchProject:
+        """
+        Fetches the GTR project for the grant
+
+        Where the GTR project ID was stored when the grant was imported (see 'resolve'), and fetching the project
+        returns a 404 error (e.g. because GTR have replaced the project), the grant reference is searched for again.
+        404 errors for resources related to the project (e.g. its fund) are raised as other errors are.
+
+        :type shallow: bool
+        :param shallow: whether to only fetch the project and its fund (see 'GatewayToResearchProject')
+
+        :rtype GatewayToResearchProject
+        :return GTR project
+        """
+        gtr_project_uri = f"https://gtr.ukri.org/gtr/api/projects/{self.gtr_project_id}"
+        try:
+            return GatewayToResearchProject(gtr_resource_uri=gtr_project_uri, shallow=shallow)
+        except HTTPError as e:
+            if (
+                not self.gtr_project_id_stored
+                or e.response is None
+                or e.response.status_code != 404
+                or e.response.url != gtr_project_uri
+            ):
+                raise e
+
+        self.gtr_project_id_stored = False
+        self.search()
+        return GatewayToResearchProject(
+            gtr_resource_uri=f"https://gtr.ukri.org/gtr/api/projects/{self.gtr_project_id}", shallow=shallow
+        )
+
     def fetch(self):
         """
         Fetches a given GTR project, and associated resources to create and persist resources in this project
@@ -788,6 +1413,11 @@ class GatewayToResearchGrantImporter:
         A series of GTR resources are retrieved and re-arranged into resources in this project. For resources shared
         across this project (i.e. people) suitable checks are made to ensure duplicates are not created.
 
+        All resources are persisted in a single transaction, using a small number of batched statements, so a grant is
+        either imported completely or not at all. The Grant, Project and Allocation are upserted, while holding a lock
+        for the grant reference (see '_lock_grant_reference'), so that importing the same grant more than once at the
+        same time (e.g. from different workers or servers) updates, rather than duplicates, these resources.
+
         Requirements:
             * where Organisations are used (Grant funders and People organisations), these must already exist
             * where Category Terms are used, these must already exist
@@ -797,306 +1427,270 @@ class GatewayToResearchGrantImporter:
             * GatewayToResearchPerson._map_id_to_orcid_ids()
             * _map_gtr_project_research_topic_to_category_term()
             * _map_gtr_project_research_subject_to_category_term()
-        """
-        gtr_project = GatewayToResearchProject(
-            gtr_resource_uri=f"https://gtr.ukri.org/gtr/api/projects/{self.gtr_project_id}"
-        )
 
-        # If the grant exists - update it & the project too
-        if self.grant_exists is True:
+        Missing topic and subject mappings are found before any resources other than the GTR project are fetched (see
+        'GatewayToResearchProject.find_unmapped').
+
+        Time spent fetching, mapping and persisting resources, and linking category terms, is recorded as stages in any
+        import metrics being recorded (see 'import_stage').
+        """
+        with import_stage("fetch"):
+            gtr_project = self._fetch_gtr_project()
+
+        with import_stage("map"):
+            grant_reference = self._find_gtr_project_identifier(identifiers=gtr_project.identifiers)
+
+            grant_values = {
+                "title": gtr_project.title,
+                "abstract": gtr_project.abstract,
+                "status": self._map_gtr_project_status(status=gtr_project.status),
+                "duration": gtr_project.fund.duration,
+                "total_funds_currency": gtr_project.fund.currency,
+                "total_funds": gtr_project.fund.amount,
+                "publications": gtr_project.publications,
+                "lead_project": bool(self.lead_project),
+                "organisation_id": select(Organisation.id)
+                .where(Organisation.ror_identifier == gtr_project.fund.funder.ror_id)
+                .scalar_subquery(),
+                "gtr_content_hash": self.content_hash(gtr_project),
+                "gtr_project_content_hash": self.project_content_hash(gtr_project),
+                "gtr_links_hash": gtr_project.links_hash,
+                "gtr_project_id": self.gtr_project_id,
+                "gtr_synced_at": datetime.now(tz=timezone.utc),
+            }
+            if self.parent_grant_reference is not None:
+                grant_values["parent_id"] = self._parent_grant_id()
+            project_values = {
+                "title": gtr_project.title,
+                "abstract": gtr_project.abstract,
+                "project_duration": gtr_project.fund.duration,
+                "access_duration": DateRange(gtr_project.fund.duration.lower, None),
+                "publications": gtr_project.publications,
+                "lead_project": bool(self.lead_project),
+            }
 
-            project_reference = self._find_gtr_project_identifier(
-                identifiers=gtr_project.identifiers
+        with import_stage("persist"):
+            # The grant may have been imported by another importer since it was checked, in which case it is updated
+            self._lock_grant_reference(grant_reference)
+            grant_id = db.session.execute(
+                upsert(Grant)
+                .values(neutral_id=generate_neutral_id(), reference=grant_reference, **grant_values)
+                .on_conflict_do_update(index_elements=["reference"], set_=grant_values)
+                .returning(Grant.id)
+            ).scalar_one()
+            project_id = db.session.execute(
+                upsert(Project)
+                .values(neutral_id=generate_neutral_id(), grant_reference=grant_reference, **project_values)
+                .on_conflict_do_update(
+                    index_elements=["grant_reference"],
+                    index_where=and_(Project.grant_reference.isnot(None), Project.grant_reference != ""),
+                    set_=project_values,
+                )
+                .returning(Project.id)
+            ).scalar_one()
+            db.session.execute(
+                upsert(Allocation)
+                .values(neutral_id=generate_neutral_id(), project_id=project_id, grant_id=grant_id)
+                .on_conflict_do_nothing(index_elements=["project_id", "grant_id"])
             )
-
-            grant = Grant.query.filter_by(reference=project_reference).first()
-
-            grant.title = gtr_project.title
-            grant.abstract = gtr_project.abstract
-            grant.status = self._map_gtr_project_status(status=gtr_project.status)
-            grant.duration = gtr_project.fund.duration
-            grant.total_funds_currency = gtr_project.fund.currency
-            grant.total_funds = gtr_project.fund.amount
-            grant.publications = gtr_project.publications
-            grant.lead_project = self.lead_project
-            grant.funder = Organisation.query.filter_by(
-                ror_identifier=gtr_project.fund.funder.ror_id
-            ).one_or_none()
-
-            allocations = Allocation.query.filter_by(grant_id=grant.id).all()
-
-            for allocation in allocations:
-                project = Project.query.filter_by(id=allocation.project_id).first()
-                project.title = grant.title
-                project.abstract = grant.abstract
-                project.project_duration = grant.duration
-                project.access_duration = DateRange(grant.duration.lower, None)
-                project.publications = grant.publications
-                project.lead_project = self.lead_project
-
-        # Otherwise - add the new grant & the new project
-        else:
-            grant = Grant(
-                neutral_id=generate_neutral_id(),
-                reference=self._find_gtr_project_identifier(
-                    identifiers=gtr_project.identifiers
-                ),
-                title=gtr_project.title,
-                abstract=gtr_project.abstract,
-                status=self._map_gtr_project_status(status=gtr_project.status),
-                duration=gtr_project.fund.duration,
-                total_funds_currency=gtr_project.fund.currency,
-                total_funds=gtr_project.fund.amount,
-                publications=gtr_project.publications,
-                lead_project=self.lead_project,
-                funder=Organisation.query.filter_by(
-                    ror_identifier=gtr_project.fund.funder.ror_id
-                ).one_or_none(),
+            project = db.session.get(Project, project_id)
+
+        with import_stage("link-categories"):
+            self._save_gtr_category_terms(gtr_project)
+            self._link_gtr_category_terms(gtr_project, project=project)
+
+        with import_stage("persist"):
+            self._add_gtr_people(
+                project=project,
+                gtr_people={
+                    ParticipantRole.InvestigationRole_PrincipleInvestigator: gtr_project.principle_investigators,
+                    ParticipantRole.InvestigationRole_CoInvestigator: gtr_project.co_investigators,
+                },
             )
+            db.session.commit()
 
-            project = Project(
-                neutral_id=generate_neutral_id(),
-                title=grant.title,
-                abstract=grant.abstract,
-                project_duration=grant.duration,
-                access_duration=DateRange(grant.duration.lower, None),
-                publications=grant.publications,
-                lead_project=self.lead_project,
-                grant_reference=self._find_gtr_project_identifier(
-                    identifiers=gtr_project.identifiers
-                ),
-            )
+    def _parent_grant_id(self):
+        """
+        Query for the ID of the parent (lead) grant of a grant in a split award
 
-            db.session.add(project)
+        If the parent grant has not been imported (e.g. because it could not be), the query gives None, and the grant is
+        linked to its parent when it is next imported or updated.
 
-            db.session.add(
-                Allocation(
-                    neutral_id=generate_neutral_id(), project=project, grant=grant
-                )
-            )
+        :rtype ScalarSelect
+        :return: subquery for the ID of the parent grant
+        """
+        return select(Grant.id).where(Grant.reference == self.parent_grant_reference).scalar_subquery()
 
-        self._save_gtr_category_terms(gtr_project)
-        self._link_gtr_category_terms(gtr_project)
+    @staticmethod
+    def _lock_grant_reference(grant_reference: str):
+        """
+        Takes a lock for a grant reference, waiting for any other importer holding it to finish
 
-        self._add_gtr_people(
-            project=project,
-            gtr_people=gtr_project.principle_investigators,
-            role=ParticipantRole.InvestigationRole_PrincipleInvestigator,
-        )
-        self._add_gtr_people(
-            project=project,
-            gtr_people=gtr_project.co_investigators,
-            role=ParticipantRole.InvestigationRole_CoInvestigator,
-        )
+        Locks are Postgres advisory locks, held until the current transaction ends, and so are shared between threads,
+        processes and servers using the same database. Locks are only taken when writing to the database, so other
+        importers can fetch resources from GTR at the same time.
 
-        db.session.commit()
+        :type grant_reference: str
+        :param grant_reference: grant reference (e.g. 'NE/K011820/1')
+        """
+        key = int.from_bytes(hashlib.sha256(f"gtr-grant:{grant_reference}".encode()).digest()[:8], "big", signed=True)
+        db.session.execute(select(func.pg_advisory_xact_lock(key)))
+
+    def content_hash(self, gtr_project: GatewayToResearchProject) -> str:
+        """
+        Hash of the content of a GTR project, and the other values used to create a Grant and Project from it
 
-    def _save_gtr_category_terms(self, project):
+        :type gtr_project: GatewayToResearchProject
+        :param gtr_project: GTR project
 
+        :rtype str
+        :return: SHA-256 hash, as a hex string
+        """
+        return self._hash_content(gtr_project.content)
+
+    def project_content_hash(self, gtr_project: GatewayToResearchProject) -> str:
+        """
+        Hash of the content of a GTR project and its fund (i.e. excluding its people and publications), and the other
+        values used to create a Grant and Project from it
+
+        :type gtr_project: GatewayToResearchProject
+        :param gtr_project: GTR project, which may be shallow
+
+        :rtype str
+        :return: SHA-256 hash, as a hex string
+        """
+        return self._hash_content(gtr_project.project_content)
+
+    def _hash_content(self, project_content: dict) -> str:
+        """
+        :type project_content: dict
+        :param project_content: GTR project content
+
+        :rtype str
+        :return: SHA-256 hash, as a hex string
+        """
+        content = json.dumps({"project": project_content, "lead_project": self.lead_project}, sort_keys=True, default=str)
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    @staticmethod
+    def _save_gtr_category_terms(project: GatewayToResearchProject):
+        """
+        Creates or updates Category Terms for the research topics and subjects of a GTR project
+
+        Terms are upserted in a single statement, keyed by their scheme identifier (the GTR topic/subject ID), and
+        are not committed (i.e. they are saved in the same transaction as the rest of the grant).
+
+        :type project: GatewayToResearchProject
+        :param project: GTR project being imported
+        """
         gtr_category_path = Ltree("gtr.ukri.org.resources.classificationprojects.html")
 
-        for term in project.research_subjects:
-            # If the subjects exist - update them
-            if db.session.query(
-                exists().where(CategoryTerm.scheme_identifier == term["id"])
-            ).scalar():
-                research_subject_to_update = CategoryTerm.query.filter_by(
-                    scheme_identifier=term["id"]
-                ).one()
-
-                research_subject_to_update.scheme_identifier = term["id"]
-                research_subject_to_update.name = term["text"]
-                research_subject_to_update.path = gtr_category_path
-                research_subject_to_update.category_scheme = CategoryScheme.query.filter_by(
-                    namespace="https://gtr.ukri.org/resources/classificationlists.html"
-                ).one()
-                print(
-                    "GTR research_subject updated",
-                    research_subject_to_update.name,
-                    research_subject_to_update.scheme_identifier,
-                )
-            # Otherwise add them
-            else:
-                print("Add new category term:", term["text"], term["id"])
-                category_term_resource = CategoryTerm(
-                    neutral_id=generate_neutral_id(),
-                    scheme_identifier=term["id"],
-                    name=term["text"],
-                    path=gtr_category_path,
-                    category_scheme=CategoryScheme.query.filter_by(
-                        namespace="https://gtr.ukri.org/resources/classificationlists.html"
-                    ).one(),
-                )
-                print(
-                    "GTR research_subject added",
-                    category_term_resource.name,
-                    category_term_resource.neutral_id,
-                )
-                db.session.add(category_term_resource)
-                db.session.commit()
+        terms = {term["id"]: term["text"] for term in project.research_subjects + project.research_topics}
+        if not terms:
+            return
 
-        for term in project.research_topics:
-            # If the topics exist - update them
-            if db.session.query(
-                exists().where(CategoryTerm.scheme_identifier == term["id"])
-            ).scalar():
-
-                research_topic_to_update = CategoryTerm.query.filter_by(
-                    scheme_identifier=term["id"]
-                ).one()
-
-                research_topic_to_update.scheme_identifier = term["id"]
-                research_topic_to_update.name = term["text"]
-                research_topic_to_update.path = gtr_category_path
-                research_topic_to_update.category_scheme = CategoryScheme.query.filter_by(
-                    namespace="https://gtr.ukri.org/resources/classificationlists.html"
-                ).one()
-                # print("GTR research_topic updated", research_topic_to_update.name, research_subject_to_update.scheme_identifier)
-            # Otherwise add them
-            else:
-                category_term_resource = CategoryTerm(
-                    neutral_id=generate_neutral_id(),
-                    scheme_identifier=term["id"],
-                    name=term["text"],
-                    path=gtr_category_path,
-                    category_scheme=CategoryScheme.query.filter_by(
-                        namespace="https://gtr.ukri.org/resources/classificationlists.html"
-                    ).one(),
-                )
-                print(
-                    "GTR research_topic added",
-                    category_term_resource.name,
-                    category_term_resource.neutral_id,
-                )
-                db.session.add(category_term_resource)
-                db.session.commit()
+        category_scheme_id = (
+            db.session.query(CategoryScheme.id)
+            .filter_by(namespace="https://gtr.ukri.org/resources/classificationlists.html")
+            .one()
+            .id
+        )
+        statement = upsert(CategoryTerm).values(
+            [
+                {
+                    "neutral_id": generate_neutral_id(),
+                    "category_scheme_id": category_scheme_id,
+                    "scheme_identifier": scheme_identifier,
+                    "name": name,
+                    "path": gtr_category_path,
+                }
+                for scheme_identifier, name in terms.items()
+            ]
+        )
+        db.session.execute(
+            statement.on_conflict_do_update(
+                index_elements=["scheme_identifier"],
+                set_={
+                    "category_scheme_id": statement.excluded.category_scheme_id,
+                    "name": statement.excluded.name,
+                    "path": statement.excluded.path,
+                },
+            )
+        )
 
-    def _link_gtr_category_terms(self, project):
+    def _link_gtr_category_terms(self, gtr_project: GatewayToResearchProject, project: Project):
+        """
+        Links a project to the Category Terms for the research topics and subjects of a GTR project
 
+        Links (Categorisations) are added for terms not yet linked to the project, and removed for terms the project is
+        no longer associated with. Terms are looked up in a single query.
+
+        :type gtr_project: GatewayToResearchProject
+        :param gtr_project: GTR project being imported
+        :type project: Project
+        :param project: Project resource being created or updated as part of the import process
+        """
         # GTR Research Topics and Subjects
         gtr_topics = self._find_unique_gtr_project_research_items(
-            gtr_research_items=project.research_topics
+            gtr_research_items=gtr_project.research_topics
         )
         gtr_subjects = self._find_unique_gtr_project_research_items(
-            gtr_research_items=project.research_subjects
+            gtr_research_items=gtr_project.research_subjects
         )
 
         # GCMD Research Topics and Subjects
         gcmd_topics = self._find_unique_gcmd_project_research_topics(
-            gtr_research_topics=project.research_topics
+            gtr_research_topics=gtr_project.research_topics
         )
         gcmd_subjects = self._find_unique_gcmd_project_research_subjects(
-            gtr_research_subjects=project.research_subjects
+            gtr_research_subjects=gtr_project.research_subjects
         )
 
         # Flatten the processed topics and subjects to dinstinct list of GCMD identifiers
-
-        # GTR Topics
-        category_term_scheme_identifiers = list(gtr_topics)
-        # GTR Subjects
-        category_term_scheme_identifiers.extend(
-            x for x in gtr_subjects if x not in category_term_scheme_identifiers
-        )
-        # GCMD Topics
-        category_term_scheme_identifiers.extend(
-            x for x in gcmd_topics if x not in category_term_scheme_identifiers
+        category_term_scheme_identifiers = []
+        for category_term_scheme_identifier in gtr_topics + gtr_subjects + gcmd_topics + gcmd_subjects:
+            # For edge cases where URLs are added instead of category terms
+            if category_term_scheme_identifier == "none" or category_term_scheme_identifier.startswith("https:"):
+                continue
+            if category_term_scheme_identifier not in category_term_scheme_identifiers:
+                category_term_scheme_identifiers.append(category_term_scheme_identifier)
+
+        category_term_ids = dict(
+            db.session.query(CategoryTerm.scheme_identifier, CategoryTerm.id).filter(
+                CategoryTerm.scheme_identifier.in_(category_term_scheme_identifiers)
+            )
         )
-        # GCMD Subjects
-        category_term_scheme_identifiers.extend(
-            x for x in gcmd_subjects if x not in category_term_scheme_identifiers
+        for category_term_scheme_identifier in category_term_scheme_identifiers:
+            if category_term_scheme_identifier not in category_term_ids:
+                raise NoResultFound(f"Category term '{category_term_scheme_identifier}' not found")
+
+        existing_categorisations = dict(
+            db.session.query(CategoryTerm.scheme_identifier, Categorisation.id)
+            .join(Categorisation, Categorisation.category_term_id == CategoryTerm.id)
+            .filter(Categorisation.project_id == project.id)
         )
 
-        # Get project_id if it exists
-        grant = Grant.query.filter_by(reference=self.grant_reference).first()
-        allocation = Allocation.query.filter_by(grant_id=grant.id).first()
-        project_id = allocation.project_id
-
-        # Get the project
-        project = Project.query.filter_by(id=allocation.project_id).first()
-
-        # print("project id: ", project_id)
-
-        project_category_terms = Categorisation.query.filter_by(
-            project_id=project_id
-        ).all()
-
-        # If terms exist in the database see if they need altering
-        # create two lists. 1: exsisting terms. 2: incoming terms.
-        if project_category_terms:
-
-            existing_terms = []
-            incoming_terms = []
-
-            for project_category_term in project_category_terms:
-
-                category_term = CategoryTerm.query.filter_by(
-                    id=project_category_term.category_term_id
-                ).one()
-                existing_terms.append(category_term.scheme_identifier)
-
-            for category_term_scheme_identifier in category_term_scheme_identifiers:
-
-                incoming_terms.append(category_term_scheme_identifier)
-
-            # Compare the lists for adding
-            existing = set(existing_terms)
-            missing_in_existing_add = [x for x in incoming_terms if x not in existing]
-            for category_term_scheme_identifier in missing_in_existing_add:
-
-                # Save to category terms link table - links cat terms to projects
-                db.session.add(
-                    Categorisation(
-                        neutral_id=generate_neutral_id(),
-                        project_id=project_id,
-                        category_term=CategoryTerm.query.filter_by(
-                            scheme_identifier=category_term_scheme_identifier
-                        ).one(),
-                    )
-                )
-                print("linking topic/subject", category_term_scheme_identifier)
-
-            # Compare the lists for removing
-            # incoming_terms.pop() # Debug: pop off an incoming record to test if this works.
-            incoming = set(incoming_terms)
-            missing_in_incoming_remove = [
-                x for x in existing_terms if x not in incoming
-            ]
-            for category_term_scheme_identifier in missing_in_incoming_remove:
-
-                # Remove from category terms link table - unlinks cat terms to projects
-                category_term = CategoryTerm.query.filter_by(
-                    scheme_identifier=category_term_scheme_identifier
-                ).one()
-
-                Categorisation.query.filter_by(
-                    category_term_id=category_term.id
-                ).delete()
-                print("unlinking topic/subject", category_term_scheme_identifier)
-
-        # Otherwise this is a new grant import, so link the categories
-        else:
-            for category_term_scheme_identifier in category_term_scheme_identifiers:
-
-                # For edge cases where URLs are added instead of category terms
-                URL_check = category_term_scheme_identifier.split("/")
-
-                # Save to category terms link table - links projects to category terms
-                if category_term_scheme_identifier != "none":
-                    if URL_check[0] != "https:":
-                        db.session.add(
-                            Categorisation(
-                                neutral_id=generate_neutral_id(),
-                                project=project,
-                                category_term=CategoryTerm.query.filter_by(
-                                    scheme_identifier=category_term_scheme_identifier
-                                ).one(),
-                            )
-                        )
-
-                        print(
-                            "GTR topic/subject link added:",
-                            category_term_scheme_identifier,
-                        )
+        # Save to category terms link table - links projects to category terms
+        categorisations = [
+            {
+                "neutral_id": generate_neutral_id(),
+                "project_id": project.id,
+                "category_term_id": category_term_ids[category_term_scheme_identifier],
+            }
+            for category_term_scheme_identifier in category_term_scheme_identifiers
+            if category_term_scheme_identifier not in existing_categorisations
+        ]
+        if categorisations:
+            db.session.execute(insert(Categorisation), categorisations)
+
+        # Remove from category terms link table - unlinks projects from category terms
+        removed_categorisation_ids = [
+            categorisation_id
+            for category_term_scheme_identifier, categorisation_id in existing_categorisations.items()
+            if category_term_scheme_identifier not in category_term_scheme_identifiers
+        ]
+        if removed_categorisation_ids:
+            db.session.execute(delete(Categorisation).where(Categorisation.id.in_(removed_categorisation_ids)))
 
     def _find_gtr_project_identifier(self, identifiers: Dict[str, List[str]]) -> str:
         """
@@ -1130,14 +1724,19 @@ class GatewayToResearchGrantImporter:
     @staticmethod
     def _add_gtr_people(
         project: Project,
-        gtr_people: List[GatewayToResearchPerson],
-        role: ParticipantRole,
+        gtr_people: Dict[ParticipantRole, List[GatewayToResearchPerson]],
     ):
         """
         Links a project to it's participants
 
-        Participant resources are created for each person associated with a Project in a given role. Existing People
-        resources are used where possible, otherwise new resources with associated Organisations as needed.
+        Participant resources are created for each person associated with a Project in each role, unless the person
+        already participates in the project in that role. Existing People resources are used where possible, otherwise
+        new resources are created, associated with Organisations as needed.
+
+        People in all roles are resolved together. Existing People are matched by their ORCID iD first, then by their
+        name and organisation, using a single query. Where a person is matched by name and organisation, and GTR gives
+        an ORCID iD the existing person lacks, it is added. New People and Participants are inserted in a statement
+        each, with People upserted by their ORCID iD. The project must have been flushed (i.e. have an ID).
 
         Requirements:
             * where Organisations are used (Grant funders and People organisations), these must already exist
@@ -1148,50 +1747,121 @@ class GatewayToResearchGrantImporter:
 
         :type project: Project
         :param project: Project resource being created as part of import process
-        :type gtr_people: list
-        :param gtr_people: list of GTR people resources associated with the GTR project being imported
-        :type role: ParticipantRole
-        :param role: Member of the ParticipantRole enumeration to apply to Participant resources created
+        :type gtr_people: dict
+        :param gtr_people: lists of GTR people resources associated with the GTR project being imported, indexed by the
+        member of the ParticipantRole enumeration to apply to Participant resources created for them
         """
-        for person in gtr_people:
+        people = [(person, role) for role, role_people in gtr_people.items() for person in role_people]
+        if not people:
+            return
 
-            org_id = (
-                db.session.query(Organisation.id)
-                .filter(Organisation.ror_identifier == person.employer.ror_id)
-                .scalar()
+        organisation_ids = dict(
+            db.session.query(Organisation.ror_identifier, Organisation.id).filter(
+                Organisation.ror_identifier.in_({person.employer.ror_id for person, _ in people})
             )
+        )
 
-            if not db.session.query(
-                exists().where(
-                    and_(
-                        Person.first_name == person.first_name,
-                        Person.last_name == person.surname,
-                        Person.organisation_id == org_id,
-                    )
-                )
-            ).scalar():
-                db.session.add(
-                    Person(
-                        neutral_id=generate_neutral_id(),
-                        first_name=person.first_name,
-                        last_name=person.surname,
-                        orcid_id=person.orcid_id,
-                        organisation=Organisation.query.filter_by(
-                            ror_identifier=person.employer.ror_id
-                        ).one_or_none(),
-                    )
+        # People are identified by their ORCID iD, or otherwise by their name and organisation
+        orcid_ids = {person.orcid_id for person, _ in people if person.orcid_id is not None}
+        name_keys = {
+            (person.first_name, person.surname, organisation_ids.get(person.employer.ror_id)) for person, _ in people
+        }
+        person_ids_by_orcid_id = {}
+        person_ids_by_name = {}
+        people_without_orcid_ids = set()
+        for person_id, orcid_id, first_name, last_name, organisation_id in db.session.query(
+            Person.id, Person.orcid_id, Person.first_name, Person.last_name, Person.organisation_id
+        ).filter(
+            or_(
+                Person.orcid_id.in_(orcid_ids),
+                tuple_(Person.first_name, Person.last_name, Person.organisation_id).in_(
+                    [key for key in name_keys if key[2] is not None]
+                ),
+                *[
+                    and_(Person.first_name == key[0], Person.last_name == key[1], Person.organisation_id.is_(None))
+                    for key in name_keys
+                    if key[2] is None
+                ],
+            )
+        ).order_by(Person.id):
+            if orcid_id is not None:
+                person_ids_by_orcid_id[orcid_id] = person_id
+            else:
+                people_without_orcid_ids.add(person_id)
+            person_ids_by_name.setdefault((first_name, last_name, organisation_id), person_id)
+
+        person_ids = []
+        new_people = {}
+        orcid_updates = {}
+        for person, _ in people:
+            name_key = (person.first_name, person.surname, organisation_ids.get(person.employer.ror_id))
+            person_id = person_ids_by_orcid_id.get(person.orcid_id)
+            if person_id is None:
+                person_id = person_ids_by_name.get(name_key)
+                # A person with the same name and organisation but a different ORCID iD is someone else
+                if person_id is not None and person.orcid_id is not None:
+                    if person_id in people_without_orcid_ids:
+                        people_without_orcid_ids.discard(person_id)
+                        person_ids_by_orcid_id[person.orcid_id] = person_id
+                        orcid_updates[person_id] = person.orcid_id
+                    else:
+                        person_id = None
+            if person_id is None:
+                new_key = person.orcid_id or name_key
+                new_people.setdefault(
+                    new_key,
+                    {
+                        "neutral_id": generate_neutral_id(),
+                        "first_name": person.first_name,
+                        "last_name": person.surname,
+                        "orcid_id": person.orcid_id,
+                        "organisation_id": name_key[2],
+                    },
                 )
+                person_id = new_key
+            person_ids.append(person_id)
 
-            db.session.add(
-                Participant(
-                    neutral_id=generate_neutral_id(),
-                    role=role,
-                    project=project,
-                    person=Person.query.filter_by(
-                        first_name=person.first_name, last_name=person.surname
-                    ).first(),
-                )
+        if orcid_updates:
+            db.session.execute(
+                update(Person),
+                [{"id": person_id, "orcid_id": orcid_id} for person_id, orcid_id in orcid_updates.items()],
             )
+        if new_people:
+            # People with an ORCID iD may have been added by another importer since they were looked up (e.g. people
+            # shared by grants imported at once), in which case the existing person is used. People are inserted in
+            # order of their ORCID iDs, so importers waiting on people added by each other cannot deadlock.
+            new_people = dict(sorted(new_people.items(), key=lambda new_person: new_person[1]["orcid_id"] or ""))
+            statement = upsert(Person)
+            added_people = db.session.execute(
+                statement.on_conflict_do_update(
+                    index_elements=["orcid_id"], set_={"orcid_id": statement.excluded.orcid_id}
+                ).returning(Person.id, Person.neutral_id, Person.orcid_id),
+                list(new_people.values()),
+            ).all()
+            added_person_ids = {orcid_id or neutral_id: person_id for person_id, neutral_id, orcid_id in added_people}
+            new_person_ids = {
+                new_key: added_person_ids[new_person["orcid_id"] or new_person["neutral_id"]]
+                for new_key, new_person in new_people.items()
+            }
+            person_ids = [new_person_ids.get(person_id, person_id) for person_id in person_ids]
+
+        existing_participants = set(
+            db.session.query(Participant.person_id, Participant.role).filter(Participant.project_id == project.id)
+        )
+        participants = {}
+        for person_id, (_, role) in zip(person_ids, people):
+            if (person_id, role) not in existing_participants:
+                participants.setdefault(
+                    (person_id, role),
+                    {
+                        "neutral_id": generate_neutral_id(),
+                        "role": role,
+                        "project_id": project.id,
+                        "person_id": person_id,
+                    },
+                )
+        if participants:
+            db.session.execute(insert(Participant), list(participants.values()))
 
     @staticmethod
     def _map_gtr_project_status(status: str) -> GrantStatus:
@@ -1312,8 +1982,7 @@ class GatewayToResearchGrantImporter:
         use a category scheme supported by this project and no other identifier is available to automatically determine
         a corresponding Category based on its GTR research topic ID.
 
-        This mapping therefore needs to be defined manually in this method. Currently this is done using a simple if
-        statement, but in future a more scalable solution will be needed.
+        This mapping therefore needs to be defined manually, in the Project_Topics database table.
 
         :type gtr_research_topic: dict
         :param gtr_research_topic: GTR project research topic
@@ -1321,33 +1990,21 @@ class GatewayToResearchGrantImporter:
         :rtype str or None
         :return a Category scheme identifier corresponding to a GTR research topic ID, or None if unclassified
         """
-        topics_list = []
-        protocol = "https://"
-
-        project_subjects = Project_Topics.query.all()
-        for subject in project_subjects:
-            key = subject.topic_id
-            value = protocol + subject.gcmd_link_code if subject.gcmd_link_code and subject.gcmd_link_code != "none" else "none"
-            topics_list.append({key: value})
-
-        for topic in topics_list:
-            for key, value in topic.items():
-                # print(f"Checking: {gtr_research_topic['id']} against {key} with value {value}")
-                if gtr_research_topic["id"] == key:
-                    # print(f"Match found: {key}")
-                    if value == "none":
-                        return None
-                    else:
-                        return value
-        # raise first after for loop
-        raise UnmappedGatewayToResearchProjectTopic(
-            meta={
-                "gtr_research_topic": {
-                    "id": gtr_research_topic["id"],
-                    "name": gtr_research_topic["text"],
+        try:
+            gcmd_link_code = gtr_mapping_index.lookup("topics", gtr_research_topic["id"])
+        except KeyError:
+            raise UnmappedGatewayToResearchProjectTopic(
+                meta={
+                    "gtr_research_topic": {
+                        "id": gtr_research_topic["id"],
+                        "name": gtr_research_topic["text"],
+                    }
                 }
-            }
-        )
+            )
+
+        if not gcmd_link_code or gcmd_link_code == "none":
+            return None
+        return f"https://{gcmd_link_code}"
 
     @staticmethod
     def _map_gtr_project_research_subject_to_category_term(
@@ -1358,54 +2015,78 @@ class GatewayToResearchGrantImporter:
         use a category scheme supported by this project and no other identifier is available to automatically determine
         a corresponding Category based on its GTR research subject name.
 
-        This mapping therefore needs to be defined manually in this method. Currently this is done using a simple if
-        statement, but in future a more scalable solution will be needed.
+        This mapping therefore needs to be defined manually, in the Project_Subjects database table.
 
         :type gtr_research_subject: dict
         :param gtr_research_subject: GTR project research subject
 
-        :rtype str
-        :return a Category scheme identifier corresponding to a GTR research subject name
-        """
-        subjects_list = []
-        protocol = "https://"
-
-        project_subjects = Project_Subjects.query.all()
-        for subject in project_subjects:
-            key = subject.subject_text
-            value = protocol + subject.gcmd_code if subject.gcmd_code and subject.gcmd_code != "none" else "none"
-            subjects_list.append({key: value})
-
-        for subject in subjects_list:
-            for key, value in subject.items():
-                # print("From file:", key)
-                # print("Passed in:", gtr_research_subject["text"])
-                if gtr_research_subject["text"] == key:
-                    return value
-        # raise after first for loop
-        raise UnmappedGatewayToResearchProjectSubject(
-            meta={
-                "gtr_research_subject": {
-                    "id": gtr_research_subject["id"],
-                    "name": gtr_research_subject["text"],
+        :rtype str or None
+        :return a Category scheme identifier corresponding to a GTR research subject name, or None if unclassified
+        """
+        try:
+            gcmd_link_code = gtr_mapping_index.lookup("subjects", gtr_research_subject["text"])
+        except KeyError:
+            raise UnmappedGatewayToResearchProjectSubject(
+                meta={
+                    "gtr_research_subject": {
+                        "id": gtr_research_subject["id"],
+                        "name": gtr_research_subject["text"],
+                    }
                 }
-            }
-        )
+            )
+
+        if not gcmd_link_code or gcmd_link_code == "none":
+            return None
+        return f"https://{gcmd_link_code}"
 
 
+@with_import_metrics
 def import_gateway_to_research_grant_interactively(
-    gtr_grant_reference: str, lead_project: str
-):
+    gtr_grant_reference: str,
+    lead_project: str,
+    journal: ImportJournal = None,
+    shallow: bool = False,
+    parent_grant_reference: str = None,
+) -> str:
     """
     Command to import a project/grant from Gateway to Research
 
     Wraps around the GatewayToResearchGrantImporter class to provide some feedback during import.
 
-    All errors will trigger an exception to be raised with any pending database models to be removed/flushed.
+    The outcome of the import is recorded in an import journal, either for an existing import run, or for a new run
+    for just this grant, along with metrics for the import (see 'ImportMetrics').
+
+    Unmapped GTR resources are reported and recorded. All other errors are recorded and will trigger an exception to be
+    raised with any pending database models to be removed/flushed.
 
     :type gtr_grant_reference: str
     :param gtr_grant_reference: Gateway to Research grant reference (e.g. 'NE/K011820/1')
+    :type lead_project: str
+    :param lead_project: Is the project/grant the lead for a split award? ('1' or '0')
+    :type journal: ImportJournal
+    :param journal: journal for the import run the grant is part of, or None to start a new run
+    :type shallow: bool
+    :param shallow: whether to update existing grants shallowly (see 'GatewayToResearchGrantImporter.update')
+    :type parent_grant_reference: str
+    :param parent_grant_reference: grant reference of the lead grant, for other grants in a split award
+
+    :rtype str
+    :return: outcome of the import (one of the 'grant_import_statuses')
     """
+    if journal is None:
+        journal = ImportJournal.start(source=f"GTR grant {gtr_grant_reference}")
+        try:
+            return import_gateway_to_research_grant_interactively(
+                gtr_grant_reference,
+                lead_project,
+                journal=journal,
+                shallow=shallow,
+                parent_grant_reference=parent_grant_reference,
+            )
+        finally:
+            journal.finish()
+
+    journal.grant_started(gtr_grant_reference, lead_project=lead_project is not None and int(lead_project) == 1)
     try:
         app.logger.info(
             f"Importing/Updating Gateway to Research (GTR) project with grant reference {gtr_grant_reference}"
@@ -1416,13 +2097,26 @@ def import_gateway_to_research_grant_interactively(
             )
         )
         importer = GatewayToResearchGrantImporter(
-            gtr_grant_reference=gtr_grant_reference, lead_project=lead_project
+            gtr_grant_reference=gtr_grant_reference,
+            lead_project=lead_project,
+            parent_grant_reference=parent_grant_reference,
         )
 
-        gtr_project_id = importer.search()
+        with import_stage("search"):
+            gtr_project_id = importer.resolve()
 
         if importer.exists():
-            importer.update(gtr_project_id)
+            if not importer.update(gtr_project_id, shallow=shallow):
+                app.logger.info(f"GTR project with grant reference {gtr_grant_reference} unchanged, not updated")
+                echo(
+                    style(
+                        f"GTR project with grant reference {gtr_grant_reference} unchanged, not updated",
+                        fg="green",
+                    )
+                )
+                journal.grant_finished(gtr_grant_reference, status="unchanged")
+                return "unchanged"
+
             app.logger.info(
                 f"Finished importing/updating GTR project with grant reference {gtr_grant_reference}"
             )
@@ -1432,7 +2126,8 @@ def import_gateway_to_research_grant_interactively(
                     fg="green",
                 )
             )
-            return True
+            journal.grant_finished(gtr_grant_reference, status="updated")
+            return "updated"
 
         if gtr_project_id is None:
             app.logger.error(
@@ -1446,7 +2141,8 @@ def import_gateway_to_research_grant_interactively(
                     fg="red",
                 )
             )
-            return False
+            journal.grant_finished(gtr_grant_reference, status="not-found")
+            return "not-found"
         app.logger.info(
             f"found GTR project for grant reference {gtr_grant_reference} - [{gtr_project_id}] - "
             f"Importing"
@@ -1468,14 +2164,39 @@ def import_gateway_to_research_grant_interactively(
                 fg="green",
             )
         )
+        journal.grant_finished(gtr_grant_reference, status="imported")
+        return "imported"
+    except UnmappedGatewayToResearchMappings as e:
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        unmapped = ", ".join(
+            f"{mapping['mapping']} {mapping['key']}" + (f" ({mapping['name']})" if mapping["name"] else "")
+            for mapping in e.meta["unmapped"]
+        )
+        error_msg = f"[{timestamp}], Failed import - Grant ref: {gtr_grant_reference} - Unmapped GTR resources [{unmapped}]"
+        app.logger.error(error_msg)
+        echo(style(error_msg, fg="red"))
+
+        # Record exception details, and all missing mappings, in the import journal
+        journal.grant_finished(
+            gtr_grant_reference,
+            status="unmapped",
+            error=e.__class__.__name__,
+            detail=error_msg,
+            unmapped=e.meta["unmapped"],
+        )
+        return "unmapped"
+
     except UnmappedGatewayToResearchOrganisation as e:
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         error_msg = f"[{timestamp}], Failed import - Grant ref: {gtr_grant_reference} - Unmapped GTR Organisation [{e.meta['gtr_organisation']['resource_uri']}]"
         app.logger.error(error_msg)
         echo(style(error_msg, fg="red"))
 
-        # Log exception details to a file
-        log_exception_to_file(error_msg)
+        # Record exception details in the import journal
+        journal.grant_finished(
+            gtr_grant_reference, status="unmapped-organisation", error=e.__class__.__name__, detail=error_msg
+        )
+        return "unmapped-organisation"
 
     except UnmappedGatewayToResearchPerson as e:
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -1483,8 +2204,11 @@ def import_gateway_to_research_grant_interactively(
         app.logger.error(error_msg)
         echo(style(error_msg, fg="red"))
 
-        # Log exception details to a file
-        log_exception_to_file(error_msg)
+        # Record exception details in the import journal
+        journal.grant_finished(
+            gtr_grant_reference, status="unmapped-person", error=e.__class__.__name__, detail=error_msg
+        )
+        return "unmapped-person"
 
     except UnmappedGatewayToResearchProjectTopic as e:
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -1492,8 +2216,11 @@ def import_gateway_to_research_grant_interactively(
         app.logger.error(error_msg)
         echo(style(error_msg, fg="red"))
 
-        # Log exception details to a file
-        log_exception_to_file(error_msg)
+        # Record exception details in the import journal
+        journal.grant_finished(
+            gtr_grant_reference, status="unmapped-topic", error=e.__class__.__name__, detail=error_msg
+        )
+        return "unmapped-topic"
 
     except UnmappedGatewayToResearchProjectSubject as e:
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -1501,11 +2228,312 @@ def import_gateway_to_research_grant_interactively(
         app.logger.error(error_msg)
         echo(style(error_msg, fg="red"))
 
-        # Log exception details to a file
-        log_exception_to_file(error_msg)
+        # Record exception details in the import journal
+        journal.grant_finished(
+            gtr_grant_reference, status="unmapped-subject", error=e.__class__.__name__, detail=error_msg
+        )
+        return "unmapped-subject"
 
     except Exception as e:
+        journal.grant_finished(gtr_grant_reference, status="failed", error=e.__class__.__name__, detail=str(e))
         db.session.rollback()
         # Remove any added, but non-committed, entities
         db.session.flush()
         raise e
+
+
+def import_gateway_to_research_grants_interactively(
+    grants: List[dict], workers: int = 1, journal: ImportJournal = None
+) -> List[dict]:
+    """
+    Command to import many projects/grants from Gateway to Research
+
+    Wraps around the import_gateway_to_research_grant_interactively function, to import each grant within a single
+    import run, using a pool of threads. Each thread uses its own application context (and so database session), with
+    GTR resources and connections shared between them.
+
+    The grants in a split award are imported together by the same thread (see 'group_split_awards'), lead grant first,
+    so the people, publications and other resources they share are fetched once, by the lead grant, and then reused.
+
+    Grants that fail to import are reported, and do not stop other grants being imported.
+
+    :type grants: list
+    :param grants: grants to import, as dicts with 'grant-reference', 'lead-project' and (optionally)
+    'parent-grant-reference' keys
+    :type workers: int
+    :param workers: number of grants to import at once
+    :type journal: ImportJournal
+    :param journal: journal for an existing import run (i.e. to resume), or None to start a new run
+
+    :rtype list
+    :return: outcome of each grant in the import run, as returned by 'ImportJournal.grants'
+    """
+    if journal is None:
+        journal = ImportJournal.start()
+
+    def _import_split_award(split_award: List[dict]):
+        for grant in split_award:
+            try:
+                import_gateway_to_research_grant_interactively(
+                    grant["grant-reference"],
+                    str(grant.get("lead-project") or 0),
+                    journal=journal,
+                    parent_grant_reference=grant.get("parent-grant-reference"),
+                )
+            except Exception as e:
+                app.logger.exception(f"Failed importing GTR project with grant reference {grant['grant-reference']}")
+                echo(
+                    style(
+                        f"Failed importing GTR project with grant reference {grant['grant-reference']} - {e}",
+                        fg="red",
+                    )
+                )
+
+    with gtr_resource_memo.run(), gtr_mapping_index.run():
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            list(executor.map(in_app_context(_import_split_award), group_split_awards(grants)))
+
+    journal.finish()
+    return journal.grants()
+
+
+def group_split_awards(grants: List[dict]) -> List[List[dict]]:
+    """
+    Groups grants into split awards, using their parent grant references
+
+    Each group holds a lead grant and the grants with it as their parent, lead grant first, or a single grant that is not
+    part of a split award. Groups, and grants within them, are otherwise kept in the order given.
+
+    :type grants: list
+    :param grants: grants to import, as dicts with 'grant-reference' and (optionally) 'parent-grant-reference' keys
+
+    :rtype list
+    :return: lists of grants, one for each split award
+    """
+    split_awards = {}
+    for grant in grants:
+        split_awards.setdefault(grant.get("parent-grant-reference") or grant["grant-reference"], []).append(grant)
+
+    return [
+        sorted(split_award, key=lambda grant: grant.get("parent-grant-reference") is not None)
+        for split_award in split_awards.values()
+    ]
+
+
+def refresh_gateway_to_research_grants_interactively(
+    stale_after: timedelta,
+    max_seconds: float = None,
+    max_requests: int = None,
+    journal: ImportJournal = None,
+    shallow: bool = False,
+) -> List[dict]:
+    """
+    Command to refresh previously imported projects/grants from Gateway to Research
+
+    Grants not synced with GTR within 'stale_after' are refreshed, least recently synced first (including grants never
+    synced), until there are no more stale grants, or a time or request budget is used up. Budgets are checked before
+    each grant, so the grant being refreshed when a budget is used up is allowed to finish.
+
+    Grants that are unchanged in GTR are not written to (see 'GatewayToResearchGrantImporter.update'). Grants that
+    cannot be refreshed are recorded in the import journal as usual, and marked as synced so they do not block other
+    grants from being refreshed in later runs.
+
+    Shallow refreshes only fetch the people and publications of grants where the resources their GTR project links to
+    have changed, and so typically need a few GTR API requests per grant.
+
+    :type stale_after: timedelta
+    :param stale_after: time after which a grant should be refreshed
+    :type max_seconds: float
+    :param max_seconds: seconds to spend refreshing grants, or None for no limit
+    :type max_requests: int
+    :param max_requests: number of GTR API requests to make, or None for no limit
+    :type journal: ImportJournal
+    :param journal: journal for an existing import run, or None to start a new run
+    :type shallow: bool
+    :param shallow: whether to refresh grants shallowly (see 'GatewayToResearchGrantImporter.update')
+
+    :rtype list
+    :return: outcome of each grant in the import run, as returned by 'ImportJournal.grants'
+    """
+    if journal is None:
+        journal = ImportJournal.start(source="refresh")
+
+    stale_grants = (
+        db.session.query(Grant.reference, Grant.lead_project)
+        .filter(or_(Grant.gtr_synced_at.is_(None), Grant.gtr_synced_at < datetime.now(tz=timezone.utc) - stale_after))
+        .order_by(Grant.gtr_synced_at.asc().nulls_first(), Grant.id)
+        .all()
+    )
+    echo(f"{len(stale_grants)} stale grants to refresh")
+
+    started_at = time.monotonic()
+    requests_made = gtr_client.requests_made
+    with gtr_resource_memo.run(), gtr_mapping_index.run():
+        for grant_reference, lead_project in stale_grants:
+            if max_seconds is not None and time.monotonic() - started_at >= max_seconds:
+                echo(style("Time budget used up, stopping refresh", fg="yellow"))
+                break
+            if max_requests is not None and gtr_client.requests_made - requests_made >= max_requests:
+                echo(style("Request budget used up, stopping refresh", fg="yellow"))
+                break
+
+            try:
+                status = import_gateway_to_research_grant_interactively(
+                    grant_reference, "1" if lead_project else "0", journal=journal, shallow=shallow
+                )
+            except Exception as e:
+                status = "failed"
+                app.logger.exception(f"Failed refreshing GTR project with grant reference {grant_reference}")
+                echo(style(f"Failed refreshing GTR project with grant reference {grant_reference} - {e}", fg="red"))
+
+            if status not in ("updated", "unchanged"):
+                Grant.query.filter_by(reference=grant_reference).update(
+                    {"gtr_synced_at": datetime.now(tz=timezone.utc)}
+                )
+                db.session.commit()
+
+    journal.finish()
+    return journal.grants()
+
+
+def run_gateway_to_research_import_workers(
+    workers: int = 1, poll_interval: float = 5, burst: bool = False, stop: Event = None
+) -> int:
+    """
+    Command to import projects/grants from Gateway to Research that are queued for import, using a pool of workers
+
+    Each worker claims a grant queued for import (see 'ImportJournal.enqueue'), imports it as part of the import run it
+    was queued in, and repeats. Grants are claimed using row locks (see 'claim_queued_grant'), so any number of workers
+    can run, in any number of processes. Once the last grant queued in an import run is imported, the run is finished.
+
+    Workers run in threads, each using its own application context (and so database session), with GTR resources and
+    mappings shared between them while there are grants to import. Before claiming each grant, mappings changed since
+    they were loaded (including by other processes) are loaded again (see 'GatewayToResearchMappingIndex.refresh').
+
+    When there are no grants queued, workers wait for 'poll_interval' seconds before checking again, or stop if 'burst'
+    is set. Otherwise workers run until 'stop' is set, or they are interrupted, after importing any claimed grants.
+
+    :type workers: int
+    :param workers: number of grants to import at once
+    :type poll_interval: float
+    :param poll_interval: seconds to wait before checking for queued grants again, when there are none
+    :type burst: bool
+    :param burst: whether workers should stop once there are no grants queued
+    :type stop: Event
+    :param stop: event to set to stop workers, or None to run until interrupted (or no grants are queued if 'burst')
+
+    :rtype int
+    :return: number of queued grants imported (successfully or not)
+    """
+    if stop is None:
+        stop = Event()
+
+    def _import_queued_grant() -> bool:
+        with claim_queued_grant() as queued_grant:
+            if queued_grant is None:
+                return False
+
+            journal = ImportJournal(run_id=queued_grant["run_id"])
+            try:
+                import_gateway_to_research_grant_interactively(
+                    queued_grant["grant_reference"],
+                    "1" if queued_grant["lead_project"] else "0",
+                    journal=journal,
+                    parent_grant_reference=queued_grant["parent_grant_reference"],
+                )
+            except Exception as e:
+                app.logger.exception(
+                    f"Failed importing GTR project with grant reference {queued_grant['grant_reference']}"
+                )
+                echo(
+                    style(
+                        f"Failed importing GTR project with grant reference {queued_grant['grant_reference']} - {e}",
+                        fg="red",
+                    )
+                )
+
+        if journal.queued_grant_count() == 0:
+            journal.finish()
+        return True
+
+    def _work() -> int:
+        imported = 0
+        while not stop.is_set():
+            with gtr_resource_memo.run(), gtr_mapping_index.run():
+                while not stop.is_set():
+                    # Mappings may have been changed (e.g. by the '/post-*-data' routes) by another process
+                    if gtr_mapping_index.refresh():
+                        gtr_resource_memo.invalidate()
+                    if not _import_queued_grant():
+                        break
+                    imported += 1
+            if burst:
+                break
+            stop.wait(poll_interval)
+        return imported
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [executor.submit(in_app_context(_work)) for _ in range(max(1, workers))]
+        try:
+            return sum(future.result() for future in futures)
+        except KeyboardInterrupt:
+            echo(style("Stopping import workers, after importing any claimed grants", fg="yellow"))
+            stop.set()
+            return sum(future.result() for future in futures)
+
+
+def format_grant_import_summary(results: List[dict]) -> str:
+    """
+    Formats the results of importing many grants as a table
+
+    The table gives a count of grants for each import outcome, followed by each grant that was not imported, updated or
+    unchanged.
+
+    :type results: list
+    :param results: import outcomes, as returned by 'ImportJournal.grants'
+
+    :rtype str
+    :return: summary table
+    """
+    rows = [("Status", "Grants", "Seconds")]
+    for status in grant_import_statuses:
+        status_results = [result for result in results if result["status"] == status]
+        if status_results:
+            rows.append(
+                (status, str(len(status_results)), f"{sum(result['duration'] for result in status_results):.1f}")
+            )
+    rows.append(("total", str(len(results)), f"{sum(result['duration'] for result in results):.1f}"))
+
+    problems = [result for result in results if result["status"] not in grant_import_complete_statuses]
+    if problems:
+        rows.append(("", "", ""))
+        rows.append(("Grant reference", "Status", "Error"))
+        for result in problems:
+            rows.append((result["grant_reference"], result["status"], result["error"] or "-"))
+
+    return format_table(rows)
+
+
+def format_unmapped_mappings_summary(results: List[dict]) -> Optional[str]:
+    """
+    Formats the mappings missing for grants in an import run as a table, as a single list of mappings to add
+
+    The table gives each missing mapping once, with the number of grants that need it.
+
+    :type results: list
+    :param results: import outcomes, as returned by 'ImportJournal.grants'
+
+    :rtype str or None
+    :return: summary table, or None if no mappings are missing
+    """
+    mappings = unmapped_mappings(results)
+    if not mappings:
+        return None
+
+    rows = [("Mapping", "Key", "Name", "Grants")]
+    for mapping in mappings:
+        rows.append(
+            (mapping["mapping"], mapping["key"], mapping["name"] or "-", str(len(mapping["grant_references"])))
+        )
+
+    return f"Mappings to add\n{format_table(rows)}"
@@ -0,0 +1,113 @@
+import sqlite3
+import time
+import zlib
+
+from pathlib import Path
+from threading import Lock
+from typing import Optional
+
+
+class GatewayToResearchCache:
+    """
+    On-disk store of Gateway to Research (GTR) API responses, keyed by URI
+
+    Responses are held in a SQLite database, with bodies compressed, alongside any validators GTR gave (the 'ETag' and
+    'Last-Modified' headers) and when each response was last fetched or revalidated. This allows later requests for the
+    same resource to be made conditionally, or skipped entirely while a response is still fresh.
+
+    The database can be shared by importers in other threads, and other processes.
+    """
+
+    def __init__(self, path: str):
+        """
+        :type path: str
+        :param path: path to the cache database, created if it does not exist
+        """
+        self.path = path
+        self.clock = time.time
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "uri TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, fetched_at REAL NOT NULL, body BLOB NOT NULL"
+            ")"
+        )
+
+    def get(self, uri: str) -> Optional[dict]:
+        """
+        :type uri: str
+        :param uri: URI of a GTR resource
+
+        :rtype dict or None
+        :return: cached response ('etag', 'last_modified', 'fetched_at' and 'body'), if held
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT etag, last_modified, fetched_at, body FROM responses WHERE uri = ?", (uri,)
+            ).fetchone()
+        if row is None:
+            return None
+
+        return {
+            "etag": row[0],
+            "last_modified": row[1],
+            "fetched_at": row[2],
+            "body": zlib.decompress(row[3]),
+        }
+
+    def put(self, uri: str, body: bytes, etag: str = None, last_modified: str = None):
+        """
+        :type uri: str
+        :param uri: URI of a GTR resource
+        :type body: bytes
+        :param body: response body
+        :type etag: str
+        :param etag: 'ETag' response header, if given
+        :type last_modified: str
+        :param last_modified: 'Last-Modified' response header, if given
+        """
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses (uri, etag, last_modified, fetched_at, body) VALUES (?, ?, ?, ?, ?)",
+                (uri, etag, last_modified, self.clock(), zlib.compress(body)),
+            )
+
+    def touch(self, uri: str):
+        """
+        Marks a cached response as revalidated (i.e. as if it was fetched again)
+
+        :type uri: str
+        :param uri: URI of a GTR resource
+        """
+        with self._lock:
+            self._connection.execute("UPDATE responses SET fetched_at = ? WHERE uri = ?", (self.clock(), uri))
+
+    def is_fresh(self, response: dict, max_age: Optional[float]) -> bool:
+        """
+        Whether a cached response can be used without revalidating it
+
+        :type response: dict
+        :param response: cached response
+        :type max_age: float
+        :param max_age: seconds a response can be used for without revalidating, or None to always revalidate
+
+        :rtype bool
+        :return: whether the cached response is fresh
+        """
+        if max_age is None:
+            return False
+        return self.clock() - response["fetched_at"] < max_age
+
+    def clear(self):
+        """
+        Removes all cached responses
+        """
+        with self._lock:
+            self._connection.execute("DELETE FROM responses")
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
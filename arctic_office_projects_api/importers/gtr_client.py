@@ -0,0 +1,458 @@
+import json
+import random
+import time
+
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Callable, Optional
+
+import requests
+
+from flask import Flask
+from requests.adapters import BaseAdapter, HTTPAdapter
+
+from arctic_office_projects_api.importers.gtr_cache import GatewayToResearchCache
+from arctic_office_projects_api.importers.gtr_fixtures import (
+    GatewayToResearchRecordingTransport,
+    GatewayToResearchReplayTransport,
+)
+from arctic_office_projects_api.importers.metrics import record_import_counters
+
+GTR_MEDIA_TYPE = "application/vnd.rcuk.gtr.json-v7"
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parses a 'Retry-After' response header into a number of seconds to wait
+
+    The header may be given as a number of seconds, or as an HTTP date.
+
+    :type value: str
+    :param value: Retry-After header value
+
+    :rtype float or None
+    :return: seconds to wait, or None if the header is missing or invalid
+    """
+    if value is None:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)  # pragma: no cover
+    return max(0.0, (retry_at - datetime.now(tz=timezone.utc)).total_seconds())
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter, shared by all threads in the process
+
+    Tokens are added at a steady rate, up to a maximum (the burst size). Each request takes a token, waiting only where
+    none are available. Requests can therefore be made in bursts, while the average rate is limited.
+
+    Where a token isn't available, it is reserved before waiting, so waiting threads are served in turn.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        :type rate: float
+        :param rate: tokens added per second, 0 disables limiting
+        :type burst: int
+        :param burst: maximum number of tokens that can be held
+        """
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.clock = time.monotonic
+        self.sleep = time.sleep
+
+        self._lock = Lock()
+        self._tokens = float(self.burst)
+        self._updated_at = self.clock()
+
+    def configure(self, rate: float, burst: int):
+        """
+        Changes the rate and burst size, keeping any tokens held (up to the new burst size)
+
+        :type rate: float
+        :param rate: tokens added per second, 0 disables limiting
+        :type burst: int
+        :param burst: maximum number of tokens that can be held
+        """
+        with self._lock:
+            self.rate = rate
+            self.burst = max(1, burst)
+            self._tokens = min(self._tokens, float(self.burst))
+
+    def reserve(self) -> float:
+        """
+        Takes a token, without waiting
+
+        :rtype float
+        :return: seconds to wait before the token can be used
+        """
+        with self._lock:
+            if self.rate <= 0:
+                return 0.0
+
+            now = self.clock()
+            self._tokens = min(float(self.burst), self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self) -> float:
+        """
+        Takes a token, waiting until it can be used
+
+        :rtype float
+        :return: seconds waited
+        """
+        delay = self.reserve()
+        if delay > 0:
+            self.sleep(delay)
+        return delay
+
+
+class GatewayToResearchClient:
+    """
+    HTTP client for the Gateway to Research (GTR) API
+
+    Requests are made through a single session, with a pool of keep-alive connections shared by all importers in the
+    process, rather than opening a new connection for each resource.
+
+    Requests failing with a connection error, timeout, or a status indicating a transient problem (429 or 5xx) are
+    retried, waiting an exponentially increasing, randomised ('full jitter'), time between attempts. Where GTR gives a
+    'Retry-After' header, the client waits at least that long (up to the maximum backoff).
+
+    Each request (including retries) takes a token from a TokenBucket limiter, shared by all importers in the process,
+    so requests are only delayed where the request budget is used up.
+
+    Requests, response sizes, and time spent waiting on GTR, sleeping and decoding responses are recorded in the metrics
+    for the grant being imported, if any (see 'record_import_metrics').
+
+    Where a cache is configured, responses for GTR resources are kept in a GatewayToResearchCache. Cached responses are
+    used as they are for a maximum age (if set), and then revalidated using a conditional request, so unchanged
+    resources are not downloaded again.
+
+    The number of requests made (including retries, but not responses used from the cache) is counted, so callers can
+    limit how many requests a task makes.
+
+    The transport (a requests adapter) can be replaced, so tests and benchmarks can use a stand-in for the GTR API. GTR
+    responses can be recorded as fixtures, and replayed instead of making requests to GTR, by setting a fixtures mode.
+
+    Options:
+    * APP_GTR_CONNECT_TIMEOUT - seconds to wait for a connection to GTR
+    * APP_GTR_READ_TIMEOUT - seconds to wait for a response from GTR, once connected
+    * APP_GTR_MAX_RETRIES - number of times to retry a failed request, 0 disables retries
+    * APP_GTR_BACKOFF_FACTOR - seconds to wait before the first retry, doubled for each retry after
+    * APP_GTR_BACKOFF_MAX - maximum seconds to wait between retries
+    * APP_GTR_RETRY_AFTER_MAX - maximum seconds to wait where GTR asks to wait (using 'Retry-After'), before giving up
+    * APP_GTR_POOL_SIZE - number of keep-alive connections to GTR to hold
+    * APP_GTR_RATE_LIMIT - average number of requests per second to GTR, 0 disables limiting
+    * APP_GTR_RATE_BURST - number of requests that can be made at once, before limiting applies
+    * APP_GTR_FETCH_WORKERS - number of GTR resources related to a project to fetch at once
+    * APP_GTR_CACHE_PATH - path to a database to cache GTR responses in, or None to disable caching
+    * APP_GTR_CACHE_MAX_AGE - seconds to use cached responses for without revalidating, or None to always revalidate
+    * APP_GTR_FIXTURES_MODE - 'record' to record GTR responses as fixtures, 'replay' to replay them, or None to disable
+    * APP_GTR_FIXTURES_PATH - path to a directory of fixtures, to record to or replay from
+    * APP_GTR_FIXTURES_LATENCY - seconds to wait before returning each replayed response, to simulate waiting on GTR
+    """
+
+    retry_statuses = (429, 500, 502, 503, 504)
+
+    def __init__(
+        self,
+        transport: BaseAdapter = None,
+        connect_timeout: float = 10,
+        read_timeout: float = 60,
+        max_retries: int = 5,
+        backoff_factor: float = 1,
+        backoff_max: float = 60,
+        retry_after_max: float = 300,
+        pool_size: int = 10,
+        rate_limit: float = 2,
+        rate_burst: int = 5,
+        fetch_workers: int = 4,
+        cache: GatewayToResearchCache = None,
+        cache_max_age: float = None,
+    ):
+        """
+        :type transport: BaseAdapter
+        :param transport: requests adapter used to make requests, or None for a pooled HTTP adapter
+        :type connect_timeout: float
+        :param connect_timeout: seconds to wait for a connection
+        :type read_timeout: float
+        :param read_timeout: seconds to wait for a response, once connected
+        :type max_retries: int
+        :param max_retries: number of times to retry a failed request
+        :type backoff_factor: float
+        :param backoff_factor: seconds to wait before the first retry, doubled for each retry after
+        :type backoff_max: float
+        :param backoff_max: maximum seconds to wait between retries
+        :type retry_after_max: float
+        :param retry_after_max: maximum seconds to wait where the server asks to wait, before giving up
+        :type pool_size: int
+        :param pool_size: number of keep-alive connections to hold
+        :type rate_limit: float
+        :param rate_limit: average number of requests per second, 0 disables limiting
+        :type rate_burst: int
+        :param rate_burst: number of requests that can be made at once, before limiting applies
+        :type fetch_workers: int
+        :param fetch_workers: number of GTR resources related to a project to fetch at once
+        :type cache: GatewayToResearchCache
+        :param cache: store of GTR responses, or None to disable caching
+        :type cache_max_age: float
+        :param cache_max_age: seconds to use cached responses for without revalidating, or None to always revalidate
+        """
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.retry_after_max = retry_after_max
+        self.pool_size = pool_size
+        self.fetch_workers = fetch_workers
+        self.cache = cache
+        self.cache_max_age = cache_max_age
+        self.sleep = time.sleep
+        self.rate_limiter = TokenBucket(rate=rate_limit, burst=rate_burst)
+        self.requests_made = 0
+
+        self._lock = Lock()
+        self.session = requests.Session()
+        self.session.headers["accept"] = GTR_MEDIA_TYPE
+        self.set_transport(transport)
+
+    def init_app(self, app: Flask):
+        """
+        :type app: Flask
+        :param app: Flask application
+        """
+        app.config.setdefault("APP_GTR_CONNECT_TIMEOUT", 10)
+        app.config.setdefault("APP_GTR_READ_TIMEOUT", 60)
+        app.config.setdefault("APP_GTR_MAX_RETRIES", 5)
+        app.config.setdefault("APP_GTR_BACKOFF_FACTOR", 1)
+        app.config.setdefault("APP_GTR_BACKOFF_MAX", 60)
+        app.config.setdefault("APP_GTR_RETRY_AFTER_MAX", 300)
+        app.config.setdefault("APP_GTR_POOL_SIZE", 10)
+        app.config.setdefault("APP_GTR_RATE_LIMIT", 2)
+        app.config.setdefault("APP_GTR_RATE_BURST", 5)
+        app.config.setdefault("APP_GTR_FETCH_WORKERS", 4)
+        app.config.setdefault("APP_GTR_CACHE_PATH", None)
+        app.config.setdefault("APP_GTR_CACHE_MAX_AGE", None)
+        app.config.setdefault("APP_GTR_FIXTURES_MODE", None)
+        app.config.setdefault("APP_GTR_FIXTURES_PATH", None)
+        app.config.setdefault("APP_GTR_FIXTURES_LATENCY", 0)
+        app.extensions["gtr_client"] = self
+
+        self.connect_timeout = app.config["APP_GTR_CONNECT_TIMEOUT"]
+        self.read_timeout = app.config["APP_GTR_READ_TIMEOUT"]
+        self.max_retries = app.config["APP_GTR_MAX_RETRIES"]
+        self.backoff_factor = app.config["APP_GTR_BACKOFF_FACTOR"]
+        self.backoff_max = app.config["APP_GTR_BACKOFF_MAX"]
+        self.retry_after_max = app.config["APP_GTR_RETRY_AFTER_MAX"]
+        self.fetch_workers = app.config["APP_GTR_FETCH_WORKERS"]
+        self.cache_max_age = app.config["APP_GTR_CACHE_MAX_AGE"]
+        if app.config["APP_GTR_CACHE_PATH"] is None:
+            self.cache = None
+        elif self.cache is None or self.cache.path != app.config["APP_GTR_CACHE_PATH"]:
+            self.cache = GatewayToResearchCache(path=app.config["APP_GTR_CACHE_PATH"])
+        self.rate_limiter.configure(rate=app.config["APP_GTR_RATE_LIMIT"], burst=app.config["APP_GTR_RATE_BURST"])
+        if app.config["APP_GTR_POOL_SIZE"] != self.pool_size and self.transport_is_default:
+            self.pool_size = app.config["APP_GTR_POOL_SIZE"]
+            self.set_transport(None)
+
+        if app.config["APP_GTR_FIXTURES_MODE"] == "record":
+            self.set_transport(
+                GatewayToResearchRecordingTransport(path=app.config["APP_GTR_FIXTURES_PATH"], pool_size=self.pool_size)
+            )
+        elif app.config["APP_GTR_FIXTURES_MODE"] == "replay":
+            self.set_transport(
+                GatewayToResearchReplayTransport(
+                    path=app.config["APP_GTR_FIXTURES_PATH"], latency=app.config["APP_GTR_FIXTURES_LATENCY"]
+                )
+            )
+        elif app.config["APP_GTR_FIXTURES_MODE"] is not None:
+            raise ValueError(f"Unknown GTR fixtures mode '{app.config['APP_GTR_FIXTURES_MODE']}'")
+        elif isinstance(self.transport, (GatewayToResearchRecordingTransport, GatewayToResearchReplayTransport)):
+            self.set_transport(None)
+
+    @property
+    def timeout(self) -> tuple:
+        """
+        :rtype tuple
+        :return: connect and read timeouts, as used by requests
+        """
+        return self.connect_timeout, self.read_timeout
+
+    def set_transport(self, transport: Optional[BaseAdapter]):
+        """
+        Sets the requests adapter used for all requests, replacing any previous adapter
+
+        :type transport: BaseAdapter
+        :param transport: requests adapter, or None for a pooled HTTP adapter
+        """
+        with self._lock:
+            self.transport_is_default = transport is None
+            if transport is None:
+                transport = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size, max_retries=0)
+
+            self.transport = transport
+            self.session.mount("https://", transport)
+            self.session.mount("http://", transport)
+
+    def backoff(self, attempt: int, retry_after: float = None) -> float:
+        """
+        Time to wait before retrying a request
+
+        Where the server asked to wait (using a 'Retry-After' header), at least this long is waited, even if longer than
+        the maximum backoff.
+
+        :type attempt: int
+        :param attempt: number of the failed attempt, starting from 0
+        :type retry_after: float
+        :param retry_after: seconds the server asked to wait (from a 'Retry-After' header), if any
+
+        :rtype float
+        :return: seconds to wait
+        """
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_factor * (2 ** attempt)))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def get(self, url: str, params: dict = None, headers: dict = None) -> requests.Response:
+        """
+        Makes a GET request, retrying transient failures
+
+        Where a request is still failing after all retries, the last error is raised (for responses, as an HTTPError).
+        Where the server asks to wait longer than the 'retry_after_max' option before retrying, the response is raised
+        as an error straight away, rather than retrying sooner than asked.
+
+        :type url: str
+        :param url: URL to request
+        :type params: dict
+        :param params: query parameters, if any
+        :type headers: dict
+        :param headers: additional request headers, if any
+
+        :rtype Response
+        :return: successful response
+        """
+        attempt = 0
+        while True:
+            record_import_counters(sleep_seconds=self.rate_limiter.acquire())
+            with self._lock:
+                self.requests_made += 1
+            started_at = time.perf_counter()
+            try:
+                response = self.session.get(url=url, params=params, headers=headers, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                record_import_counters(http_requests=1, http_seconds=time.perf_counter() - started_at)
+                if attempt >= self.max_retries:
+                    raise
+                self._backoff_sleep(self.backoff(attempt))
+                attempt += 1
+                continue
+            record_import_counters(
+                http_requests=1, http_bytes=len(response.content), http_seconds=time.perf_counter() - started_at
+            )
+
+            if response.status_code in self.retry_statuses and attempt < self.max_retries:
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                if retry_after is None or retry_after <= self.retry_after_max:
+                    response.close()
+                    self._backoff_sleep(self.backoff(attempt, retry_after=retry_after))
+                    attempt += 1
+                    continue
+
+            response.raise_for_status()
+            return response
+
+    def _backoff_sleep(self, seconds: float):
+        """
+        Waits before retrying a request
+
+        :type seconds: float
+        :param seconds: seconds to wait
+        """
+        self.sleep(seconds)
+        record_import_counters(sleep_seconds=seconds)
+
+    @staticmethod
+    def _decode(decode: Callable[[], dict]) -> dict:
+        """
+        Decodes a response body as JSON, recording the time taken
+
+        :type decode: callable
+        :param decode: function returning the decoded response body (e.g. 'response.json')
+
+        :rtype dict
+        :return: decoded response body
+        """
+        started_at = time.perf_counter()
+        try:
+            return decode()
+        finally:
+            record_import_counters(parse_seconds=time.perf_counter() - started_at)
+
+    def get_json(self, url: str, params: dict = None, cached: bool = False) -> dict:
+        """
+        Makes a GET request, retrying transient failures, and decodes the response as JSON
+
+        Where 'cached' is set, and a cache is configured, a fresh cached response is used without making a request.
+        Otherwise, a cached response is revalidated using a conditional request, and used if GTR reports it as
+        unchanged (i.e. a '304 Not Modified' response).
+
+        :type url: str
+        :param url: URL to request
+        :type params: dict
+        :param params: query parameters, if any
+        :type cached: bool
+        :param cached: whether the response can be cached (i.e. for a GTR resource, rather than a search)
+
+        :rtype dict
+        :return: decoded response body
+        """
+        if not cached or self.cache is None:
+            return self._decode(self.get(url=url, params=params).json)
+
+        uri = requests.Request("GET", url, params=params).prepare().url
+        cached_response = self.cache.get(uri)
+
+        headers = {}
+        if cached_response is not None:
+            if self.cache.is_fresh(cached_response, max_age=self.cache_max_age):
+                return self._decode(lambda: json.loads(cached_response["body"]))
+            if cached_response["etag"] is not None:
+                headers["If-None-Match"] = cached_response["etag"]
+            if cached_response["last_modified"] is not None:
+                headers["If-Modified-Since"] = cached_response["last_modified"]
+
+        response = self.get(url=url, params=params, headers=headers)
+        if response.status_code == 304 and cached_response is not None:
+            self.cache.touch(uri)
+            return self._decode(lambda: json.loads(cached_response["body"]))
+
+        self.cache.put(
+            uri,
+            body=response.content,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
+        return self._decode(response.json)
+
+
+# Client shared by all importers in the process, configured by the application factory
+gtr_client = GatewayToResearchClient()
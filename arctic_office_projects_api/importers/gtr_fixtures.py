@@ -0,0 +1,178 @@
+import hashlib
+import json
+import time
+
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from requests import PreparedRequest, Response
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+# Responses worth recording, transient errors (e.g. '503') and conditional responses ('304') are not recorded
+recorded_statuses = (200, 404)
+
+
+def _fixture_path(path: str, url: str) -> Path:
+    """
+    :type path: str
+    :param path: path to a directory of fixtures
+    :type url: str
+    :param url: URL of a GTR request, including any query string
+
+    :rtype Path
+    :return: path to the fixture for the request
+    """
+    return Path(path).joinpath(f"{hashlib.sha256(url.encode()).hexdigest()}.json")
+
+
+def write_gtr_fixture(path: str, url: str, status_code: int, body: str, content_type: str = "application/json"):
+    """
+    Writes a GTR response as a fixture, replacing any existing fixture for the same request
+
+    :type path: str
+    :param path: path to a directory of fixtures, created if it does not exist
+    :type url: str
+    :param url: URL of a GTR request, including any query string
+    :type status_code: int
+    :param status_code: response status code
+    :type body: str
+    :param body: response body
+    :type content_type: str
+    :param content_type: 'Content-Type' response header
+    """
+    Path(path).mkdir(parents=True, exist_ok=True)
+    fixture = {"url": url, "status_code": status_code, "content_type": content_type, "body": body}
+    with open(_fixture_path(path, url), "w") as fixture_file:
+        json.dump(fixture, fixture_file, indent=2)
+
+
+def read_gtr_fixtures(path: str) -> Dict[str, dict]:
+    """
+    :type path: str
+    :param path: path to a directory of fixtures
+
+    :rtype dict
+    :return: fixtures, keyed by request URL
+    """
+    fixtures = {}
+    for fixture_path in sorted(Path(path).glob("*.json")):
+        with open(fixture_path) as fixture_file:
+            fixture = json.load(fixture_file)
+        fixtures[fixture["url"]] = fixture
+    return fixtures
+
+
+class GatewayToResearchRecordingTransport(HTTPAdapter):
+    """
+    Requests adapter for the GTR API which records responses as fixtures, for replaying later (see
+    'GatewayToResearchReplayTransport')
+
+    Requests are made to GTR as normal. Each fixture is a JSON file, named after a hash of the request URL, holding the
+    URL, status code, content type and body of the response. Only successful and not found responses are recorded, so
+    GTR caching should be disabled while recording.
+    """
+
+    def __init__(self, path: str, pool_size: int = 10):
+        """
+        :type path: str
+        :param path: path to a directory to write fixtures to, created if it does not exist
+        :type pool_size: int
+        :param pool_size: number of keep-alive connections to GTR to hold
+        """
+        super().__init__(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.path = path
+
+    def send(self, request: PreparedRequest, **kwargs) -> Response:
+        response = super().send(request, **kwargs)
+        if response.status_code in recorded_statuses:
+            write_gtr_fixture(
+                self.path,
+                url=request.url,
+                status_code=response.status_code,
+                body=response.text,
+                content_type=response.headers.get("Content-Type", "application/json"),
+            )
+        return response
+
+
+class GatewayToResearchReplayTransport(BaseAdapter):
+    """
+    Requests adapter which replays recorded GTR responses (see 'GatewayToResearchRecordingTransport'), so grants can be
+    imported without the GTR API, e.g. to measure the performance of the importer
+
+    Fixtures are loaded once, when the adapter is created. Each response is delayed by a fixed latency, to simulate
+    waiting on GTR. Requests without a recorded response fail with a KeyError, rather than being made to GTR.
+    """
+
+    def __init__(self, path: str, latency: float = 0):
+        """
+        :type path: str
+        :param path: path to a directory of fixtures
+        :type latency: float
+        :param latency: seconds to wait before returning each response
+        """
+        super().__init__()
+        self.path = path
+        self.latency = latency
+        self.sleep = time.sleep
+        self.fixtures = read_gtr_fixtures(path)
+
+        self._lock = Lock()
+        self.requests_replayed = 0
+
+    def send(self, request: PreparedRequest, **kwargs) -> Response:
+        fixture = self.fixtures.get(request.url)
+        if fixture is None:
+            raise KeyError(f"No GTR fixture recorded for '{request.url}'")
+
+        if self.latency > 0:
+            self.sleep(self.latency)
+        with self._lock:
+            self.requests_replayed += 1
+
+        response = Response()
+        response.status_code = fixture["status_code"]
+        response.headers = CaseInsensitiveDict({"Content-Type": fixture["content_type"]})
+        response._content = fixture["body"].encode()
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+    def grant_references(self) -> List[str]:
+        """
+        Grant references searched for when fixtures were recorded, for importing the same grants again
+
+        :rtype list
+        :return: grant references, sorted
+        """
+        grant_references = set()
+        for url in self.fixtures:
+            grant_reference = self._searched_grant_reference(url)
+            if grant_reference is not None:
+                grant_references.add(grant_reference)
+        return sorted(grant_references)
+
+    @staticmethod
+    def _searched_grant_reference(url: str) -> Optional[str]:
+        """
+        :type url: str
+        :param url: URL of a GTR request
+
+        :rtype str or None
+        :return: grant reference searched for, if the request is a search for a grant reference
+        """
+        parts = urlsplit(url)
+        if not parts.path.endswith("/gtr/api/projects"):
+            return None
+
+        query = parse_qs(parts.query)
+        if query.get("f") != ["pro.gr"] or "q" not in query:
+            return None
+        return query["q"][0]
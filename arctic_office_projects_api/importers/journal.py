@@ -0,0 +1,347 @@
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Iterator, List, Optional
+
+# noinspection PyPackageRequirements
+from sqlalchemy import delete, exists, func, insert, select, update
+from sqlalchemy.orm import aliased
+
+# noinspection PyPackageRequirements
+from sqlalchemy.dialects.postgresql import insert as upsert
+
+from arctic_office_projects_api.extensions import db
+from arctic_office_projects_api.importers.metrics import current_import_metrics, summarise_import_metrics
+from arctic_office_projects_api.models import ImportQueuedGrant, ImportRun, ImportRunGrant
+
+# Outcomes of importing a grant that mean it does not need importing again
+grant_import_complete_statuses = ("imported", "updated", "unchanged")
+
+
+class ImportJournal:
+    """
+    Journal of the outcome of importing each grant in an import run, held in the database
+
+    Entries are written in their own transactions, separate from the database session used to import grants. They are
+    therefore kept when an import fails and its changes are rolled back, or when a run is interrupted, and can be
+    written from any thread.
+    """
+
+    def __init__(self, run_id: int):
+        """
+        :type run_id: int
+        :param run_id: ID of an existing import run
+        """
+        self.run_id = run_id
+
+    @classmethod
+    def start(cls, source: str = None) -> "ImportJournal":
+        """
+        Starts a new import run
+
+        :type source: str
+        :param source: description of what is being imported (e.g. the path to a CSV file)
+
+        :rtype ImportJournal
+        :return: journal for the new import run
+        """
+        with db.engine.begin() as connection:
+            run_id = connection.execute(
+                insert(ImportRun)
+                .values(source=source, started_at=datetime.now(tz=timezone.utc))
+                .returning(ImportRun.id)
+            ).scalar_one()
+        return cls(run_id=run_id)
+
+    @classmethod
+    def resume(cls, run_id: int) -> "ImportJournal":
+        """
+        Resumes an existing import run
+
+        :type run_id: int
+        :param run_id: ID of an import run
+
+        :rtype ImportJournal
+        :return: journal for the import run
+        """
+        with db.engine.begin() as connection:
+            result = connection.execute(update(ImportRun).where(ImportRun.id == run_id).values(finished_at=None))
+        if result.rowcount == 0:
+            raise KeyError(f"Import run '{ run_id }' does not exist")
+        return cls(run_id=run_id)
+
+    def finish(self):
+        """
+        Records the import run as finished
+        """
+        with db.engine.begin() as connection:
+            connection.execute(
+                update(ImportRun).where(ImportRun.id == self.run_id).values(finished_at=datetime.now(tz=timezone.utc))
+            )
+
+    def grant_started(self, grant_reference: str, lead_project: Optional[bool] = None):
+        """
+        Records a grant as being imported, replacing any previous outcome for the grant in the run
+
+        :type grant_reference: str
+        :param grant_reference: grant reference (e.g. 'NE/K011820/1')
+        :type lead_project: bool
+        :param lead_project: whether the grant is the lead for a split award
+        """
+        values = {
+            "lead_project": lead_project,
+            "status": None,
+            "error": None,
+            "detail": None,
+            "unmapped": None,
+            "metrics": None,
+            "started_at": datetime.now(tz=timezone.utc),
+            "finished_at": None,
+        }
+        with db.engine.begin() as connection:
+            connection.execute(
+                upsert(ImportRunGrant)
+                .values(run_id=self.run_id, grant_reference=grant_reference, **values)
+                .on_conflict_do_update(index_elements=["run_id", "grant_reference"], set_=values)
+            )
+
+    def grant_finished(
+        self, grant_reference: str, status: str, error: str = None, detail: str = None, unmapped: List[dict] = None
+    ):
+        """
+        Records the outcome of importing a grant
+
+        :type grant_reference: str
+        :param grant_reference: grant reference (e.g. 'NE/K011820/1')
+        :type status: str
+        :param status: outcome of the import (one of the 'grant_import_statuses')
+        :type error: str
+        :param error: name of the exception class that caused the import to fail, if any
+        :type detail: str
+        :param detail: description of why the import failed, if any
+        :type unmapped: list
+        :param unmapped: mappings missing for the grant, as dicts with 'mapping', 'key' and 'name' keys, if any
+
+        Metrics for importing the grant are recorded too, if they are being recorded (see 'record_import_metrics').
+        """
+        metrics = current_import_metrics()
+        with db.engine.begin() as connection:
+            connection.execute(
+                update(ImportRunGrant)
+                .where(ImportRunGrant.run_id == self.run_id, ImportRunGrant.grant_reference == grant_reference)
+                .values(
+                    status=status,
+                    error=error,
+                    detail=detail,
+                    unmapped=unmapped,
+                    metrics=metrics.as_dict() if metrics is not None else None,
+                    finished_at=datetime.now(tz=timezone.utc),
+                )
+            )
+
+    def enqueue(self, grants: List[dict]):
+        """
+        Queues grants to be imported in the run by import workers (see 'claim_queued_grant')
+
+        :type grants: list
+        :param grants: grants to import, as dicts with 'grant-reference', 'lead-project' and (optionally)
+        'parent-grant-reference' keys
+        """
+        if not grants:
+            return
+
+        queued_at = datetime.now(tz=timezone.utc)
+        with db.engine.begin() as connection:
+            connection.execute(
+                insert(ImportQueuedGrant),
+                [
+                    {
+                        "run_id": self.run_id,
+                        "grant_reference": grant["grant-reference"],
+                        "lead_project": int(grant.get("lead-project") or 0) == 1,
+                        "parent_grant_reference": grant.get("parent-grant-reference"),
+                        "queued_at": queued_at,
+                    }
+                    for grant in grants
+                ],
+            )
+
+    def queued_grant_count(self) -> int:
+        """
+        :rtype int
+        :return: number of grants in the run waiting to be imported, including any being imported
+        """
+        with db.engine.connect() as connection:
+            return connection.execute(
+                select(func.count()).select_from(ImportQueuedGrant).where(ImportQueuedGrant.run_id == self.run_id)
+            ).scalar_one()
+
+    def progress(self) -> dict:
+        """
+        Progress of the run, for reporting on import runs started by queueing grants
+
+        The run is 'queued' until a grant has been started, 'running' until it is finished, then 'finished'.
+
+        :rtype dict
+        :return: progress, as a dict with 'run', 'source', 'status', 'started_at', 'finished_at', 'queued', 'grants'
+        (as returned by 'grants'), 'unmapped' (as returned by 'unmapped_mappings') and 'metrics' (as returned by
+        'summarise_import_metrics') keys
+        """
+        with db.engine.connect() as connection:
+            run = connection.execute(select(ImportRun).where(ImportRun.id == self.run_id)).mappings().one_or_none()
+        if run is None:
+            raise KeyError(f"Import run '{ self.run_id }' does not exist")
+
+        grants = self.grants()
+        status = "queued"
+        if run["finished_at"] is not None:
+            status = "finished"
+        elif grants:
+            status = "running"
+
+        return {
+            "run": self.run_id,
+            "source": run["source"],
+            "status": status,
+            "started_at": run["started_at"].isoformat(),
+            "finished_at": run["finished_at"].isoformat() if run["finished_at"] else None,
+            "queued": self.queued_grant_count(),
+            "grants": grants,
+            "unmapped": unmapped_mappings(grants),
+            "metrics": summarise_import_metrics(grants),
+        }
+
+    def grants(self) -> List[dict]:
+        """
+        Outcome of importing each grant in the run, in the order they were first started
+
+        :rtype list
+        :return: outcomes, as dicts with 'grant_reference', 'status', 'error', 'detail', 'unmapped', 'metrics' (as
+        returned by 'ImportMetrics.as_dict', if recorded) and 'duration' keys
+        """
+        with db.engine.connect() as connection:
+            rows = connection.execute(
+                select(ImportRunGrant).where(ImportRunGrant.run_id == self.run_id).order_by(ImportRunGrant.id)
+            ).mappings()
+            return [
+                {
+                    "grant_reference": row["grant_reference"],
+                    "status": row["status"],
+                    "error": row["error"],
+                    "detail": row["detail"],
+                    "unmapped": row["unmapped"] or [],
+                    "metrics": row["metrics"],
+                    "duration": (
+                        (row["finished_at"] - row["started_at"]).total_seconds() if row["finished_at"] else 0
+                    ),
+                }
+                for row in rows
+            ]
+
+    def finished_grant_references(self) -> List[str]:
+        """
+        :rtype list
+        :return: references of grants with an outcome, whether successful or not
+        """
+        return [grant["grant_reference"] for grant in self.grants() if grant["status"] is not None]
+
+    def failed_grant_references(self) -> List[str]:
+        """
+        :rtype list
+        :return: references of grants that were not imported, updated or unchanged, including any that did not finish
+        """
+        return [
+            grant["grant_reference"] for grant in self.grants() if grant["status"] not in grant_import_complete_statuses
+        ]
+
+
+@contextmanager
+def claim_queued_grant() -> Iterator[Optional[dict]]:
+    """
+    Claims the next grant waiting to be imported, skipping grants claimed by other import workers
+
+    The queued grant is locked (using 'SELECT ... FOR UPDATE SKIP LOCKED') for as long as it is claimed, and removed
+    from the queue when the claim ends. If a claim ends with an error, or the worker holding it stops, the lock is
+    released and the grant can be claimed again.
+
+    Grants in a split award are not claimed while their parent grant is queued in the same run (including while it is
+    claimed), so that the parent is imported first and its resources can be reused.
+
+    :rtype dict or None
+    :return: queued grant, as a dict with 'id', 'run_id', 'grant_reference', 'lead_project' and
+    'parent_grant_reference' keys, or None if no grants are waiting to be imported
+    """
+    queued_parent = aliased(ImportQueuedGrant)
+    with db.engine.begin() as connection:
+        queued_grant = (
+            connection.execute(
+                select(
+                    ImportQueuedGrant.id,
+                    ImportQueuedGrant.run_id,
+                    ImportQueuedGrant.grant_reference,
+                    ImportQueuedGrant.lead_project,
+                    ImportQueuedGrant.parent_grant_reference,
+                )
+                .where(
+                    ~exists().where(
+                        queued_parent.run_id == ImportQueuedGrant.run_id,
+                        queued_parent.grant_reference == ImportQueuedGrant.parent_grant_reference,
+                        queued_parent.id != ImportQueuedGrant.id,
+                    )
+                )
+                .order_by(ImportQueuedGrant.id)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            )
+            .mappings()
+            .first()
+        )
+        if queued_grant is None:
+            yield None
+            return
+
+        yield dict(queued_grant)
+        connection.execute(delete(ImportQueuedGrant).where(ImportQueuedGrant.id == queued_grant["id"]))
+
+
+def unmapped_mappings(results: List[dict]) -> List[dict]:
+    """
+    Mappings missing for grants in an import run, consolidated into a single list of mappings to add
+
+    :type results: list
+    :param results: import outcomes, as returned by 'ImportJournal.grants'
+
+    :rtype list
+    :return: missing mappings, ordered by mapping and key, as dicts with 'mapping', 'key', 'name' and
+    'grant_references' (grants needing the mapping) keys
+    """
+    mappings = {}
+    for result in results:
+        for unmapped in result["unmapped"]:
+            mapping = mappings.setdefault(
+                (unmapped["mapping"], unmapped["key"]), {**unmapped, "grant_references": []}
+            )
+            mapping["grant_references"].append(result["grant_reference"])
+
+    return [mappings[mapping] for mapping in sorted(mappings)]
+
+
+def failed_grant_import_details(run_id: int = None) -> List[str]:
+    """
+    Descriptions of why grants could not be imported, across all import runs or for a single run
+
+    :type run_id: int
+    :param run_id: ID of an import run, or None for all runs
+
+    :rtype list
+    :return: descriptions, in the order grants finished
+    """
+    query = (
+        select(ImportRunGrant.detail)
+        .where(ImportRunGrant.detail.is_not(None))
+        .order_by(ImportRunGrant.finished_at, ImportRunGrant.id)
+    )
+    if run_id is not None:
+        query = query.where(ImportRunGrant.run_id == run_id)
+
+    with db.engine.connect() as connection:
+        return list(connection.execute(query).scalars())
@@ -0,0 +1,232 @@
+import time
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from threading import Lock, get_ident
+from typing import Callable, Iterator, List, Optional
+
+# noinspection PyPackageRequirements
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from arctic_office_projects_api.utils import format_table
+
+# Stages of importing a grant, as timed by 'import_stage'
+import_stages = ("search", "fetch", "map", "persist", "link-categories")
+
+# Counters recorded for importing a grant, with the number of decimal places to report them to
+import_counters = {
+    "http_requests": 0,
+    "http_bytes": 0,
+    "http_seconds": 3,
+    "sleep_seconds": 3,
+    "parse_seconds": 3,
+    "db_statements": 0,
+    "db_seconds": 3,
+}
+
+
+class ImportMetrics:
+    """
+    Metrics for importing a grant, covering GTR API requests, database statements and time spent in each stage
+
+    Counters (see 'import_counters') are:
+
+    * http_requests - GTR API requests made, including retries
+    * http_bytes - size of GTR API response bodies
+    * http_seconds - time spent waiting on GTR API responses
+    * sleep_seconds - time spent waiting for the GTR rate limit, or before retrying requests
+    * parse_seconds - time spent decoding GTR API responses
+    * db_statements - database statements executed
+    * db_seconds - time spent executing database statements
+
+    Metrics are recorded for the current context (see 'record_import_metrics'), including by threads fetching GTR
+    resources for the grant, and so are updated under a lock.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self.counters = {counter: 0 for counter in import_counters}
+        self.stages = {stage: 0.0 for stage in import_stages}
+
+    def add(self, **counters):
+        """
+        Adds to one or more counters
+
+        :param counters: amounts to add, keyed by counter (e.g. 'http_requests')
+        """
+        with self._lock:
+            for counter, amount in counters.items():
+                self.counters[counter] += amount
+
+    def add_stage(self, stage: str, seconds: float):
+        """
+        :type stage: str
+        :param stage: name of a stage (one of the 'import_stages')
+        :type seconds: float
+        :param seconds: time spent in the stage
+        """
+        with self._lock:
+            self.stages[stage] += seconds
+
+    def as_dict(self) -> dict:
+        """
+        :rtype dict
+        :return: counters, and seconds spent in each stage (as 'stages'), as JSON serialisable values
+        """
+        with self._lock:
+            metrics = {counter: round(value, import_counters[counter]) for counter, value in self.counters.items()}
+            metrics["stages"] = {stage: round(seconds, 3) for stage, seconds in self.stages.items()}
+        return metrics
+
+
+_current_import_metrics = ContextVar("import_metrics", default=None)
+
+
+def current_import_metrics() -> Optional[ImportMetrics]:
+    """
+    :rtype ImportMetrics or None
+    :return: metrics being recorded in the current context, if any
+    """
+    return _current_import_metrics.get()
+
+
+@contextmanager
+def record_import_metrics() -> Iterator[ImportMetrics]:
+    """
+    Context manager to record metrics for importing a grant
+
+    Metrics are recorded until the context ends, for work in the current context. Threads started within the context
+    need to run in a copy of it (see 'in_app_context') for their work to be recorded.
+    """
+    metrics = ImportMetrics()
+    token = _current_import_metrics.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current_import_metrics.reset(token)
+
+
+def with_import_metrics(func: Callable) -> Callable:
+    """
+    Decorator to record metrics for importing a grant for each call of a function (see 'record_import_metrics')
+
+    :type func: callable
+    :param func: function to wrap
+
+    :rtype callable
+    :return: wrapped function
+    """
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with record_import_metrics():
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def record_import_counters(**counters):
+    """
+    Adds to counters for the grant being imported, if metrics are being recorded
+
+    :param counters: amounts to add, keyed by counter (e.g. 'http_requests')
+    """
+    metrics = _current_import_metrics.get()
+    if metrics is not None:
+        metrics.add(**counters)
+
+
+_current_import_stage = ContextVar("import_stage", default=None)
+
+
+@contextmanager
+def import_stage(stage: str) -> Iterator[None]:
+    """
+    Context manager to time a stage of importing a grant, if metrics are being recorded
+
+    Stages entered more than once (e.g. persisting a grant before and after its categories are linked) are added up.
+
+    Stages can be nested (e.g. mapping a GTR organisation while it is fetched), in which case time spent in the inner
+    stage is not counted towards the outer stage. Only stages entered by the same thread are treated as nested, as
+    time spent by other threads (e.g. fetching GTR people) overlaps with, rather than adds to, the outer stage.
+
+    :type stage: str
+    :param stage: name of a stage (one of the 'import_stages')
+    """
+    metrics = _current_import_metrics.get()
+    outer_stage = _current_import_stage.get()
+    current_stage = {"thread": get_ident(), "nested_seconds": 0.0}
+    token = _current_import_stage.set(current_stage)
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started_at
+        _current_import_stage.reset(token)
+        if outer_stage is not None and outer_stage["thread"] == current_stage["thread"]:
+            outer_stage["nested_seconds"] += seconds
+        if metrics is not None:
+            metrics.add_stage(stage, seconds - current_stage["nested_seconds"])
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+    connection.info["import_metrics_started_at"] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+    started_at = connection.info.pop("import_metrics_started_at", None)
+    if started_at is not None:
+        record_import_counters(db_statements=1, db_seconds=time.perf_counter() - started_at)
+
+
+def summarise_import_metrics(results: List[dict]) -> dict:
+    """
+    Aggregates the metrics recorded for grants in an import run
+
+    :type results: list
+    :param results: import outcomes, as returned by 'ImportJournal.grants'
+
+    :rtype dict
+    :return: summary, as a dict with 'grants' (the number of grants with metrics), and 'counters' and 'stages' keys,
+    each giving the 'total', 'mean' and 'max' of a counter or stage across grants
+    """
+    metrics = [result["metrics"] for result in results if result["metrics"]]
+
+    def _aggregate(values: List[float], places: int) -> dict:
+        return {
+            "total": round(sum(values), places),
+            "mean": round(sum(values) / len(values), 3) if values else 0,
+            "max": round(max(values), places) if values else 0,
+        }
+
+    return {
+        "grants": len(metrics),
+        "counters": {
+            counter: _aggregate([grant[counter] for grant in metrics], places)
+            for counter, places in import_counters.items()
+        },
+        "stages": {stage: _aggregate([grant["stages"][stage] for grant in metrics], 3) for stage in import_stages},
+    }
+
+
+def format_import_metrics_summary(summary: dict) -> str:
+    """
+    Formats aggregated import metrics as a table
+
+    :type summary: dict
+    :param summary: aggregated metrics, as returned by 'summarise_import_metrics'
+
+    :rtype str
+    :return: summary table
+    """
+    rows = [("Metric", "Total", "Mean", "Max")]
+    for counter, values in summary["counters"].items():
+        rows.append((counter, str(values["total"]), str(values["mean"]), str(values["max"])))
+    for stage, values in summary["stages"].items():
+        rows.append((f"stage: {stage} (seconds)", str(values["total"]), str(values["mean"]), str(values["max"])))
+
+    return format_table(rows)
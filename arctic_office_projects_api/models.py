@@ -563,6 +563,14 @@ class Project(db.Model):
     """
 
     __tablename__ = "projects"
+    __table_args__ = (
+        db.Index(
+            "projects_grant_reference_key",
+            "grant_reference",
+            unique=True,
+            postgresql_where=db.text("grant_reference IS NOT NULL AND grant_reference <> ''"),
+        ),
+    )
     id = db.Column(db.Integer, primary_key=True)
     neutral_id = db.Column(db.String(32), unique=True, nullable=False, index=True)
     grant_reference = db.Column(db.Text(), nullable=False)
@@ -591,6 +599,7 @@ class Person(db.Model):
     """
 
     __tablename__ = "people"
+    __table_args__ = (db.Index("ix_people_name_organisation", "first_name", "last_name", "organisation_id"),)
     id = db.Column(db.Integer, primary_key=True)
     organisation_id = db.Column(
         db.Integer, db.ForeignKey("organisations.id"), nullable=True
@@ -630,6 +639,9 @@ class Participant(db.Model):
 class Grant(db.Model):
     """
     Represents information about a research grant
+
+    Grants that are part of a split award (i.e. funding for a project split between organisations) are linked to the
+    grant for the lead organisation as their parent.
     """
 
     __tablename__ = "grants"
@@ -637,6 +649,7 @@ class Grant(db.Model):
     organisation_id = db.Column(
         db.Integer, db.ForeignKey("organisations.id"), nullable=True
     )
+    parent_id = db.Column(db.Integer, db.ForeignKey("grants.id"), nullable=True, index=True)
     neutral_id = db.Column(db.String(32), unique=True, nullable=False, index=True)
     reference = db.Column(db.Text(), unique=True, nullable=False)
     title = db.Column(db.Text(), nullable=False)
@@ -650,8 +663,15 @@ class Grant(db.Model):
     total_funds = db.Column(db.Numeric(24, 2), nullable=True)
     total_funds_currency = db.Column(db.Enum(GrantCurrency), nullable=True)
     lead_project = db.Column(db.Boolean(), nullable=True)
+    gtr_project_id = db.Column(db.Text(), nullable=True)
+    gtr_content_hash = db.Column(db.String(64), nullable=True)
+    gtr_project_content_hash = db.Column(db.String(64), nullable=True)
+    gtr_links_hash = db.Column(db.String(64), nullable=True)
+    gtr_synced_at = db.Column(db.DateTime(timezone=True), nullable=True, index=True)
     funder = db.relationship("Organisation", back_populates="grants")
     allocations = db.relationship("Allocation", back_populates="grant")
+    parent = db.relationship("Grant", remote_side=[id], back_populates="children")
+    children = db.relationship("Grant", back_populates="parent")
 
     def __repr__(self):
         return f"<Grant { self.neutral_id } ({ self.reference })>"  # pragma: no cover
@@ -663,6 +683,7 @@ class Allocation(db.Model):
     """
 
     __tablename__ = "allocations"
+    __table_args__ = (db.UniqueConstraint("project_id", "grant_id"),)
     id = db.Column(db.Integer, primary_key=True)
     neutral_id = db.Column(db.String(32), unique=True, nullable=False, index=True)
     project_id = db.Column(db.Integer, db.ForeignKey("projects.id"), nullable=False)
@@ -734,7 +755,7 @@ class CategoryTerm(db.Model):
         db.Integer, db.ForeignKey("category_schemes.id"), nullable=False
     )
     neutral_id = db.Column(db.String(32), unique=True, nullable=False, index=True)
-    scheme_identifier = db.Column(db.Text(), nullable=False)
+    scheme_identifier = db.Column(db.Text(), unique=True, nullable=False)
     scheme_notation = db.Column(db.Text(), nullable=True)
     name = db.Column(db.Text(), nullable=False)
     aliases = db.Column(
@@ -810,21 +831,30 @@ class Project_Organisations(db.Model):
     """
     __tablename__ = "project_organisations"
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    organisation_id = db.Column(db.Text())
+    organisation_id = db.Column(db.Text(), unique=True)
     organisation_name = db.Column(db.Text())
     organisation_ror = db.Column(db.Text())
+    updated_at = db.Column(
+        db.DateTime(timezone=True), nullable=False, server_default=db.func.now(), onupdate=db.func.now()
+    )
 
 
 class Project_People(db.Model):
     """
     Mapping between GtR people codes and Orcid URLs
     This is in case GtR does not have a record of a person's Orcid
+
+    'gtr_person' may be a GtR person URI or ID, 'gtr_person_id' is always the ID (the last part of the URI)
     """
     __tablename__ = "project_people"
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     name = db.Column(db.Text())
     gtr_person = db.Column(db.Text())
+    gtr_person_id = db.Column(db.Text(), unique=True)
     orcid = db.Column(db.Text())
+    updated_at = db.Column(
+        db.DateTime(timezone=True), nullable=False, server_default=db.func.now(), onupdate=db.func.now()
+    )
 
 
 class Project_Subjects(db.Model):
@@ -833,8 +863,11 @@ class Project_Subjects(db.Model):
     """
     __tablename__ = "project_subjects"
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    subject_text = db.Column(db.Text())
+    subject_text = db.Column(db.Text(), unique=True)
     gcmd_link_code = db.Column(db.Text())
+    updated_at = db.Column(
+        db.DateTime(timezone=True), nullable=False, server_default=db.func.now(), onupdate=db.func.now()
+    )
 
 
 class Project_Topics(db.Model):
@@ -843,7 +876,78 @@ class Project_Topics(db.Model):
     """
     __tablename__ = "project_topics"
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    topic_id = db.Column(db.Text())
+    topic_id = db.Column(db.Text(), unique=True)
     topic_name = db.Column(db.Text())
     gcmd_link_name = db.Column(db.Text())
     gcmd_link_code = db.Column(db.Text())
+    updated_at = db.Column(
+        db.DateTime(timezone=True), nullable=False, server_default=db.func.now(), onupdate=db.func.now()
+    )
+
+
+class ImportRun(db.Model):
+    """
+    Represents a run of the grant importer (i.e. importing one or more grants at once)
+
+    Runs are used as a journal, recording the outcome of importing each grant, so that interrupted runs can be resumed
+    and failed grants retried.
+    """
+
+    __tablename__ = "import_runs"
+    id = db.Column(db.Integer, primary_key=True)
+    source = db.Column(db.Text(), nullable=True)
+    started_at = db.Column(db.DateTime(timezone=True), nullable=False)
+    finished_at = db.Column(db.DateTime(timezone=True), nullable=True)
+
+    grants = db.relationship("ImportRunGrant", back_populates="run", order_by="ImportRunGrant.id")
+    queued_grants = db.relationship("ImportQueuedGrant", back_populates="run", order_by="ImportQueuedGrant.id")
+
+    def __repr__(self):
+        return f"<ImportRun { self.id } ({ self.source })>"  # pragma: no cover
+
+
+class ImportRunGrant(db.Model):
+    """
+    Represents the outcome of importing a grant as part of an import run
+    """
+
+    __tablename__ = "import_run_grants"
+    __table_args__ = (db.UniqueConstraint("run_id", "grant_reference"),)
+    id = db.Column(db.Integer, primary_key=True)
+    run_id = db.Column(db.Integer, db.ForeignKey("import_runs.id"), nullable=False, index=True)
+    grant_reference = db.Column(db.Text(), nullable=False)
+    lead_project = db.Column(db.Boolean(), nullable=True)
+    status = db.Column(db.Text(), nullable=True)
+    error = db.Column(db.Text(), nullable=True)
+    detail = db.Column(db.Text(), nullable=True)
+    unmapped = db.Column(postgresql.JSONB(), nullable=True)
+    metrics = db.Column(postgresql.JSONB(), nullable=True)
+    started_at = db.Column(db.DateTime(timezone=True), nullable=False)
+    finished_at = db.Column(db.DateTime(timezone=True), nullable=True)
+
+    run = db.relationship("ImportRun", back_populates="grants")
+
+    def __repr__(self):
+        return f"<ImportRunGrant { self.grant_reference } ({ self.status })>"  # pragma: no cover
+
+
+class ImportQueuedGrant(db.Model):
+    """
+    Represents a grant waiting to be imported, as part of an import run, by an import worker
+
+    Queued grants are claimed by workers using row locks (skipping rows locked by other workers), and removed once
+    imported. Grants that are part of a split award are not claimed until their parent (lead) grant is imported.
+    """
+
+    __tablename__ = "import_queue"
+    id = db.Column(db.Integer, primary_key=True)
+    run_id = db.Column(db.Integer, db.ForeignKey("import_runs.id"), nullable=False, index=True)
+    grant_reference = db.Column(db.Text(), nullable=False)
+    lead_project = db.Column(db.Boolean(), nullable=False)
+    parent_grant_reference = db.Column(db.Text(), nullable=True)
+    queued_at = db.Column(db.DateTime(timezone=True), nullable=False)
+
+    run = db.relationship("ImportRun", back_populates="queued_grants")
+
+    def __repr__(self):
+        return f"<ImportQueuedGrant { self.grant_reference } ({ self.run_id })>"  # pragma: no cover
@@ -0,0 +1,151 @@
+from enum import Enum
+from typing import Any, Optional
+
+from flask import Response, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    # noinspection PyPackageRequirements
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+COMPACT_MEDIA_TYPE = "application/vnd.arctic-office-projects.compact+json"
+COMPACT_FORMAT_PARAMETER = "compact"
+
+JSON_MEDIA_TYPES = ("application/vnd.api+json", "application/json")
+MSGPACK_MEDIA_TYPES = ("application/vnd.api+msgpack", "application/msgpack")
+
+
+class CompactDocument(dict):
+    """
+    Top-level document using the compact representation
+
+    Used to distinguish resource documents from other responses (e.g. errors), so that only resource documents are
+    labelled with the compact representation media type.
+    """
+
+
+def _media_type_negotiated(media_types: tuple, alternatives: tuple) -> Optional[str]:
+    """
+    Finds which, if any, of a set of media types is preferred over alternatives in the 'Accept' request header
+
+    Media types must be listed explicitly, rather than matched by a wildcard such as '*/*', so that clients not
+    expecting them (which typically send '*/*') continue to receive JSON.
+
+    :type media_types: tuple
+    :param media_types: media types to check for
+    :type alternatives: tuple
+    :param alternatives: media types these media types compete with
+
+    :rtype str or None
+    :return: the preferred media type, if one of the media types to check for
+    """
+    if not has_request_context():
+        return None
+
+    accepted = set(request.accept_mimetypes.values())
+    if not accepted.intersection(media_types):
+        return None
+
+    best_match = request.accept_mimetypes.best_match([*media_types, *alternatives])
+    if best_match in media_types:
+        return best_match
+    return None
+
+
+def compact_representation_requested() -> bool:
+    """
+    Whether the compact representation has been negotiated for the current request
+
+    The compact representation is requested using either a 'format=compact' query string parameter, or by listing the
+    compact media type in the 'Accept' request header (in preference to JSON:API/JSON).
+
+    Outside of a request (e.g. in CLI commands) the default JSON:API representation is always used.
+
+    :rtype bool
+    :return: whether the compact representation should be returned
+    """
+    if not has_request_context():
+        return False
+
+    if request.args.get("format") == COMPACT_FORMAT_PARAMETER:
+        return True
+
+    return _media_type_negotiated((COMPACT_MEDIA_TYPE,), JSON_MEDIA_TYPES) is not None
+
+
+def msgpack_encoding_requested() -> Optional[str]:
+    """
+    Whether MessagePack encoding has been negotiated for the current request
+
+    MessagePack is requested by listing a MessagePack media type in the 'Accept' request header (in preference to
+    JSON:API/JSON). It is only offered where the optional 'msgpack' package is installed.
+
+    :rtype str or None
+    :return: the negotiated MessagePack media type, or None if JSON should be used
+    """
+    if msgpack is None:
+        return None  # pragma: no cover
+
+    return _media_type_negotiated(MSGPACK_MEDIA_TYPES, (COMPACT_MEDIA_TYPE, *JSON_MEDIA_TYPES))
+
+
+class JSONProvider(DefaultJSONProvider):
+    """
+    Application JSON provider
+
+    Extends the default Flask JSON provider to label responses using the representation negotiated for a request, and
+    to encode responses using MessagePack where negotiated.
+
+    As all routes return responses through 'jsonify', this acts as a single, shared, encoder hook for all routes.
+    """
+
+    @staticmethod
+    def default(o: Any) -> Any:
+        """
+        Converts values that cannot be encoded natively
+
+        Used for both JSON and MessagePack encoding, so values are represented the same way in each.
+
+        Differences from the default Flask JSON provider include:
+        - enumeration items are encoded as their value
+
+        :param o: value to convert
+
+        :return: value in an encodable form
+        """
+        if isinstance(o, Enum):
+            return o.value
+
+        return DefaultJSONProvider.default(o)
+
+    def response(self, *args, **kwargs) -> Response:
+        """
+        Overloaded implementation of the 'response' method in the default Flask JSON provider
+
+        Differences include:
+        - responses are encoded using MessagePack where negotiated
+        - the compact representation media type is used as the response content type for compact resource documents
+          (other responses, such as errors, use the default JSON content type)
+        - the 'Accept' request header is listed in the 'Vary' response header, as it influences the representation
+
+        :rtype Response
+        :return: Flask response
+        """
+        obj = self._prepare_response_obj(args, kwargs)
+
+        msgpack_media_type = msgpack_encoding_requested()
+        if msgpack_media_type is not None:
+            response = self._app.response_class(
+                msgpack.packb(obj, default=self.default, datetime=False), mimetype=msgpack_media_type
+            )
+        else:
+            response = super().response(obj)
+
+        if has_request_context():
+            response.vary.add("Accept")
+            if msgpack_media_type is None and isinstance(obj, CompactDocument):
+                response.mimetype = COMPACT_MEDIA_TYPE
+
+        return response
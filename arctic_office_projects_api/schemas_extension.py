@@ -6,7 +6,7 @@ from flask_sqlalchemy.model import Model
 from flask_sqlalchemy.pagination import Pagination
 
 # noinspection PyPackageRequirements
-from marshmallow import post_dump
+from marshmallow import post_dump, missing
 
 # noinspection PyPackageRequirements
 from marshmallow.fields import Field
@@ -18,6 +18,8 @@ from marshmallow_jsonapi.flask import (
 # noinspection PyPackageRequirements
 from psycopg2.extras import DateRange
 
+from arctic_office_projects_api.representations import CompactDocument, compact_representation_requested
+
 
 class Schema(_Schema):
     """
@@ -41,6 +43,8 @@ class Schema(_Schema):
         - pagination support implemented as a schema option
         - resource linkage support, implemented as a schema option
         - related resource support, implemented as a schema option
+        - compact representation support, implemented as a schema option, defaulting to whether the compact
+          representation was negotiated for the current request
         """
         self.paginate = False
         self.current_page = None
@@ -53,6 +57,8 @@ class Schema(_Schema):
         self.related_resource = None
         self.many_related = False
 
+        self.compact = compact_representation_requested()
+
         if "paginate" in kwargs:
             self.paginate = kwargs["paginate"]
             del kwargs["paginate"]
@@ -67,6 +73,9 @@ class Schema(_Schema):
         if "many_related" in kwargs:
             self.many_related = kwargs["many_related"]
             del kwargs["many_related"]
+        if "compact" in kwargs:
+            self.compact = kwargs["compact"]
+            del kwargs["compact"]
 
         super().__init__(*args, **kwargs)
 
@@ -186,6 +195,7 @@ class Schema(_Schema):
         - resource linkage support, modifies a standard schema response to return a JSON API resource linkage
         - related resource support, modifies a standard schema response to return the contents of a JSON API related
           resource link
+        - compact representation support, see 'format_compact_response'
 
         :type data: dict
         :param data: resource or resources to return
@@ -195,6 +205,9 @@ class Schema(_Schema):
         :rtype dict
         :return: top-level response
         """
+        if self.compact:
+            return self.format_compact_response(data, many)
+
         response = super().format_json_api_response(data, many)
 
         if self.resource_linkage is not None:
@@ -266,6 +279,90 @@ class Schema(_Schema):
 
         return response
 
+    def format_compact_response(self, data: Union[dict, list], many: bool) -> CompactDocument:
+        """
+        Formats serialised data using the compact representation, rather than as a JSON API document
+
+        Resources are returned as flat records, keyed by (uninflected) field name, without 'type', 'attributes',
+        'relationships' or 'links' members. Relationships are returned as the ID(s) of related resources. Fields
+        without a value (i.e. null or an empty list) are omitted.
+
+        Where relationships are included, related resources are returned once each, as records in a top-level
+        'included' member, keyed by resource type and then ID (see 'Relationship.serialize').
+
+        Where pagination is used, the current and total number of pages are returned as top-level meta information.
+
+        :type data: dict or list
+        :param data: resource or resources to return
+        :type many: bool
+        :param many: whether a single or multiple resources are being returned
+
+        :rtype CompactDocument
+        :return: top-level response
+        """
+        field_names = {(field.data_key or name): name for name, field in self.fields.items()}
+
+        if many:
+            data = [self._format_compact_item(item, field_names) for item in data]
+        else:
+            data = self._format_compact_item(data, field_names)
+
+        if self.resource_linkage is not None:
+            if many:  # pragma: no cover
+                raise RuntimeError(  # pragma: no cover
+                    "A resource linkage can't be returned for multiple resources"
+                )
+            if self.resource_linkage not in self.fields:  # pragma: no cover
+                raise KeyError(f"No relationship found for '{ self.resource_linkage }'")  # pragma: no cover
+            return CompactDocument(
+                data=data.get(self.resource_linkage, [] if self.fields[self.resource_linkage].many else None)
+            )
+
+        if self.related_resource is not None:
+            if many:  # pragma: no cover
+                raise RuntimeError(  # pragma: no cover
+                    "A related resource response can't be returned for multiple resources"
+                )
+            if self.related_resource not in self.fields:  # pragma: no cover
+                raise KeyError(f"No relationship found for '{ self.related_resource }'")  # pragma: no cover
+
+            related_type = self.fields[self.related_resource].type_
+            if self.many_related:
+                return CompactDocument(
+                    data=[self.included_data[(related_type, _id)] for _id in data.get(self.related_resource, [])]
+                )
+            if data.get(self.related_resource) is None:  # pragma: no cover
+                return CompactDocument(data=None)  # pragma: no cover
+            return CompactDocument(data=self.included_data[(related_type, data[self.related_resource])])
+
+        response = CompactDocument(data=data)
+        if self.included_data:
+            response["included"] = {}
+            for (resource_type, resource_id), record in self.included_data.items():
+                response["included"].setdefault(resource_type, {})[resource_id] = record
+        if self.paginate:
+            response["meta"] = {"page": self.current_page, "pages": self.last_page}
+
+        return response
+
+    @staticmethod
+    def _format_compact_item(item: Optional[dict], field_names: dict) -> Optional[dict]:
+        """
+        Re-keys a serialised resource using uninflected field names, omitting fields without a value
+
+        :type item: dict
+        :param item: serialised resource
+        :type field_names: dict
+        :param field_names: field names, keyed by the (inflected) key used when serialising
+
+        :rtype dict
+        :return: serialised resource, keyed by field name
+        """
+        if not item:
+            return None
+
+        return {field_names.get(key, key): value for key, value in item.items() if value is not None and value != []}
+
     class Meta:
         """
         Custom base Marshmallow schema metadata class
@@ -318,13 +415,63 @@ class Relationship(_Relationship):
         view_kwargs["_external"] = True
         return super().get_url(obj, view_name, view_kwargs)
 
+    def serialize(self, attr: str, obj, accessor=None, **kwargs):
+        """
+        Overloaded implementation of the 'serialize' method in the marshmallow_jsonapi default 'fields' class
+
+        Differences include:
+        - compact representation support, where the parent schema uses the compact representation, related
+          resources are returned as IDs, without links or resource identifier objects, with included resources
+          collected as compact records by the root schema (see 'Schema.format_compact_response')
+
+        :type attr: str
+        :param attr: name of the field within the schema being dumped
+        :param obj: the object the relationship is taken from
+        :param accessor: function used to pull values from 'obj'
+
+        :return: serialised relationship
+        """
+        if not getattr(self.parent, "compact", False):
+            return super().serialize(attr, obj, accessor)
+
+        if not (self.include_resource_linkage or self.include_data):
+            return missing
+
+        value = self.get_value(obj, attr, accessor=accessor)
+        if value is None or value is missing:
+            return [] if self.many else None
+
+        if self.include_data:
+            for item in value if self.many else [value]:
+                self._serialize_compact_included(item)
+
+        resource_linkage = self.get_resource_linkage(value)
+        if self.many:
+            return [resource["id"] for resource in resource_linkage]
+        return resource_linkage["id"]
+
+    def _serialize_compact_included(self, value):
+        """
+        Compact representation equivalent of the '_serialize_included' method in the marshmallow_jsonapi default
+        'fields' class
+
+        :param value: related object to include
+        """
+        schema = self.schema
+        schema.compact = True
+
+        record = schema.dump(value)["data"]
+        self.root.included_data[(self.type_, record["id"])] = record
+        for key, included_record in schema.included_data.items():
+            self.root.included_data[key] = included_record
+
 
 class DateRangeField(Field):
     """
     Custom Marshmallow field for the PostgreSQL DateRange class
     """
 
-    def _serialize(self, value: DateRange, attr: str, obj, **kwargs) -> dict:
+    def _serialize(self, value: DateRange, attr: str, obj, **kwargs) -> Union[dict, str]:
         """
         When serialising, the DateRange is converted into a dict containing a ISO 8601 date interval, covering the date
         range, and two date instants, indicating the beginning and end of the date range.
@@ -332,6 +479,9 @@ class DateRangeField(Field):
         Where either side of a date range is unbound, '..' will be substituted and the relevant date instant set to
         None/null. E.g. An unbound end will use '2012-10-30/..' and an unbound start will use '../2040-10-12'.
 
+        In the compact representation, only the ISO 8601 date interval is returned, as the date instants can be
+        derived from it.
+
         :type value: DateRange
         :param value: a DateRange instance
         :type attr: str
@@ -340,7 +490,7 @@ class DateRangeField(Field):
         :type kwargs: dict
         :param kwargs: field-specific keyword arguments
 
-        :rtype: dict
+        :rtype: dict or str
         :return: ISO 8601 date interval and date instants for the beginning and end of a date range
         """
         instant_start = None
@@ -355,6 +505,9 @@ class DateRangeField(Field):
             instant_end = value.upper.isoformat()
             interval_end = instant_end
 
+        if getattr(self.parent, "compact", False):
+            return f"{ interval_start }/{ interval_end }"
+
         return {
             "interval": f"{ interval_start }/{ interval_end }",
             "start-instant": instant_start,
@@ -424,6 +577,8 @@ class EnumField(Field):
             return None
 
         if isinstance(value.value, dict):
+            if getattr(self.parent, "compact", False):
+                return value.value
             return self._inflection(value.value)
 
         return value.value
@@ -535,6 +690,8 @@ class CurrencyField(Field):
 
         See the class definition for how to specify the currency metadata argument.
 
+        In the compact representation, the currency unit is returned as its ISO 4217 code only.
+
         :type value: float
         :param value: numeric value which will be combined with a currency
         :type attr: str
@@ -567,6 +724,9 @@ class CurrencyField(Field):
                 "The currency unit enumeration value is expected to be a dictionary"
             )
 
+        if getattr(self.parent, "compact", False):
+            return {"value": value, "currency": currency.value["iso_4217_code"]}
+
         return {
             "value": value,
             "currency": {
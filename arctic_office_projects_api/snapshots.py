@@ -0,0 +1,382 @@
+import hashlib
+import inspect
+import json
+import os
+import shutil
+
+from datetime import datetime, timezone
+from pathlib import Path
+from threading import Lock
+from typing import Iterator, Optional, Tuple
+
+from flask import Flask, Response, current_app, request, send_file
+from werkzeug.exceptions import HTTPException
+
+from arctic_office_projects_api.compression import compress_payload, supported_content_encodings
+from arctic_office_projects_api.models import (
+    Project,
+    Person,
+    Grant,
+    Organisation,
+    CategoryScheme,
+    CategoryTerm,
+    Participant,
+    Allocation,
+    Categorisation,
+)
+from arctic_office_projects_api.representations import (
+    compact_representation_requested,
+    msgpack_encoding_requested,
+)
+
+# Models for resources identified in resource routes, keyed by the name of the route argument used for their ID
+snapshot_route_arguments = {
+    "project_id": Project,
+    "person_id": Person,
+    "grant_id": Grant,
+    "organisation_id": Organisation,
+    "category_scheme_id": CategoryScheme,
+    "category_term_id": CategoryTerm,
+    "participant_id": Participant,
+    "allocation_id": Allocation,
+    "categorisation_id": Categorisation,
+}
+
+snapshot_file_extensions = {"br": ".br", "gzip": ".gz"}
+
+
+def snapshot_document_key(path: str, page: int = None) -> str:
+    """
+    Key for a document in a snapshot, based on the request path and (for collections) page number
+
+    The first page of a collection uses the same key as the collection without a page, as they are the same document.
+
+    :type path: str
+    :param path: request path (e.g. '/projects')
+    :type page: int
+    :param page: page number, for collection documents
+
+    :rtype str
+    :return: document key (e.g. '/projects?page=2')
+    """
+    if page is None or page == 1:
+        return path
+    return f"{ path }?page={ page }"
+
+
+class StaticSnapshotWriter:
+    """
+    Renders every document in the read API to files, to serve without the database
+
+    Documents include each page of each resource collection, and each detail, relationship and related resource
+    document for each resource. Documents are rendered using the same view functions as the API, so are identical to
+    those returned by the API (for the default JSON:API representation).
+
+    Each document is written uncompressed, and precompressed for each supported content encoding, alongside a manifest
+    listing each document and its entity tag.
+
+    Snapshots are written to a new directory, which then replaces the previous snapshot by atomically swapping a
+    symbolic link, so requests never see a partially written snapshot.
+
+    Previous snapshots are kept for a time, so that requests still reading from them when they are replaced can finish.
+    Older snapshots are removed each time a snapshot is written, keeping a set number of snapshots in total.
+    """
+
+    def __init__(self, app: Flask, base_url: str, keep_releases: int = 2):
+        """
+        :type app: Flask
+        :param app: Flask application
+        :type base_url: str
+        :param base_url: URL the API is available at, used for links within documents
+        :type keep_releases: int
+        :param keep_releases: number of snapshots to keep, including the snapshot being written
+        """
+        self.app = app
+        self.base_url = base_url
+        self.keep_releases = keep_releases
+
+    def _rules(self) -> Iterator[Tuple[str, Optional[str]]]:
+        """
+        Yields the endpoint and ID argument (if any) of each resource route to render
+
+        Collection routes ('*_list') have no ID argument. Other routes must take a single, known, ID argument.
+        """
+        for rule in self.app.url_map.iter_rules():
+            if "GET" not in rule.methods:
+                continue  # pragma: no cover
+            if not rule.arguments and rule.endpoint.endswith("_list"):
+                yield rule.endpoint, None
+            elif len(rule.arguments) == 1 and list(rule.arguments)[0] in snapshot_route_arguments:
+                yield rule.endpoint, list(rule.arguments)[0]
+
+    def _render(self, endpoint: str, view_kwargs: dict, page: int = None) -> Tuple[Optional[str], Optional[bytes]]:
+        """
+        Renders a document using the view function for a route, bypassing authentication
+
+        :type endpoint: str
+        :param endpoint: route endpoint
+        :type view_kwargs: dict
+        :param view_kwargs: route arguments
+        :type page: int
+        :param page: page number, for collection documents
+
+        :rtype tuple
+        :return: request path and response body, or None for both if the route did not return a document
+        """
+        query_string = {} if page is None else {"page": page}
+        path = self.app.url_map.bind("localhost").build(endpoint, view_kwargs)
+
+        with self.app.test_request_context(path, base_url=self.base_url, query_string=query_string):
+            view = inspect.unwrap(self.app.view_functions[endpoint])
+            try:
+                response = self.app.make_response(view(**view_kwargs))
+            except HTTPException:
+                return None, None
+            if response.status_code != 200:
+                return None, None  # pragma: no cover
+            return request.path, response.get_data()
+
+    def documents(self) -> Iterator[Tuple[str, bytes]]:
+        """
+        Yields the key and body of each document in the read API
+
+        :rtype Iterator
+        :return: document keys and bodies
+        """
+        for endpoint, argument in self._rules():
+            if argument is None:
+                page = 1
+                while True:
+                    path, body = self._render(endpoint, {}, page=page)
+                    if body is None:
+                        break  # pragma: no cover
+                    yield snapshot_document_key(path, page), body
+                    if json.loads(body).get("links", {}).get("next") is None:
+                        break
+                    page += 1
+                continue
+
+            model = snapshot_route_arguments[argument]
+            for (neutral_id,) in model.query.with_entities(model.neutral_id).order_by(model.id).all():
+                path, body = self._render(endpoint, {argument: neutral_id})
+                if body is not None:
+                    yield snapshot_document_key(path), body
+
+    @staticmethod
+    def _document_file(key: str) -> str:
+        """
+        Relative file path for a document
+
+        E.g. '/projects' becomes 'projects/index.json' and '/projects?page=2' becomes 'projects/page-2.json'.
+
+        :type key: str
+        :param key: document key
+
+        :rtype str
+        :return: relative file path
+        """
+        path, _, query = key.partition("?page=")
+        name = "index.json" if not query else f"page-{ query }.json"
+        return os.path.join(path.strip("/"), name)
+
+    def write(self, target: str) -> dict:
+        """
+        Writes a snapshot, replacing any previous snapshot
+
+        The target is a symbolic link to the current snapshot directory, which is kept in a sibling '.<target>-releases'
+        directory. Snapshot directories other than the most recent (see 'keep_releases') are removed once replaced.
+
+        :type target: str
+        :param target: path snapshots are served from
+
+        :rtype dict
+        :return: snapshot manifest
+        """
+        target = Path(target).absolute()
+        if target.exists() and not target.is_symlink():
+            raise FileExistsError(f"'{ target }' exists and is not a symbolic link to a previous snapshot")
+
+        releases = target.parent / f".{ target.name }-releases"
+        release = releases / datetime.now(tz=timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+        release.mkdir(parents=True)
+
+        try:
+            manifest = self._write_release(release)
+        except Exception:
+            # Remove the partially written snapshot, which would otherwise never be used or cleaned up
+            shutil.rmtree(release, ignore_errors=True)
+            raise
+
+        link = target.parent / f".{ target.name }-link"
+        if link.is_symlink():
+            link.unlink()  # pragma: no cover
+        link.symlink_to(release, target_is_directory=True)
+        os.replace(link, target)
+
+        self._prune_releases(releases, current_release=release)
+
+        return manifest
+
+    def _write_release(self, release: Path) -> dict:
+        """
+        Writes each document, and the manifest, of a snapshot to a snapshot directory
+
+        :type release: Path
+        :param release: snapshot directory
+
+        :rtype dict
+        :return: snapshot manifest
+        """
+        encodings = supported_content_encodings()
+        manifest = {
+            "generated_at": datetime.now(tz=timezone.utc).isoformat(),
+            "base_url": self.base_url,
+            "encodings": encodings,
+            "documents": {},
+        }
+        for key, body in self.documents():
+            file = self._document_file(key)
+            (release / file).parent.mkdir(parents=True, exist_ok=True)
+            (release / file).write_bytes(body)
+            for encoding in encodings:
+                (release / f"{ file }{ snapshot_file_extensions[encoding] }").write_bytes(
+                    compress_payload(body, encoding, level=9 if encoding == "gzip" else 11)
+                )
+
+            manifest["documents"][key] = {
+                "file": file,
+                "etag": hashlib.sha256(body).hexdigest(),
+                "size": len(body),
+            }
+        (release / "manifest.json").write_text(json.dumps(manifest, indent=2, sort_keys=True))
+
+        return manifest
+
+    def _prune_releases(self, releases: Path, current_release: Path):
+        """
+        Removes snapshot directories other than the current snapshot and the most recent previous snapshots
+
+        Snapshot directories are named by the time they were written, so sort in the order they were written.
+
+        :type releases: Path
+        :param releases: directory containing snapshot directories
+        :type current_release: Path
+        :param current_release: directory of the current snapshot
+        """
+        previous_releases = sorted(
+            path for path in releases.iterdir() if path.is_dir() and path.name != current_release.name
+        )
+        for previous_release in previous_releases[: max(len(previous_releases) - (self.keep_releases - 1), 0)]:
+            shutil.rmtree(previous_release, ignore_errors=True)
+
+
+class StaticSnapshots:
+    """
+    Serves read API documents from a static snapshot, where available
+
+    Where a snapshot path is configured, requests for documents in the snapshot are answered from the snapshot files,
+    rather than by querying the database. Requests are still authenticated as normal.
+
+    Precompressed files are used where negotiated from the 'Accept-Encoding' request header. Responses include entity
+    tags, and last modified dates, to support conditional requests.
+
+    Only the default JSON:API representation is held in snapshots. Requests for other representations (e.g. compact),
+    or for documents not in the snapshot, are passed through to the API as normal.
+
+    Options:
+    * APP_STATIC_SNAPSHOT_PATH - path to the snapshot to serve (i.e. as given to 'flask export static'), or None
+    """
+
+    def __init__(self, app: Flask = None):
+        self._lock = Lock()
+        self._snapshot = (None, None)
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        """
+        :type app: Flask
+        :param app: Flask application
+        """
+        app.config.setdefault("APP_STATIC_SNAPSHOT_PATH", None)
+        app.extensions["static_snapshots"] = self
+        app.before_request(self.serve_snapshot)
+
+    def manifest(self) -> Tuple[str, Optional[dict]]:
+        """
+        Manifest for the current snapshot, and the snapshot directory it belongs to
+
+        The manifest is reloaded where the current snapshot changes. The directory and manifest are returned, and
+        updated, together, so that documents are always sent from the snapshot their manifest entries belong to.
+
+        :rtype tuple
+        :return: snapshot directory, and snapshot manifest, or None if there isn't a snapshot
+        """
+        release = os.path.realpath(current_app.config["APP_STATIC_SNAPSHOT_PATH"])
+        snapshot = self._snapshot
+        if release == snapshot[0]:
+            return snapshot
+
+        try:
+            with open(os.path.join(release, "manifest.json"), "r") as manifest_file:
+                manifest = json.load(manifest_file)
+        except FileNotFoundError:
+            manifest = None
+
+        with self._lock:
+            self._snapshot = (release, manifest)
+        return release, manifest
+
+    def serve_snapshot(self) -> Optional[Response]:
+        """
+        Flask 'before request' handler to answer a request from the snapshot, where possible
+
+        :rtype Response or None
+        :return: Flask response, or None to pass the request through to the API
+        """
+        if not current_app.config["APP_STATIC_SNAPSHOT_PATH"] or request.method not in ("GET", "HEAD"):
+            return None
+        if set(request.args.keys()) - {"page"}:
+            return None
+        if compact_representation_requested() or msgpack_encoding_requested() is not None:
+            return None
+
+        release, manifest = self.manifest()
+        if manifest is None:
+            return None
+
+        document = manifest["documents"].get(snapshot_document_key(request.path, request.args.get("page", type=int)))
+        if document is None:
+            return None
+
+        return current_app.auth()(self._send_document)(release, manifest, document)
+
+    @staticmethod
+    def _send_document(release: str, manifest: dict, document: dict) -> Response:
+        """
+        Sends a document from a snapshot, precompressed where possible
+
+        :type release: str
+        :param release: snapshot directory
+        :type manifest: dict
+        :param manifest: snapshot manifest
+        :type document: dict
+        :param document: document manifest entry
+
+        :rtype Response
+        :return: Flask response
+        """
+        file = os.path.join(release, document["file"])
+        etag = document["etag"]
+
+        encoding = request.accept_encodings.best_match(manifest["encodings"])
+        if encoding is not None:
+            file = f"{ file }{ snapshot_file_extensions[encoding] }"
+            etag = f"{ etag }-{ encoding }"
+
+        response = send_file(file, mimetype="application/json", etag=etag, conditional=True, max_age=0)
+        if encoding is not None:
+            response.headers["Content-Encoding"] = encoding
+        response.vary.update(["Accept", "Accept-Encoding"])
+        return response
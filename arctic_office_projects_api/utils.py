@@ -4,6 +4,7 @@ import logging
 import os
 
 from enum import Enum
+from typing import List, Sequence
 
 # noinspection PyProtectedMember
 # flake8: noqa
@@ -60,6 +61,24 @@ def generate_neutral_id() -> str:
     return ulid.new().str
 
 
+def format_table(rows: List[Sequence[str]]) -> str:
+    """
+    Formats rows of values as a plain text table, with columns padded to the widest value in each
+
+    E.g. '[("Status", "Grants"), ("imported", "12")]' becomes:
+        Status    Grants
+        imported  12
+
+    :type rows: list
+    :param rows: rows of the table, including any header rows, as sequences of strings with the same length
+
+    :rtype str
+    :return: table, with rows separated by new lines
+    """
+    widths = [max(len(row[column]) for row in rows) for column in range(len(rows[0]))]
+    return "\n".join("  ".join(value.ljust(width) for value, width in zip(row, widths)).rstrip() for row in rows)
+
+
 def generate_countries_enum(*, name: str = "Countries") -> Enum:
     countries = []
     for country in iso_countries:
@@ -84,9 +103,3 @@ def healthcheck_db() -> bool:
 
     return True
 
-
-def log_exception_to_file(exception_info):
-    with open(
-        "/usr/src/app/arctic_office_projects_api/bulk_importer/exception_log.txt", "a"
-    ) as f:  # pragma: no cover
-        f.write(exception_info + "\n")  # pragma: no cover
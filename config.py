@@ -39,6 +39,28 @@ class Config(object):
 
     APP_PAGE_SIZE = int(os.getenv('APP_PAGE_SIZE') or 10)
 
+    APP_COMPRESSION_MIN_SIZE = int(os.getenv('APP_COMPRESSION_MIN_SIZE') or 1024)
+    APP_COMPRESSION_CACHE_SIZE = int(os.getenv('APP_COMPRESSION_CACHE_SIZE') or 256)
+
+    APP_EXPORT_BATCH_SIZE = int(os.getenv('APP_EXPORT_BATCH_SIZE') or 500)
+    APP_STATIC_SNAPSHOT_PATH = os.getenv('APP_STATIC_SNAPSHOT_PATH') or None
+
+    APP_GTR_CONNECT_TIMEOUT = float(os.getenv('APP_GTR_CONNECT_TIMEOUT') or 10)
+    APP_GTR_READ_TIMEOUT = float(os.getenv('APP_GTR_READ_TIMEOUT') or 60)
+    APP_GTR_MAX_RETRIES = int(os.getenv('APP_GTR_MAX_RETRIES') or 5)
+    APP_GTR_BACKOFF_FACTOR = float(os.getenv('APP_GTR_BACKOFF_FACTOR') or 1)
+    APP_GTR_BACKOFF_MAX = float(os.getenv('APP_GTR_BACKOFF_MAX') or 60)
+    APP_GTR_RETRY_AFTER_MAX = float(os.getenv('APP_GTR_RETRY_AFTER_MAX') or 300)
+    APP_GTR_POOL_SIZE = int(os.getenv('APP_GTR_POOL_SIZE') or 10)
+    APP_GTR_RATE_LIMIT = float(os.getenv('APP_GTR_RATE_LIMIT') or 2)
+    APP_GTR_RATE_BURST = int(os.getenv('APP_GTR_RATE_BURST') or 5)
+    APP_GTR_FETCH_WORKERS = int(os.getenv('APP_GTR_FETCH_WORKERS') or 4)
+    APP_GTR_CACHE_PATH = os.getenv('APP_GTR_CACHE_PATH') or None
+    APP_GTR_CACHE_MAX_AGE = float(os.getenv('APP_GTR_CACHE_MAX_AGE') or 0) or None
+    APP_GTR_FIXTURES_MODE = os.getenv('APP_GTR_FIXTURES_MODE') or None
+    APP_GTR_FIXTURES_PATH = os.getenv('APP_GTR_FIXTURES_PATH') or None
+    APP_GTR_FIXTURES_LATENCY = float(os.getenv('APP_GTR_FIXTURES_LATENCY') or 0)
+
     ENTRA_AUTH_CLIENT_ID = os.getenv('ENTRA_AUTH_CLIENT_ID') or None
     ENTRA_AUTH_OIDC_ENDPOINT = os.getenv('ENTRA_AUTH_OIDC_ENDPOINT') or None
 
@@ -0,0 +1,28 @@
+"""grant sync state
+
+Revision ID: 3f8d2c61b7e5
+Revises: 7c1e5b2d9a40
+Create Date: 2026-10-19 11:02:18.204517
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f8d2c61b7e5'
+down_revision = '7c1e5b2d9a40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('grants', sa.Column('gtr_content_hash', sa.String(length=64), nullable=True))
+    op.add_column('grants', sa.Column('gtr_synced_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index(op.f('ix_grants_gtr_synced_at'), 'grants', ['gtr_synced_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_grants_gtr_synced_at'), table_name='grants')
+    op.drop_column('grants', 'gtr_synced_at')
+    op.drop_column('grants', 'gtr_content_hash')
@@ -0,0 +1,25 @@
+"""import run grant unmapped mappings
+
+Revision ID: 3f9d6b2e8a14
+Revises: c5e7a0f3b814
+Create Date: 2026-10-19 19:14:08.502316
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9d6b2e8a14'
+down_revision = 'c5e7a0f3b814'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('import_run_grants', sa.Column('unmapped', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+
+
+def downgrade():
+    op.drop_column('import_run_grants', 'unmapped')
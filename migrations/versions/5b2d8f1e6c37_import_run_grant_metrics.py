@@ -0,0 +1,25 @@
+"""import run grant metrics
+
+Revision ID: 5b2d8f1e6c37
+Revises: 8e4b1c7d2a95
+Create Date: 2026-10-19 21:02:47.118305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '5b2d8f1e6c37'
+down_revision = '8e4b1c7d2a95'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('import_run_grants', sa.Column('metrics', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+
+
+def downgrade():
+    op.drop_column('import_run_grants', 'metrics')
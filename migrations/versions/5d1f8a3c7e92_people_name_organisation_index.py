@@ -0,0 +1,25 @@
+"""people name organisation index
+
+Revision ID: 5d1f8a3c7e92
+Revises: e4a7c9d2f816
+Create Date: 2026-10-19 15:32:41.508216
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '5d1f8a3c7e92'
+down_revision = 'e4a7c9d2f816'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_people_name_organisation', 'people', ['first_name', 'last_name', 'organisation_id'], unique=False
+    )
+
+
+def downgrade():
+    op.drop_index('ix_people_name_organisation', table_name='people')
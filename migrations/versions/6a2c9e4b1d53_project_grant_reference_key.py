@@ -0,0 +1,48 @@
+"""project grant reference key
+
+Revision ID: 6a2c9e4b1d53
+Revises: b83e1f6d4a27
+Create Date: 2026-10-19 17:21:36.902144
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6a2c9e4b1d53'
+down_revision = 'b83e1f6d4a27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Projects without a grant reference (an empty string) are not imported from GTR and are not unique
+    duplicates = op.get_bind().execute(sa.text(
+        "SELECT grant_reference, array_agg(id ORDER BY id) FROM projects WHERE grant_reference <> '' "
+        "GROUP BY grant_reference HAVING count(*) > 1 ORDER BY grant_reference"
+    )).all()
+    if duplicates:
+        # Duplicate projects may have been edited separately, so need to be merged by hand
+        raise RuntimeError(
+            "Projects share a grant reference and need merging before upgrading: "
+            + "; ".join(f"{grant_reference} (project IDs {ids})" for grant_reference, ids in duplicates)
+        )
+    op.create_index(
+        'projects_grant_reference_key',
+        'projects',
+        ['grant_reference'],
+        unique=True,
+        postgresql_where=sa.text("grant_reference IS NOT NULL AND grant_reference <> ''"),
+    )
+
+    op.execute(
+        "DELETE FROM allocations a USING allocations b "
+        "WHERE a.project_id = b.project_id AND a.grant_id = b.grant_id AND a.id > b.id"
+    )
+    op.create_unique_constraint('allocations_project_id_grant_id_key', 'allocations', ['project_id', 'grant_id'])
+
+
+def downgrade():
+    op.drop_constraint('allocations_project_id_grant_id_key', 'allocations', type_='unique')
+    op.drop_index('projects_grant_reference_key', table_name='projects')
@@ -0,0 +1,49 @@
+"""import journal
+
+Revision ID: 7c1e5b2d9a40
+Revises: 0a47deb1e72d
+Create Date: 2026-10-19 09:12:40.512338
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c1e5b2d9a40'
+down_revision = '0a47deb1e72d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'import_runs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('source', sa.Text(), nullable=True),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table(
+        'import_run_grants',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('run_id', sa.Integer(), nullable=False),
+        sa.Column('grant_reference', sa.Text(), nullable=False),
+        sa.Column('lead_project', sa.Boolean(), nullable=True),
+        sa.Column('status', sa.Text(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('detail', sa.Text(), nullable=True),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['run_id'], ['import_runs.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('run_id', 'grant_reference')
+    )
+    op.create_index(op.f('ix_import_run_grants_run_id'), 'import_run_grants', ['run_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_import_run_grants_run_id'), table_name='import_run_grants')
+    op.drop_table('import_run_grants')
+    op.drop_table('import_runs')
@@ -0,0 +1,30 @@
+"""grant parent
+
+Revision ID: 8e4b1c7d2a95
+Revises: 3f9d6b2e8a14
+Create Date: 2026-10-19 20:07:41.118254
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e4b1c7d2a95'
+down_revision = '3f9d6b2e8a14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('grants', sa.Column('parent_id', sa.Integer(), nullable=True))
+    op.create_index(op.f('ix_grants_parent_id'), 'grants', ['parent_id'], unique=False)
+    op.create_foreign_key('grants_parent_id_fkey', 'grants', 'grants', ['parent_id'], ['id'])
+    op.add_column('import_queue', sa.Column('parent_grant_reference', sa.Text(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('import_queue', 'parent_grant_reference')
+    op.drop_constraint('grants_parent_id_fkey', 'grants', type_='foreignkey')
+    op.drop_index(op.f('ix_grants_parent_id'), table_name='grants')
+    op.drop_column('grants', 'parent_id')
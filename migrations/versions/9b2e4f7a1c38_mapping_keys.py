@@ -0,0 +1,44 @@
+"""mapping keys
+
+Revision ID: 9b2e4f7a1c38
+Revises: 3f8d2c61b7e5
+Create Date: 2026-10-19 13:27:51.640193
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b2e4f7a1c38'
+down_revision = '3f8d2c61b7e5'
+branch_labels = None
+depends_on = None
+
+
+# Mapping tables and their key columns
+mapping_keys = {
+    'project_organisations': 'organisation_id',
+    'project_people': 'gtr_person_id',
+    'project_subjects': 'subject_text',
+    'project_topics': 'topic_id',
+}
+
+
+def upgrade():
+    op.add_column('project_people', sa.Column('gtr_person_id', sa.Text(), nullable=True))
+    op.execute("UPDATE project_people SET gtr_person_id = regexp_replace(rtrim(gtr_person, '/'), '^.*/', '')")
+
+    for table, column in mapping_keys.items():
+        # Where a key was mapped more than once, keep the most recent mapping, as this was the one in effect
+        op.execute(
+            f"DELETE FROM {table} a USING {table} b WHERE a.{column} = b.{column} AND a.id < b.id"
+        )
+        op.create_unique_constraint(f'{table}_{column}_key', table, [column])
+
+
+def downgrade():
+    for table, column in mapping_keys.items():
+        op.drop_constraint(f'{table}_{column}_key', table, type_='unique')
+
+    op.drop_column('project_people', 'gtr_person_id')
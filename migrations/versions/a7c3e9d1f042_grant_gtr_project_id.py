@@ -0,0 +1,24 @@
+"""grant gtr project id
+
+Revision ID: a7c3e9d1f042
+Revises: 5b2d8f1e6c37
+Create Date: 2026-10-19 22:18:09.604127
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c3e9d1f042'
+down_revision = '5b2d8f1e6c37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('grants', sa.Column('gtr_project_id', sa.Text(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('grants', 'gtr_project_id')
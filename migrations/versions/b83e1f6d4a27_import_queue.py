@@ -0,0 +1,35 @@
+"""import queue
+
+Revision ID: b83e1f6d4a27
+Revises: 5d1f8a3c7e92
+Create Date: 2026-10-19 16:05:12.734905
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b83e1f6d4a27'
+down_revision = '5d1f8a3c7e92'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'import_queue',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('run_id', sa.Integer(), nullable=False),
+        sa.Column('grant_reference', sa.Text(), nullable=False),
+        sa.Column('lead_project', sa.Boolean(), nullable=False),
+        sa.Column('queued_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['run_id'], ['import_runs.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_import_queue_run_id'), 'import_queue', ['run_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_import_queue_run_id'), table_name='import_queue')
+    op.drop_table('import_queue')
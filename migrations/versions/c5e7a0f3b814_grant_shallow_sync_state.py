@@ -0,0 +1,26 @@
+"""grant shallow sync state
+
+Revision ID: c5e7a0f3b814
+Revises: 6a2c9e4b1d53
+Create Date: 2026-10-19 18:02:55.361720
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5e7a0f3b814'
+down_revision = '6a2c9e4b1d53'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('grants', sa.Column('gtr_project_content_hash', sa.String(length=64), nullable=True))
+    op.add_column('grants', sa.Column('gtr_links_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade():
+    op.drop_column('grants', 'gtr_links_hash')
+    op.drop_column('grants', 'gtr_project_content_hash')
@@ -0,0 +1,32 @@
+"""mapping updated at
+
+Revision ID: c5e8a2f7b914
+Revises: a7c3e9d1f042
+Create Date: 2026-10-20 09:14:52.381047
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5e8a2f7b914'
+down_revision = 'a7c3e9d1f042'
+branch_labels = None
+depends_on = None
+
+
+mapping_tables = ['project_organisations', 'project_people', 'project_subjects', 'project_topics']
+
+
+def upgrade():
+    for table in mapping_tables:
+        op.add_column(
+            table,
+            sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        )
+
+
+def downgrade():
+    for table in mapping_tables:
+        op.drop_column(table, 'updated_at')
@@ -0,0 +1,44 @@
+"""category term scheme identifier key
+
+Revision ID: e4a7c9d2f816
+Revises: 9b2e4f7a1c38
+Create Date: 2026-10-19 14:48:09.113752
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4a7c9d2f816'
+down_revision = '9b2e4f7a1c38'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Where a term was added more than once, keep the first, moving any categorisations of the others to it
+    op.execute(
+        "CREATE TEMPORARY TABLE duplicate_category_terms AS SELECT a.id, min(b.id) AS kept_id "
+        "FROM category_terms a JOIN category_terms b ON a.scheme_identifier = b.scheme_identifier AND a.id > b.id "
+        "GROUP BY a.id"
+    )
+    op.execute(
+        "UPDATE categorisations c SET category_term_id = d.kept_id FROM duplicate_category_terms d "
+        "WHERE c.category_term_id = d.id"
+    )
+    # Projects categorised with more than one copy of a term are categorised with the kept term once
+    op.execute(
+        "DELETE FROM categorisations a USING categorisations b "
+        "WHERE a.project_id = b.project_id AND a.category_term_id = b.category_term_id AND a.id > b.id "
+        "AND a.category_term_id IN (SELECT kept_id FROM duplicate_category_terms)"
+    )
+    op.execute("DELETE FROM category_terms WHERE id IN (SELECT id FROM duplicate_category_terms)")
+    op.execute("DROP TABLE duplicate_category_terms")
+
+    op.create_unique_constraint(
+        'category_terms_scheme_identifier_key', 'category_terms', ['scheme_identifier']
+    )
+
+
+def downgrade():
+    op.drop_constraint('category_terms_scheme_identifier_key', 'category_terms', type_='unique')
@@ -0,0 +1,180 @@
+import json
+import os
+import time
+
+import pytest
+import requests
+
+from sqlalchemy import delete, func, select, update
+
+from arctic_office_projects_api.extensions import db
+from arctic_office_projects_api.importers.gtr import import_gateway_to_research_grants_interactively
+from arctic_office_projects_api.importers.gtr_client import gtr_client
+from arctic_office_projects_api.importers.gtr_fixtures import GatewayToResearchReplayTransport, write_gtr_fixture
+from arctic_office_projects_api.importers.metrics import format_import_metrics_summary, summarise_import_metrics
+from arctic_office_projects_api.models import (
+    Allocation,
+    Categorisation,
+    CategoryTerm,
+    Grant,
+    ImportRun,
+    ImportRunGrant,
+    Participant,
+    Person,
+    Project,
+    Project_Organisations,
+)
+
+# Benchmarks import grants into the database, and take a while, so are only run when asked for
+pytestmark = pytest.mark.skipif(
+    not os.getenv("APP_BENCHMARKS"), reason="Benchmarks are only run if 'APP_BENCHMARKS' is set"
+)
+
+benchmark_sizes = (1, 10, 100)
+gtr_api = "https://gtr.ukri.org/gtr/api"
+
+
+def gtr_link(rel: str, href: str) -> dict:
+    return {"rel": rel, "href": href}
+
+
+def write_synthetic_gtr_fixtures(path: str, size: int) -> list:
+    """
+    Writes fixtures for a number of synthetic grants, shaped like GTR responses
+
+    Each grant has a fund, a lead organisation, two people (one shared with the next grant, as in split awards and
+    grants with the same investigators) and a publication.
+    """
+    grant_references = [f"NE/B{i:05d}/1" for i in range(size)]
+
+    def write(url: str, resource: dict):
+        write_gtr_fixture(path, url, status_code=200, body=json.dumps(resource))
+
+    write(f"{gtr_api}/organisations/benchmark-funder", {"name": "NERC", "links": {"link": []}})
+    write(f"{gtr_api}/organisations/benchmark-employer", {"name": "BAS", "links": {"link": []}})
+    for i in range(size + 1):
+        write(
+            f"{gtr_api}/persons/benchmark-{i}",
+            {
+                "firstName": f"Person {i}",
+                "surname": "Benchmark",
+                "orcidId": f"0000-0001-{i // 10000:04d}-{i % 10000:04d}",
+                "links": {"link": [gtr_link("EMPLOYED", f"{gtr_api}/organisations/benchmark-employer")]},
+            },
+        )
+    for i, grant_reference in enumerate(grant_references):
+        search_url = (
+            requests.Request("GET", f"{gtr_api}/projects", params={"q": grant_reference, "f": "pro.gr"}).prepare().url
+        )
+        write(search_url, {"project": [{"id": f"benchmark-{i}"}]})
+        write(
+            f"{gtr_api}/projects/benchmark-{i}",
+            {
+                "status": "Closed",
+                "title": f"Benchmark project {i}",
+                "abstractText": "Abstract " * 200,
+                "identifiers": {"identifier": [{"type": "RCUK", "value": grant_reference}]},
+                "links": {
+                    "link": [
+                        gtr_link("FUND", f"{gtr_api}/funds/benchmark-{i}"),
+                        gtr_link("LEAD_ORG", f"{gtr_api}/organisations/benchmark-employer"),
+                        gtr_link("PI_PER", f"{gtr_api}/persons/benchmark-{i}"),
+                        gtr_link("COI_PER", f"{gtr_api}/persons/benchmark-{i + 1}"),
+                        gtr_link("PUBLICATION", f"{gtr_api}/outcomes/publications/benchmark-{i}"),
+                    ]
+                },
+            },
+        )
+        write(
+            f"{gtr_api}/funds/benchmark-{i}",
+            {
+                "start": 1380582000000,
+                "end": 1506812399000,
+                "valuePounds": {"currencyCode": "GBP", "amount": 100000 + i},
+                "links": {"link": [gtr_link("FUNDER", f"{gtr_api}/organisations/benchmark-funder")]},
+            },
+        )
+        write(f"{gtr_api}/outcomes/publications/benchmark-{i}", {"doi": f"10.1000/benchmark-{i}", "links": {"link": []}})
+
+    return grant_references
+
+
+@pytest.fixture(scope="module")
+def gtr_fixtures(tmp_path_factory):
+    """
+    Recorded GTR fixtures, from 'APP_BENCHMARK_GTR_FIXTURES_PATH' if set, otherwise synthetic fixtures
+
+    Recorded fixtures need the GTR mappings for the grants they cover to be in the database.
+    """
+    if os.getenv("APP_BENCHMARK_GTR_FIXTURES_PATH"):
+        path = os.getenv("APP_BENCHMARK_GTR_FIXTURES_PATH")
+        return path, GatewayToResearchReplayTransport(path=path).grant_references(), False
+
+    path = str(tmp_path_factory.mktemp("gtr-fixtures"))
+    return path, write_synthetic_gtr_fixtures(path, size=max(benchmark_sizes)), True
+
+
+@pytest.fixture
+def benchmark_database(app, gtr_fixtures):
+    """
+    Removes everything imported by a benchmark afterwards, so each benchmark imports grants that do not exist yet
+    """
+    _, _, synthetic = gtr_fixtures
+    tables = [ImportRunGrant, ImportRun, Categorisation, Participant, Allocation, Project, Grant, Person, CategoryTerm]
+    with db.engine.connect() as connection:
+        max_ids = {table: connection.execute(select(func.coalesce(func.max(table.id), 0))).scalar_one() for table in tables}
+
+    mappings = []
+    if synthetic:
+        mappings = [
+            Project_Organisations(organisation_id="benchmark-funder", organisation_ror="https://ror.org/benchmark-1"),
+            Project_Organisations(organisation_id="benchmark-employer", organisation_ror="https://ror.org/benchmark-2"),
+        ]
+        db.session.add_all(mappings)
+        db.session.commit()
+
+    yield
+
+    with db.engine.begin() as connection:
+        connection.execute(update(Grant).where(Grant.id > max_ids[Grant]).values(parent_id=None))
+        for table in tables:
+            connection.execute(delete(table).where(table.id > max_ids[table]))
+    for mapping in mappings:
+        db.session.delete(mapping)
+    db.session.commit()
+
+
+@pytest.mark.parametrize("size", benchmark_sizes)
+def test_import_benchmark(app, gtr_fixtures, benchmark_database, size):
+    path, grant_references, synthetic = gtr_fixtures
+    if len(grant_references) < size:
+        pytest.skip(f"Only {len(grant_references)} grants recorded")
+
+    transport = GatewayToResearchReplayTransport(
+        path=path, latency=float(os.getenv("APP_BENCHMARK_GTR_LATENCY") or 0.05)
+    )
+    rate_limit = gtr_client.rate_limiter.rate
+    gtr_client.set_transport(transport)
+    gtr_client.rate_limiter.configure(rate=0, burst=gtr_client.rate_limiter.burst)
+    grants = [{"grant-reference": grant_reference, "lead-project": 1} for grant_reference in grant_references[:size]]
+    try:
+        started_at = time.perf_counter()
+        results = import_gateway_to_research_grants_interactively(
+            grants, workers=int(os.getenv("APP_IMPORT_WORKERS") or 4)
+        )
+        elapsed = time.perf_counter() - started_at
+    finally:
+        gtr_client.set_transport(None)
+        gtr_client.rate_limiter.configure(rate=rate_limit, burst=gtr_client.rate_limiter.burst)
+
+    print(
+        f"\nImported {size} grants in {elapsed:.2f} seconds ({size / elapsed:.2f} grants per second), "
+        f"{transport.requests_replayed} GTR requests, {transport.latency} seconds latency per request"
+    )
+    print(format_import_metrics_summary(summarise_import_metrics(results)))
+
+    assert len(results) == size
+    if synthetic:
+        assert {result["status"] for result in results} == {"imported"}
+    else:
+        assert all(result["status"] is not None for result in results)
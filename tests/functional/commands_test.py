@@ -1,9 +1,13 @@
+import json
+
+from datetime import timedelta
+
 import pytest
 from flask import Flask
 from unittest.mock import patch
 
 # Import your CLI groups and commands
-from arctic_office_projects_api.commands import seeding_cli_group, importing_cli_group
+from arctic_office_projects_api.commands import seeding_cli_group, importing_cli_group, import_worker_command
 
 
 # Create a test app factory
@@ -12,6 +16,7 @@ def app():
     app = Flask(__name__)
     app.cli.add_command(seeding_cli_group)
     app.cli.add_command(importing_cli_group)
+    app.cli.add_command(import_worker_command)
     return app
 
 
@@ -110,3 +115,195 @@ def test_import_grant_from_provider(mock_import_grant, app):
 
         # Check the CLI output
         assert result.exit_code == 0
+
+
+# Test import_grants_from_file
+@patch("arctic_office_projects_api.commands.ImportJournal")
+@patch(
+    "arctic_office_projects_api.commands.import_gateway_to_research_grants_interactively"
+)
+def test_import_grants_from_file(mock_import_grants, mock_journal, app):
+    journal = mock_journal.start.return_value
+    journal.run_id = 7
+    metrics = {
+        "http_requests": 8,
+        "http_bytes": 20480,
+        "http_seconds": 1.2,
+        "sleep_seconds": 0,
+        "parse_seconds": 0.01,
+        "db_statements": 30,
+        "db_seconds": 0.1,
+        "stages": {"search": 0.2, "fetch": 1.0, "map": 0.01, "persist": 0.15, "link-categories": 0.05},
+    }
+    mock_import_grants.return_value = [
+        {
+            "grant_reference": "NE/I028858/1",
+            "status": "imported",
+            "error": None,
+            "unmapped": [],
+            "metrics": metrics,
+            "duration": 1.5,
+        },
+        {
+            "grant_reference": "NE/I028653/1",
+            "status": "failed",
+            "error": "HTTPError",
+            "unmapped": [],
+            "metrics": metrics,
+            "duration": 0.5,
+        },
+        {"grant_reference": "invalid", "status": "invalid", "error": None, "unmapped": [], "metrics": None, "duration": 0},
+    ]
+    runner = app.test_cli_runner()  # Use app's CLI runner
+    with app.app_context():  # Push the app context
+
+        with runner.isolated_filesystem():
+            with open("grants.csv", "w") as f:
+                f.write("id,parent-id,lead-project,title,grant-reference\n")
+                f.write("1,,1,Example,NE/I028858/1\n")
+                f.write("2,1,0,Example,NE/I028653/1\n")
+                f.write("3,,1,Example,invalid\n")
+
+            result = runner.invoke(
+                args=["import", "grants", "grants.csv", "--workers", "4", "--report", "report.json"]
+            )
+            with open("report.json") as f:
+                report = json.load(f)
+
+        mock_journal.start.assert_called_once_with(source="grants.csv")
+        journal.grant_finished.assert_called_once_with("invalid", status="invalid")
+        grants = mock_import_grants.call_args.args[0]
+        assert [grant["grant-reference"] for grant in grants] == ["NE/I028858/1", "NE/I028653/1"]
+        assert [grant["parent-grant-reference"] for grant in grants] == [None, "NE/I028858/1"]
+        assert mock_import_grants.call_args.kwargs == {"workers": 4, "journal": journal}
+
+        # Check the CLI output
+        assert result.exit_code == 0
+        assert "Import run: 7" in result.output
+        assert "imported         1        1.5" in result.output
+        assert "NE/I028653/1     failed   HTTPError" in result.output
+        assert "invalid          invalid  -" in result.output
+        assert "Import metrics" in result.output
+        assert "http_requests                     16     8.0      8" in result.output
+        assert "stage: fetch (seconds)            2.0    1.0      1.0" in result.output
+
+        # Metrics are reported as JSON too, aggregated and for each grant
+        assert report["run"] == 7
+        assert report["summary"]["grants"] == 2
+        assert report["summary"]["counters"]["http_bytes"] == {"total": 40960, "mean": 20480.0, "max": 20480}
+        assert report["grants"][0] == {
+            "grant_reference": "NE/I028858/1",
+            "status": "imported",
+            "duration": 1.5,
+            "metrics": metrics,
+        }
+        assert report["grants"][2]["metrics"] is None
+
+
+@pytest.mark.parametrize(
+    "option, expected_grant_references",
+    [("--resume", ["NE/I028654/1"]), ("--retry-failed", ["NE/I028653/1"])],
+)
+@patch("arctic_office_projects_api.commands.ImportJournal")
+@patch(
+    "arctic_office_projects_api.commands.import_gateway_to_research_grants_interactively"
+)
+def test_import_grants_from_file_resumed(mock_import_grants, mock_journal, app, option, expected_grant_references):
+    journal = mock_journal.resume.return_value
+    journal.finished_grant_references.return_value = ["NE/I028858/1", "NE/I028653/1"]
+    journal.failed_grant_references.return_value = ["NE/I028653/1"]
+    mock_import_grants.return_value = []
+    runner = app.test_cli_runner()
+    with app.app_context():
+
+        with runner.isolated_filesystem():
+            with open("grants.csv", "w") as f:
+                f.write("id,parent-id,lead-project,title,grant-reference\n")
+                f.write("1,,1,Example,NE/I028858/1\n")
+                f.write("2,1,0,Example,NE/I028653/1\n")
+                f.write("3,,1,Example,NE/I028654/1\n")
+
+            result = runner.invoke(args=["import", "grants", "grants.csv", option, "7"])
+
+        assert result.exit_code == 0
+        mock_journal.resume.assert_called_once_with(run_id=7)
+        mock_journal.start.assert_not_called()
+        grants = mock_import_grants.call_args.args[0]
+        assert [grant["grant-reference"] for grant in grants] == expected_grant_references
+
+
+@patch("arctic_office_projects_api.commands.ImportJournal")
+def test_import_grants_from_file_unknown_run(mock_journal, app):
+    mock_journal.resume.side_effect = KeyError("Import run '7' does not exist")
+    runner = app.test_cli_runner()
+    with app.app_context():
+
+        with runner.isolated_filesystem():
+            with open("grants.csv", "w") as f:
+                f.write("id,parent-id,lead-project,title,grant-reference\n")
+
+            result = runner.invoke(args=["import", "grants", "grants.csv", "--resume", "7"])
+
+        assert result.exit_code == 2
+        assert "Import run '7' does not exist" in result.output
+
+
+@patch("arctic_office_projects_api.commands.ImportJournal")
+@patch(
+    "arctic_office_projects_api.commands.refresh_gateway_to_research_grants_interactively"
+)
+def test_refresh_grants(mock_refresh_grants, mock_journal, app):
+    journal = mock_journal.start.return_value
+    mock_refresh_grants.return_value = [
+        {"grant_reference": "NE/I028858/1", "status": "unchanged", "error": None, "unmapped": [], "metrics": None, "duration": 0.5},
+        {
+            "grant_reference": "NE/I028653/1",
+            "status": "unmapped",
+            "error": "UnmappedGatewayToResearchMappings",
+            "unmapped": [{"mapping": "topics", "key": "T1", "name": "Topic 1"}],
+            "metrics": None,
+            "duration": 0.2,
+        },
+        {
+            "grant_reference": "NE/I028654/1",
+            "status": "unmapped",
+            "error": "UnmappedGatewayToResearchMappings",
+            "unmapped": [
+                {"mapping": "organisations", "key": "O1", "name": None},
+                {"mapping": "topics", "key": "T1", "name": "Topic 1"},
+            ],
+            "metrics": None,
+            "duration": 0.2,
+        },
+    ]
+    runner = app.test_cli_runner()
+    with app.app_context():
+        result = runner.invoke(
+            args=["import", "refresh", "--stale-after", "12", "--max-seconds", "60", "--max-requests", "100", "--shallow"]
+        )
+
+        assert result.exit_code == 0
+        mock_refresh_grants.assert_called_once_with(
+            stale_after=timedelta(hours=12), max_seconds=60, max_requests=100, journal=journal, shallow=True
+        )
+        assert "unchanged        1         0.5" in result.output
+        assert "NE/I028654/1     unmapped  UnmappedGatewayToResearchMappings" in result.output
+        # Mappings missing for many grants are listed once
+        assert (
+            "Mappings to add\n"
+            "Mapping        Key  Name     Grants\n"
+            "organisations  O1   -        1\n"
+            "topics         T1   Topic 1  2\n"
+        ) in result.output
+
+
+@patch("arctic_office_projects_api.commands.run_gateway_to_research_import_workers")
+def test_import_worker(mock_run_workers, app):
+    mock_run_workers.return_value = 3
+    runner = app.test_cli_runner()
+    with app.app_context():
+        result = runner.invoke(args=["worker", "--workers", "4", "--poll-interval", "1", "--burst"])
+
+        assert result.exit_code == 0
+        mock_run_workers.assert_called_once_with(workers=4, poll_interval=1, burst=True)
+        assert "Imported 3 queued grants" in result.output
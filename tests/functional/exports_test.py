@@ -0,0 +1,75 @@
+import csv
+import io
+import json
+import pytest
+
+AUTH_HEADERS = {"Authorization": "Bearer fake_token"}
+
+
+@pytest.mark.usefixtures("db_create")
+def test_exports_ndjson(client):
+    response = client.get("/exports/projects", headers=AUTH_HEADERS)
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    assert response.is_streamed
+
+    records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert len(records) == 3
+    assert records[0]["id"] == "01DB2ECBP24NHYV5KZQG2N3FS2"
+    assert records[0]["title"] == "Example project 1"
+    assert records[0]["participants"] == ["01DB2ECBP3622SPB5PS3J8W4XF", "01DB2ECBP3VQGDYMW1CRPJ0VGP"]
+    assert records[0]["allocations"] == ["01DB2ECBP35AT5WBG092J5GDQ9"]
+
+
+@pytest.mark.usefixtures("db_create")
+def test_exports_csv(client):
+    response = client.get("/exports/categorisations?format=csv", headers=AUTH_HEADERS)
+    assert response.status_code == 200
+    assert response.mimetype == "text/csv"
+
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert len(rows) == 4
+    assert rows[0] == {
+        "id": "01DC6HYAKYAXE7MZMD08QV5JWG",
+        "project": "01DB2ECBP24NHYV5KZQG2N3FS2",
+        "category": "01DC6HYAKX53S13HCN2SBN4333",
+    }
+
+    response = client.get("/exports/projects", headers={**AUTH_HEADERS, "Accept": "text/csv"})
+    assert response.status_code == 200
+    assert response.mimetype == "text/csv"
+
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert len(rows) == 3
+    assert json.loads(rows[0]["participants"]) == ["01DB2ECBP3622SPB5PS3J8W4XF", "01DB2ECBP3VQGDYMW1CRPJ0VGP"]
+
+
+@pytest.mark.usefixtures("db_create")
+def test_exports_all_resources(client, app):
+    app.config["APP_EXPORT_BATCH_SIZE"] = 2
+
+    for resource, count in {
+        "people": 6,
+        "grants": 3,
+        "organisations": 6,
+        "category-schemes": 3,
+        "categories": 21,
+        "participants": 7,
+        "allocations": 3,
+        "categorisations": 4,
+    }.items():
+        response = client.get(f"/exports/{ resource }", headers=AUTH_HEADERS)
+        assert response.status_code == 200
+        assert len(response.get_data(as_text=True).splitlines()) == count
+
+
+@pytest.mark.usefixtures("db_create")
+def test_exports_invalid(client):
+    response = client.get("/exports/unknown", headers=AUTH_HEADERS)
+    assert response.status_code == 404
+
+    response = client.get("/exports/projects?format=xml", headers=AUTH_HEADERS)
+    assert response.status_code == 400
+
+    response = client.get("/exports/projects")
+    assert response.status_code == 401
@@ -0,0 +1,197 @@
+import json
+import pytest
+
+from arctic_office_projects_api.representations import COMPACT_MEDIA_TYPE
+
+AUTH_HEADERS = {"Authorization": "Bearer fake_token"}
+
+
+@pytest.mark.usefixtures("db_create")
+def test_projects_detail_compact(client):
+    response = client.get("/projects/01DB2ECBP24NHYV5KZQG2N3FS2?format=compact", headers=AUTH_HEADERS)
+    assert response.status_code == 200
+    assert response.mimetype == COMPACT_MEDIA_TYPE
+    assert "Accept" in response.vary
+
+    with open("tests/responses/project.json", "r") as f:
+        expected_data = json.load(f)
+
+    response_data = response.json
+    assert "links" not in response_data
+    assert response_data["data"]["id"] == expected_data["data"]["id"]
+    assert response_data["data"]["title"] == expected_data["data"]["attributes"]["title"]
+    assert (
+        response_data["data"]["access_duration"] == expected_data["data"]["attributes"]["access-duration"]["interval"]
+    )
+    assert response_data["data"]["participants"] == [
+        participant["id"] for participant in expected_data["data"]["relationships"]["participants"]["data"]
+    ]
+
+    expected_included = {(item["type"], item["id"]) for item in expected_data["included"]}
+    included = {
+        (resource_type, resource_id)
+        for resource_type, records in response_data["included"].items()
+        for resource_id in records.keys()
+    }
+    assert included == expected_included
+
+    grant = response_data["included"]["grants"]["01DB2ECBP3XQ4B8Z5DW7W963YD"]
+    assert grant["funder"] == "01DB2ECBP3A13RJ6QEZFN26ZEP"
+    assert grant["total_funds"] == {"value": "120000.00", "currency": "GBP"}
+    assert "links" not in grant
+
+
+@pytest.mark.usefixtures("db_create")
+def test_grants_detail_compact_omits_empty(client):
+    response = client.get("/grants/01DB2ECBP3DJ512HM1409ZNDHW?format=compact", headers=AUTH_HEADERS)
+    assert response.status_code == 200
+
+    grant = response.json["data"]
+    assert grant["reference"] == "EX-GRANT-0002"
+    assert "total_funds" not in grant
+    assert "website" not in grant
+    assert "publications" not in grant
+
+
+@pytest.mark.usefixtures("db_create")
+def test_projects_detail_compact_negotiated(client):
+    response = client.get(
+        "/projects/01DB2ECBP24NHYV5KZQG2N3FS2",
+        headers={**AUTH_HEADERS, "Accept": COMPACT_MEDIA_TYPE},
+    )
+    assert response.status_code == 200
+    assert response.mimetype == COMPACT_MEDIA_TYPE
+    assert response.json["data"]["id"] == "01DB2ECBP24NHYV5KZQG2N3FS2"
+    assert "relationships" not in response.json["data"]
+
+    response = client.get(
+        "/projects/01DB2ECBP24NHYV5KZQG2N3FS2",
+        headers={**AUTH_HEADERS, "Accept": f"application/json, { COMPACT_MEDIA_TYPE };q=0.5"},
+    )
+    assert response.status_code == 200
+    assert response.mimetype == "application/json"
+    assert "relationships" in response.json["data"]
+
+    response = client.get("/projects/01DB2ECBP24NHYV5KZQG2N3FS2", headers={**AUTH_HEADERS, "Accept": "*/*"})
+    assert response.status_code == 200
+    assert response.mimetype == "application/json"
+
+
+@pytest.mark.usefixtures("db_create")
+def test_projects_list_compact_smaller(client):
+    response_default = client.get("/projects", headers=AUTH_HEADERS)
+    response_compact = client.get("/projects?format=compact", headers=AUTH_HEADERS)
+    assert response_compact.status_code == 200
+
+    assert response_compact.json["meta"] == {"page": 1, "pages": 1}
+    assert len(response_compact.json["data"]) == len(response_default.json["data"])
+    assert len(response_compact.get_data()) < len(response_default.get_data()) * 0.6
+
+
+@pytest.mark.parametrize(
+    "route,target",
+    [
+        ("/projects", 0.6),
+        ("/people", 0.6),
+        ("/organisations", 0.6),
+        ("/participants", 0.6),
+        ("/categorisations", 0.6),
+        ("/category-schemes", 0.6),
+        ("/grants", 0.75),
+        ("/allocations", 0.75),
+    ],
+)
+@pytest.mark.usefixtures("db_create")
+def test_resources_list_compact_smaller(client, route, target):
+    response_default = client.get(route, headers=AUTH_HEADERS)
+    response_compact = client.get(f"{ route }?format=compact", headers=AUTH_HEADERS)
+    assert response_compact.status_code == 200
+    assert len(response_compact.get_data()) < len(response_default.get_data()) * target
+
+
+@pytest.mark.usefixtures("db_create")
+def test_compact_error_not_labelled(client):
+    response = client.get("/projects/01DB2ECBP24NHYV5KZQG2N3FS3?format=compact", headers=AUTH_HEADERS)
+    assert response.status_code == 404
+    assert response.mimetype == "application/json"
+    assert "errors" in response.json
+
+    response = client.get(
+        "/projects/01DB2ECBP24NHYV5KZQG2N3FS3", headers={**AUTH_HEADERS, "Accept": COMPACT_MEDIA_TYPE}
+    )
+    assert response.status_code == 404
+    assert response.mimetype == "application/json"
+
+
+@pytest.mark.usefixtures("db_create")
+def test_projects_relationships_compact(client):
+    response = client.get(
+        "/projects/01DB2ECBP24NHYV5KZQG2N3FS2/relationships/participants?format=compact", headers=AUTH_HEADERS
+    )
+    assert response.status_code == 200
+    assert response.json == {"data": ["01DB2ECBP3622SPB5PS3J8W4XF", "01DB2ECBP3VQGDYMW1CRPJ0VGP"]}
+
+    response = client.get("/projects/01DB2ECBP24NHYV5KZQG2N3FS2/participants?format=compact", headers=AUTH_HEADERS)
+    assert response.status_code == 200
+    assert [participant["id"] for participant in response.json["data"]] == [
+        "01DB2ECBP3622SPB5PS3J8W4XF",
+        "01DB2ECBP3VQGDYMW1CRPJ0VGP",
+    ]
+    assert response.json["data"][0]["project"] == "01DB2ECBP24NHYV5KZQG2N3FS2"
+
+    response = client.get("/grants/01DB2ECBP3XQ4B8Z5DW7W963YD/organisations?format=compact", headers=AUTH_HEADERS)
+    assert response.status_code == 200
+    assert response.json["data"]["id"] == "01DB2ECBP3A13RJ6QEZFN26ZEP"
+    assert response.json["data"]["grid_identifier"] == "XE-EXAMPLE-grid.5501.1"
+
+
+@pytest.mark.usefixtures("db_create")
+def test_projects_detail_msgpack(client):
+    msgpack = pytest.importorskip("msgpack")
+
+    for media_type in ["application/msgpack", "application/vnd.api+msgpack"]:
+        response = client.get(
+            "/projects/01DB2ECBP24NHYV5KZQG2N3FS2", headers={**AUTH_HEADERS, "Accept": media_type}
+        )
+        assert response.status_code == 200
+        assert response.mimetype == media_type
+        assert "Accept" in response.vary
+
+        with open("tests/responses/project.json", "r") as f:
+            expected_data = json.load(f)
+
+        assert msgpack.unpackb(response.get_data()) == expected_data
+
+
+@pytest.mark.usefixtures("db_create")
+def test_projects_detail_msgpack_compact(client):
+    msgpack = pytest.importorskip("msgpack")
+
+    response_json = client.get("/projects/01DB2ECBP24NHYV5KZQG2N3FS2?format=compact", headers=AUTH_HEADERS)
+    response = client.get(
+        "/projects/01DB2ECBP24NHYV5KZQG2N3FS2?format=compact",
+        headers={**AUTH_HEADERS, "Accept": "application/msgpack"},
+    )
+    assert response.status_code == 200
+    assert response.mimetype == "application/msgpack"
+    assert msgpack.unpackb(response.get_data()) == response_json.json
+
+
+@pytest.mark.usefixtures("db_create")
+def test_projects_detail_msgpack_not_preferred(client):
+    response = client.get(
+        "/projects/01DB2ECBP24NHYV5KZQG2N3FS2",
+        headers={**AUTH_HEADERS, "Accept": "application/json, application/msgpack;q=0.5"},
+    )
+    assert response.status_code == 200
+    assert response.mimetype == "application/json"
+
+
+@pytest.mark.usefixtures("db_create")
+def test_projects_not_found_msgpack(client):
+    msgpack = pytest.importorskip("msgpack")
+
+    response = client.get("/projects/123", headers={**AUTH_HEADERS, "Accept": "application/msgpack"})
+    assert response.status_code == 404
+    assert response.mimetype == "application/msgpack"
+    assert msgpack.unpackb(response.get_data())["errors"][0]["title"] == "Not Found"
@@ -4,9 +4,12 @@ import tempfile
 import pytest
 
 from pathlib import Path
-from unittest.mock import patch, call, MagicMock, mock_open
+from unittest.mock import patch, MagicMock, mock_open
 from arctic_office_projects_api import create_app
 from arctic_office_projects_api import validate_token
+from arctic_office_projects_api.extensions import db
+from arctic_office_projects_api.importers.journal import ImportJournal
+from arctic_office_projects_api.models import ImportQueuedGrant, Project_Topics
 
 
 @pytest.fixture
@@ -129,6 +132,29 @@ def test_exception_log_not_found(client, monkeypatch):
     assert response.mimetype == "text/plain"
 
 
+def test_exception_log_journal(client, monkeypatch):
+    monkeypatch.setattr("arctic_office_projects_api.validate_token", lambda token: {"sub": "test-user"})
+    monkeypatch.delenv("IMPORT_EXCEPTION_LOG", raising=False)
+
+    with client.application.app_context():
+        journal = ImportJournal.start()
+        journal.grant_started("NE/K011820/1")
+        journal.grant_finished("NE/K011820/1", status="imported")
+        journal.grant_started("NE/K011222/1")
+        journal.grant_finished(
+            "NE/K011222/1", status="unmapped-topic", error="UnmappedGatewayToResearchProjectTopic", detail="Topic T3"
+        )
+
+    response = client.get(
+        f"/exception-log?run={journal.run_id}",
+        headers={"Authorization": "Bearer fake_token"}
+    )
+
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    assert response.get_data(as_text=True) == "Topic T3"
+
+
 def test_post_gtr_grant_single_success(client, monkeypatch):
     # Patch auth decorator / token validation
     monkeypatch.setattr("arctic_office_projects_api.validate_token", lambda token: {"sub": "test-user"})
@@ -180,7 +206,10 @@ def test_post_gtr_grant_bulk_success(client, monkeypatch):
 
         payload = [
             {"grant-reference": "NE/K011820/1", "lead-project": 1},
-            {"grant-reference": "NE/K011222/1", "lead-project": 0}
+            {"grant-reference": "NE/K011222/1", "lead-project": 0},
+            {"id": 1, "parent-id": None, "grant-reference": "NE/I028858/1", "lead-project": 1},
+            {"id": 2, "parent-id": 1, "grant-reference": "NE/I028653/1", "lead-project": 0},
+            {"id": 188, "parent-id": 188, "grant-reference": "NE/N016211/1", "lead-project": 1},
         ]
 
         response = client.post(
@@ -189,19 +218,64 @@ def test_post_gtr_grant_bulk_success(client, monkeypatch):
             headers={"Authorization": "Bearer fake_token"}
         )
 
-        expected_calls = [
-            call("NE/K011820/1", 1),
-            call("NE/K011222/1", 0)
-        ]
-        mock_import.assert_has_calls(expected_calls, any_order=False)
-        assert mock_import.call_count == 2
+        # Grants are queued for import workers, rather than imported during the request
+        mock_import.assert_not_called()
 
         # Assert response
-        assert response.status_code == 201
+        assert response.status_code == 202
         data = response.get_json()
-        assert data["message"] == "All grants attempted"
+        assert data["message"] == "Grants queued for import"
+        assert response.headers["Location"] == f"/jobs/{data['job']}"
         assert data["data"] == payload
 
+    with client.application.app_context():
+        queued_grants = ImportQueuedGrant.query.filter_by(run_id=data["job"]).order_by(ImportQueuedGrant.id).all()
+        assert [
+            (grant.grant_reference, grant.lead_project, grant.parent_grant_reference) for grant in queued_grants
+        ] == [
+            ("NE/K011820/1", True, None),
+            ("NE/K011222/1", False, None),
+            ("NE/I028858/1", True, None),
+            ("NE/I028653/1", False, "NE/I028858/1"),
+            ("NE/N016211/1", True, None),
+        ]
+        for queued_grant in queued_grants:
+            db.session.delete(queued_grant)
+        db.session.commit()
+
+
+def test_import_job(client, monkeypatch):
+    monkeypatch.setattr("arctic_office_projects_api.validate_token", lambda token: {"sub": "test-user"})
+
+    with client.application.app_context():
+        journal = ImportJournal.start(source="/post-gtr-grant-bulk")
+        journal.enqueue([{"grant-reference": "NE/K011222/1", "lead-project": 0}])
+        journal.grant_started("NE/K011820/1")
+        journal.grant_finished("NE/K011820/1", status="imported")
+
+        response = client.get(f"/jobs/{journal.run_id}", headers={"Authorization": "Bearer fake_token"})
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data["run"] == journal.run_id
+        assert data["status"] == "running"
+        assert data["queued"] == 1
+        assert [(grant["grant_reference"], grant["status"]) for grant in data["grants"]] == [
+            ("NE/K011820/1", "imported"),
+        ]
+
+        ImportQueuedGrant.query.filter_by(run_id=journal.run_id).delete()
+        db.session.commit()
+
+
+def test_import_job_not_found(client, monkeypatch):
+    monkeypatch.setattr("arctic_office_projects_api.validate_token", lambda token: {"sub": "test-user"})
+
+    response = client.get("/jobs/0", headers={"Authorization": "Bearer fake_token"})
+
+    assert response.status_code == 404
+    assert response.get_json()["error"] == "Job 0 not found"
+
 
 def test_post_gtr_grant_bulk_no_json(client, monkeypatch):
     monkeypatch.setattr("arctic_office_projects_api.validate_token", lambda token: {"sub": "test-user"})
@@ -217,6 +291,48 @@ def test_post_gtr_grant_bulk_no_json(client, monkeypatch):
     assert data["error"] == "No JSON body provided"
 
 
+def test_post_gtr_grant_bulk_invalid(client, monkeypatch):
+    monkeypatch.setattr("arctic_office_projects_api.validate_token", lambda token: {"sub": "test-user"})
+
+    response = client.post(
+        "/post-gtr-grant-bulk",
+        json=[
+            {"grant-reference": "NE/K011820/1", "lead-project": 1},
+            {"grant-reference": "NE/K011222/1", "lead-project": "yes"},
+        ],
+        headers={"Authorization": "Bearer fake_token"}
+    )
+
+    assert response.status_code == 400
+    data = response.get_json()
+    assert data["error"] == "Invalid grant"
+    assert "NE/K011222/1" in data["detail"]
+    assert data["grant"] == {"grant-reference": "NE/K011222/1", "lead-project": "yes"}
+
+    response = client.post(
+        "/post-gtr-grant-bulk",
+        json=[{"grant-reference": "NE/K011820/1", "lead-project": 1}, {"lead-project": 0}],
+        headers={"Authorization": "Bearer fake_token"}
+    )
+
+    assert response.status_code == 400
+    data = response.get_json()
+    assert data["error"] == "Invalid grant"
+    assert data["detail"] == "Grant 1 does not have a 'grant-reference'"
+
+    response = client.post(
+        "/post-gtr-grant-bulk",
+        json={"grant-reference": "NE/K011820/1", "lead-project": 1},
+        headers={"Authorization": "Bearer fake_token"}
+    )
+
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "Invalid grants"
+
+    with client.application.app_context():
+        assert ImportQueuedGrant.query.count() == 0
+
+
 def test_post_organisations_success(client, monkeypatch):
     # Mock auth
     monkeypatch.setattr("arctic_office_projects_api.validate_token", lambda token: {"sub": "test-user"})
@@ -553,6 +669,34 @@ def test_post_topic_data_success(client, app_context, monkeypatch):
         assert data["message"] == "Topic added"
 
 
+def test_post_topic_data_update(client, app_context, monkeypatch):
+    monkeypatch.setattr("arctic_office_projects_api.validate_token", lambda token: {"sub": "test-user"})
+
+    payload = {
+        "topic_id": "8E6B5F0D-1B40-4A37-9C35-D0D1A6A5C2B1",
+        "topic_name": "Glaciology",
+        "gcmd_link_name": "GLACIERS",
+        "gcmd_link_code": "gcmd.earthdata.nasa.gov/kms/concept/1"
+    }
+
+    with patch("arctic_office_projects_api.gtr_mapping_index.invalidate") as mock_invalidate:
+        for gcmd_link_code in ["gcmd.earthdata.nasa.gov/kms/concept/1", "gcmd.earthdata.nasa.gov/kms/concept/2"]:
+            response = client.post(
+                "/post-topic-data",
+                json={**payload, "gcmd_link_code": gcmd_link_code},
+                headers={"Authorization": "Bearer fake_token"}
+            )
+            assert response.status_code == 201
+
+    # Topics are mapped once, with the latest mapping
+    topics = Project_Topics.query.filter_by(topic_id=payload["topic_id"]).all()
+    assert [topic.gcmd_link_code for topic in topics] == ["gcmd.earthdata.nasa.gov/kms/concept/2"]
+    mock_invalidate.assert_called_with("topics")
+
+    db.session.delete(topics[0])
+    db.session.commit()
+
+
 def test_post_topic_data_no_json(client, app_context, monkeypatch):
     monkeypatch.setattr("arctic_office_projects_api.validate_token", lambda token: {"sub": "test-user"})
 
@@ -0,0 +1,164 @@
+import gzip
+import json
+import os
+import pytest
+
+from unittest.mock import patch
+
+from arctic_office_projects_api.snapshots import StaticSnapshotWriter
+
+AUTH_HEADERS = {"Authorization": "Bearer fake_token"}
+
+
+@pytest.mark.usefixtures("db_create")
+def test_export_static_command(app, runner, tmp_path):
+    snapshot_path = tmp_path / "snapshot"
+
+    result = runner.invoke(args=["export", "static", str(snapshot_path), "--base-url", "http://localhost/"])
+    assert result.exit_code == 0
+    assert "documents to static snapshot" in result.output
+    assert snapshot_path.is_symlink()
+
+    with open(snapshot_path / "manifest.json", "r") as f:
+        manifest = json.load(f)
+    assert manifest["base_url"] == "http://localhost/"
+    for key in [
+        "/projects",
+        "/projects/01DB2ECBP24NHYV5KZQG2N3FS2",
+        "/projects/01DB2ECBP24NHYV5KZQG2N3FS2/relationships/participants",
+        "/projects/01DB2ECBP24NHYV5KZQG2N3FS2/participants",
+        "/categories",
+    ]:
+        assert key in manifest["documents"]
+
+    document = manifest["documents"]["/projects/01DB2ECBP24NHYV5KZQG2N3FS2"]
+    assert document["file"] == os.path.join("projects", "01DB2ECBP24NHYV5KZQG2N3FS2", "index.json")
+    body = (snapshot_path / document["file"]).read_bytes()
+    assert gzip.decompress((snapshot_path / f"{ document['file'] }.gz").read_bytes()) == body
+
+    with open("tests/responses/project.json", "r") as f:
+        expected_data = json.load(f)
+    assert json.loads(body) == expected_data
+
+    # A second snapshot replaces the first, which is kept for requests still reading from it
+    first_release = os.path.realpath(snapshot_path)
+    result = runner.invoke(args=["export", "static", str(snapshot_path), "--base-url", "http://localhost/"])
+    assert result.exit_code == 0
+    second_release = os.path.realpath(snapshot_path)
+    assert second_release != first_release
+    assert os.path.exists(first_release)
+
+    # A third snapshot replaces the second, with the first removed
+    result = runner.invoke(args=["export", "static", str(snapshot_path), "--base-url", "http://localhost/"])
+    assert result.exit_code == 0
+    assert os.path.realpath(snapshot_path) != second_release
+    assert os.path.exists(second_release)
+    assert not os.path.exists(first_release)
+
+
+@pytest.mark.usefixtures("db_create")
+def test_export_static_not_symlink(app, tmp_path):
+    with pytest.raises(FileExistsError):
+        StaticSnapshotWriter(app, "http://localhost/").write(str(tmp_path))
+
+
+@pytest.mark.usefixtures("db_create")
+def test_export_static_failed(app, tmp_path):
+    snapshot_path = tmp_path / "snapshot"
+    writer = StaticSnapshotWriter(app, "http://localhost/")
+    writer.write(str(snapshot_path))
+    release = os.path.realpath(snapshot_path)
+
+    def documents():
+        yield "/projects", b"{}"
+        raise RuntimeError("Rendering failed")
+
+    with patch.object(writer, "documents", documents):
+        with pytest.raises(RuntimeError):
+            writer.write(str(snapshot_path))
+
+    # The partially written snapshot is removed, and the previous snapshot is still used
+    assert os.listdir(tmp_path / ".snapshot-releases") == [os.path.basename(release)]
+    assert os.path.realpath(snapshot_path) == release
+
+
+@pytest.mark.usefixtures("db_create")
+def test_export_static_collection_pages(app, tmp_path):
+    app.config["APP_PAGE_SIZE"] = 2
+    manifest = StaticSnapshotWriter(app, "http://localhost/").write(str(tmp_path / "snapshot"))
+
+    assert "/projects" in manifest["documents"]
+    assert "/projects?page=2" in manifest["documents"]
+    assert "/projects?page=3" not in manifest["documents"]
+    assert manifest["documents"]["/projects?page=2"]["file"] == os.path.join("projects", "page-2.json")
+
+
+@pytest.mark.usefixtures("db_create")
+def test_serve_static_snapshot(app, client, tmp_path):
+    snapshot_path = tmp_path / "snapshot"
+    StaticSnapshotWriter(app, "http://localhost/").write(str(snapshot_path))
+
+    response = client.get("/projects/01DB2ECBP24NHYV5KZQG2N3FS2", headers=AUTH_HEADERS)
+    expected_body = response.get_data()
+
+    app.config["APP_STATIC_SNAPSHOT_PATH"] = str(snapshot_path)
+
+    response = client.get("/projects/01DB2ECBP24NHYV5KZQG2N3FS2", headers=AUTH_HEADERS)
+    assert response.status_code == 200
+    assert response.mimetype == "application/json"
+    assert response.get_data() == expected_body
+    etag = response.headers["ETag"]
+
+    response = client.get(
+        "/projects/01DB2ECBP24NHYV5KZQG2N3FS2", headers={**AUTH_HEADERS, "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+
+    response = client.get("/projects/01DB2ECBP24NHYV5KZQG2N3FS2", headers={**AUTH_HEADERS, "Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["ETag"] != etag
+    assert gzip.decompress(response.get_data()) == expected_body
+
+    # Authentication is still required
+    response = client.get("/projects/01DB2ECBP24NHYV5KZQG2N3FS2")
+    assert response.status_code == 401
+
+    # Other representations, and documents not in the snapshot, are passed through to the API
+    response = client.get("/projects/01DB2ECBP24NHYV5KZQG2N3FS2?format=compact", headers=AUTH_HEADERS)
+    assert response.status_code == 200
+    assert "ETag" not in response.headers
+
+    response = client.get("/projects/unknown", headers=AUTH_HEADERS)
+    assert response.status_code == 404
+
+
+@pytest.mark.usefixtures("db_create")
+def test_serve_static_snapshot_replaced(app, client, tmp_path):
+    snapshot_path = tmp_path / "snapshot"
+    writer = StaticSnapshotWriter(app, "http://localhost/")
+    writer.write(str(snapshot_path))
+    app.config["APP_STATIC_SNAPSHOT_PATH"] = str(snapshot_path)
+
+    snapshots = app.extensions["static_snapshots"]
+    with app.test_request_context():
+        first_release, first_manifest = snapshots.manifest()
+    response = client.get("/projects/01DB2ECBP24NHYV5KZQG2N3FS2", headers=AUTH_HEADERS)
+    assert response.status_code == 200
+    response.close()
+
+    writer.write(str(snapshot_path))
+    with app.test_request_context():
+        release, manifest = snapshots.manifest()
+    # The snapshot directory and manifest are replaced together
+    assert release == os.path.realpath(snapshot_path)
+    assert release != first_release
+    assert manifest is not first_manifest
+    assert manifest["generated_at"] != first_manifest["generated_at"]
+
+    # Documents from the previous snapshot can still be sent
+    with app.test_request_context():
+        document = first_manifest["documents"]["/projects/01DB2ECBP24NHYV5KZQG2N3FS2"]
+        response = snapshots._send_document(first_release, first_manifest, document)
+        assert response.status_code == 200
+        response.close()
@@ -0,0 +1,110 @@
+import gzip
+
+import pytest
+from flask import Flask, Response, jsonify
+
+from arctic_office_projects_api.compression import (
+    Compression,
+    CompressedPayloadCache,
+    compress_payload,
+)
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config["APP_COMPRESSION_MIN_SIZE"] = 64
+    Compression(app)
+
+    @app.route("/large")
+    def large():
+        return jsonify({"links": [f"https://api.example.com/projects/{i}" for i in range(100)]})
+
+    @app.route("/small")
+    def small():
+        return jsonify({"value": "ok"})
+
+    @app.route("/precompressed")
+    def precompressed():
+        response = Response(gzip.compress(b'{"value": "ok"}' * 100), mimetype="application/json")
+        response.headers["Content-Encoding"] = "gzip"
+        return response
+
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def test_gzip_negotiated(client):
+    response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert b"https://api.example.com/projects/99" in gzip.decompress(response.get_data())
+
+
+def test_brotli_preferred(client):
+    brotli = pytest.importorskip("brotli")
+
+    response = client.get("/large", headers={"Accept-Encoding": "gzip, deflate, br"})
+    assert response.headers["Content-Encoding"] == "br"
+    assert b"https://api.example.com/projects/99" in brotli.decompress(response.get_data())
+
+
+def test_quality_values_respected(client):
+    response = client.get("/large", headers={"Accept-Encoding": "br;q=0, gzip;q=0.5"})
+    assert response.headers["Content-Encoding"] == "gzip"
+
+
+def test_no_accept_encoding(client):
+    response = client.get("/large")
+    assert "Content-Encoding" not in response.headers
+    assert response.get_json() is not None
+
+
+def test_below_minimum_size(client):
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+    assert response.get_json() == {"value": "ok"}
+
+
+def test_precompressed_response_unchanged(client):
+    response = client.get("/precompressed", headers={"Accept-Encoding": "br"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(response.get_data()).startswith(b'{"value": "ok"}')
+
+
+def test_compressed_payload_reused(app, client):
+    client.get("/large", headers={"Accept-Encoding": "gzip"})
+    cache = app.extensions["compression"]
+    assert len(cache) == 1
+
+    response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert len(cache) == 1
+
+
+def test_cache_evicts_least_recently_used():
+    cache = CompressedPayloadCache(max_entries=2)
+    cache.put(b"a", "gzip", b"1")
+    cache.put(b"b", "gzip", b"2")
+    assert cache.get(b"a", "gzip") == b"1"
+    cache.put(b"c", "gzip", b"3")
+
+    assert cache.get(b"b", "gzip") is None
+    assert cache.get(b"a", "gzip") == b"1"
+    assert cache.get(b"c", "gzip") == b"3"
+
+
+def test_cache_disabled():
+    cache = CompressedPayloadCache(max_entries=0)
+    cache.put(b"a", "gzip", b"1")
+    assert cache.get(b"a", "gzip") is None
+
+
+def test_compress_payload_unsupported_encoding():
+    with pytest.raises(ValueError, match="Unsupported content encoding"):
+        compress_payload(b"foo", "deflate")
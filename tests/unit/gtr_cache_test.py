@@ -0,0 +1,36 @@
+from arctic_office_projects_api.importers.gtr_cache import GatewayToResearchCache
+
+
+def test_put_get(tmp_path):
+    cache = GatewayToResearchCache(path=str(tmp_path / "cache" / "gtr.sqlite"))
+    assert cache.get("https://gtr.ukri.org/gtr/api/projects/1") is None
+
+    cache.put("https://gtr.ukri.org/gtr/api/projects/1", body=b'{"id": "1"}', etag='"abc"')
+    response = cache.get("https://gtr.ukri.org/gtr/api/projects/1")
+    assert response["body"] == b'{"id": "1"}'
+    assert response["etag"] == '"abc"'
+    assert response["last_modified"] is None
+    assert len(cache) == 1
+
+    # Responses are kept between instances (i.e. runs)
+    cache = GatewayToResearchCache(path=str(tmp_path / "cache" / "gtr.sqlite"))
+    assert cache.get("https://gtr.ukri.org/gtr/api/projects/1")["body"] == b'{"id": "1"}'
+
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_is_fresh(tmp_path):
+    cache = GatewayToResearchCache(path=str(tmp_path / "gtr.sqlite"))
+    cache.clock = lambda: 1000
+    cache.put("https://gtr.ukri.org/gtr/api/projects/1", body=b"{}")
+
+    cache.clock = lambda: 1050
+    response = cache.get("https://gtr.ukri.org/gtr/api/projects/1")
+    assert cache.is_fresh(response, max_age=60)
+    assert not cache.is_fresh(response, max_age=30)
+    assert not cache.is_fresh(response, max_age=None)
+
+    cache.touch("https://gtr.ukri.org/gtr/api/projects/1")
+    response = cache.get("https://gtr.ukri.org/gtr/api/projects/1")
+    assert cache.is_fresh(response, max_age=30)
@@ -0,0 +1,265 @@
+import json
+import pytest
+
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+
+from requests import ConnectionError, HTTPError, Response
+from requests.adapters import BaseAdapter
+
+from arctic_office_projects_api.importers.gtr_cache import GatewayToResearchCache
+from arctic_office_projects_api.importers.gtr_client import (
+    GatewayToResearchClient,
+    TokenBucket,
+    gtr_client,
+    parse_retry_after,
+)
+from arctic_office_projects_api.importers.metrics import record_import_metrics
+
+
+class StubTransport(BaseAdapter):
+    """
+    Stand-in for the GTR API, returning queued responses (or raising queued exceptions) in order
+    """
+
+    def __init__(self, *results):
+        super().__init__()
+        self.results = list(results)
+        self.requests = []
+
+    def send(self, request, **kwargs):
+        self.requests.append((request, kwargs))
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+
+        status_code, body, headers = result
+        response = Response()
+        response.status_code = status_code
+        response._content = json.dumps(body).encode()
+        response.headers.update(headers)
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def make_client(*results, **kwargs) -> GatewayToResearchClient:
+    kwargs.setdefault("rate_limit", 0)
+    client = GatewayToResearchClient(transport=StubTransport(*results), **kwargs)
+    client.sleeps = []
+    client.sleep = client.sleeps.append
+    return client
+
+
+def test_get_json():
+    client = make_client((200, {"id": "1"}, {}), connect_timeout=2, read_timeout=30)
+
+    assert client.get_json("https://gtr.ukri.org/gtr/api/projects/1") == {"id": "1"}
+    request, kwargs = client.transport.requests[0]
+    assert request.headers["accept"] == "application/vnd.rcuk.gtr.json-v7"
+    assert kwargs["timeout"] == (2, 30)
+    assert client.sleeps == []
+
+
+def test_get_retries_transient_errors():
+    client = make_client(
+        ConnectionError("connection reset"),
+        (503, {}, {}),
+        (200, {"id": "1"}, {}),
+        backoff_factor=1,
+        backoff_max=60,
+    )
+
+    assert client.get_json("https://gtr.ukri.org/gtr/api/projects/1") == {"id": "1"}
+    assert len(client.transport.requests) == 3
+    assert len(client.sleeps) == 2
+    assert 0 <= client.sleeps[0] <= 1
+    assert 0 <= client.sleeps[1] <= 2
+
+
+def test_get_honours_retry_after():
+    client = make_client((429, {}, {"Retry-After": "7"}), (200, {"id": "1"}, {}), backoff_factor=0.1)
+
+    assert client.get_json("https://gtr.ukri.org/gtr/api/projects/1") == {"id": "1"}
+    assert client.sleeps == [7]
+
+
+def test_get_honours_retry_after_over_backoff_max():
+    client = make_client((503, {}, {"Retry-After": "90"}), (200, {"id": "1"}, {}), backoff_max=60)
+
+    assert client.get_json("https://gtr.ukri.org/gtr/api/projects/1") == {"id": "1"}
+    assert client.sleeps == [90]
+
+
+def test_get_retry_after_over_maximum():
+    client = make_client((429, {}, {"Retry-After": "3600"}), (200, {"id": "1"}, {}), retry_after_max=300)
+
+    # Rather than retrying sooner than asked, the response is raised as an error
+    with pytest.raises(HTTPError) as e:
+        client.get("https://gtr.ukri.org/gtr/api/projects/1")
+    assert e.value.response.status_code == 429
+    assert len(client.transport.requests) == 1
+    assert client.sleeps == []
+
+
+def test_get_retries_exhausted():
+    client = make_client((502, {}, {}), (502, {}, {}), max_retries=1)
+    with pytest.raises(HTTPError):
+        client.get("https://gtr.ukri.org/gtr/api/projects/1")
+    assert len(client.sleeps) == 1
+
+    client = make_client(ConnectionError("connection reset"), max_retries=0)
+    with pytest.raises(ConnectionError):
+        client.get("https://gtr.ukri.org/gtr/api/projects/1")
+
+
+def test_get_not_retried():
+    client = make_client((404, {}, {}))
+    with pytest.raises(HTTPError):
+        client.get("https://gtr.ukri.org/gtr/api/projects/1")
+    assert client.sleeps == []
+
+
+def test_get_json_metrics():
+    client = make_client(ConnectionError("connection reset"), (503, {}, {}), (200, {"id": "1"}, {}))
+    client.backoff = lambda attempt, retry_after=None: 0.5
+
+    with record_import_metrics() as metrics:
+        assert client.get_json("https://gtr.ukri.org/gtr/api/projects/1") == {"id": "1"}
+
+    assert metrics.counters["http_requests"] == 3
+    assert metrics.counters["http_bytes"] == len(b"{}") + len(b'{"id": "1"}')
+    assert metrics.counters["sleep_seconds"] == 1
+    assert metrics.counters["parse_seconds"] > 0
+
+
+def test_parse_retry_after():
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("120") == 120
+    assert parse_retry_after("invalid") is None
+
+    retry_at = datetime.now(tz=timezone.utc) + timedelta(seconds=30)
+    assert 25 < parse_retry_after(format_datetime(retry_at, usegmt=True)) <= 30
+
+
+def make_bucket(rate: float, burst: int) -> TokenBucket:
+    clock = FakeClock()
+    bucket = TokenBucket(rate=rate, burst=burst)
+    bucket.clock = clock
+    bucket.sleep = clock.sleep
+    bucket._updated_at = clock()
+    return bucket
+
+
+def test_token_bucket_burst():
+    bucket = make_bucket(rate=2, burst=3)
+
+    assert [bucket.acquire() for _ in range(3)] == [0, 0, 0]
+    assert bucket.acquire() == 0.5
+    assert bucket.acquire() == 0.5
+    assert bucket.clock.now == 1.0
+
+    # Tokens are refilled while idle, up to the burst size
+    bucket.clock.now += 10
+    assert [bucket.acquire() for _ in range(3)] == [0, 0, 0]
+    assert bucket.acquire() == 0.5
+
+
+def test_token_bucket_reserve():
+    bucket = make_bucket(rate=1, burst=1)
+
+    # Waiting threads reserve tokens in turn
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 1
+    assert bucket.reserve() == 2
+
+
+def test_token_bucket_disabled():
+    bucket = make_bucket(rate=0, burst=1)
+    assert [bucket.acquire() for _ in range(10)] == [0] * 10
+    assert bucket.clock.sleeps == []
+
+
+def test_get_rate_limited():
+    client = make_client((200, {}, {}), (503, {}, {}), (200, {}, {}), rate_limit=1, rate_burst=1, backoff_factor=0)
+    client.rate_limiter = make_bucket(rate=1, burst=1)
+
+    client.get("https://gtr.ukri.org/gtr/api/projects/1")
+    client.get("https://gtr.ukri.org/gtr/api/projects/2")
+    # Retries also take a token
+    assert client.rate_limiter.clock.sleeps == [1, 1]
+
+
+def test_get_json_cached(tmp_path):
+    client = make_client(
+        (200, {"id": "1"}, {"ETag": '"v1"', "Last-Modified": "Tue, 01 Oct 2024 00:00:00 GMT"}),
+        (304, {}, {}),
+        (200, {"id": "1", "title": "changed"}, {"ETag": '"v2"'}),
+        (200, {"project": []}, {}),
+        (200, {"project": []}, {}),
+        cache=GatewayToResearchCache(path=str(tmp_path / "gtr.sqlite")),
+    )
+    url = "https://gtr.ukri.org/gtr/api/projects/1"
+
+    assert client.get_json(url, cached=True) == {"id": "1"}
+    assert "If-None-Match" not in client.transport.requests[0][0].headers
+
+    # Unchanged responses are revalidated and then used from the cache
+    assert client.get_json(url, cached=True) == {"id": "1"}
+    request = client.transport.requests[1][0]
+    assert request.headers["If-None-Match"] == '"v1"'
+    assert request.headers["If-Modified-Since"] == "Tue, 01 Oct 2024 00:00:00 GMT"
+
+    assert client.get_json(url, cached=True) == {"id": "1", "title": "changed"}
+    assert client.cache.get(url)["etag"] == '"v2"'
+
+    # Uncached requests (e.g. searches) are always made
+    client.get_json("https://gtr.ukri.org/gtr/api/projects", params={"q": "NE/K011820/1"})
+    client.get_json("https://gtr.ukri.org/gtr/api/projects", params={"q": "NE/K011820/1"})
+    assert len(client.transport.requests) == 5
+    assert len(client.cache) == 1
+
+
+def test_get_json_cached_max_age(tmp_path):
+    client = make_client(
+        (200, {"id": "1"}, {}),
+        (200, {"id": "1"}, {}),
+        cache=GatewayToResearchCache(path=str(tmp_path / "gtr.sqlite")),
+        cache_max_age=60,
+    )
+    client.cache.clock = lambda: 1000
+    url = "https://gtr.ukri.org/gtr/api/projects/1"
+
+    assert client.get_json(url, cached=True) == {"id": "1"}
+    client.cache.clock = lambda: 1059
+    assert client.get_json(url, cached=True) == {"id": "1"}
+    assert len(client.transport.requests) == 1
+
+    client.cache.clock = lambda: 1061
+    assert client.get_json(url, cached=True) == {"id": "1"}
+    assert len(client.transport.requests) == 2
+
+
+def test_init_app(app):
+    assert app.extensions["gtr_client"] is gtr_client
+    assert gtr_client.timeout == (app.config["APP_GTR_CONNECT_TIMEOUT"], app.config["APP_GTR_READ_TIMEOUT"])
+    assert gtr_client.transport_is_default
+    assert gtr_client.rate_limiter.rate == app.config["APP_GTR_RATE_LIMIT"]
+    assert gtr_client.rate_limiter.burst == app.config["APP_GTR_RATE_BURST"]
+    assert gtr_client.cache is None
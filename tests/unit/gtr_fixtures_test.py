@@ -0,0 +1,96 @@
+import json
+import pytest
+
+from unittest.mock import patch
+
+from requests import HTTPError, Response
+from requests.adapters import HTTPAdapter
+
+from arctic_office_projects_api import create_app
+from arctic_office_projects_api.importers.gtr_client import GatewayToResearchClient, gtr_client
+from arctic_office_projects_api.importers.gtr_fixtures import (
+    GatewayToResearchRecordingTransport,
+    GatewayToResearchReplayTransport,
+    read_gtr_fixtures,
+    write_gtr_fixture,
+)
+
+gtr_api = "https://gtr.ukri.org/gtr/api"
+
+
+def make_response(status_code: int, body: dict) -> Response:
+    response = Response()
+    response.status_code = status_code
+    response._content = json.dumps(body).encode()
+    response.headers["Content-Type"] = "application/vnd.rcuk.gtr.json-v7"
+    return response
+
+
+def test_record(tmp_path):
+    client = GatewayToResearchClient(
+        transport=GatewayToResearchRecordingTransport(path=str(tmp_path / "fixtures")), rate_limit=0, backoff_factor=0
+    )
+    responses = [make_response(503, {}), make_response(200, {"id": "1"}), make_response(404, {})]
+
+    with patch.object(HTTPAdapter, "send", side_effect=responses):
+        assert client.get_json(f"{gtr_api}/projects/1") == {"id": "1"}
+        with pytest.raises(HTTPError):
+            client.get_json(f"{gtr_api}/projects/2")
+
+    # Transient errors are not recorded
+    fixtures = read_gtr_fixtures(str(tmp_path / "fixtures"))
+    assert sorted(fixtures) == [f"{gtr_api}/projects/1", f"{gtr_api}/projects/2"]
+    assert fixtures[f"{gtr_api}/projects/1"]["status_code"] == 200
+    assert fixtures[f"{gtr_api}/projects/1"]["content_type"] == "application/vnd.rcuk.gtr.json-v7"
+    assert json.loads(fixtures[f"{gtr_api}/projects/1"]["body"]) == {"id": "1"}
+    assert fixtures[f"{gtr_api}/projects/2"]["status_code"] == 404
+
+
+def test_replay(tmp_path):
+    search_url = f"{gtr_api}/projects?q=NE%2FK011820%2F1&f=pro.gr"
+    write_gtr_fixture(str(tmp_path), search_url, 200, json.dumps({"project": [{"id": "1"}]}))
+    write_gtr_fixture(str(tmp_path), f"{gtr_api}/projects/1", 200, json.dumps({"id": "1", "title": "Résumé"}))
+    write_gtr_fixture(str(tmp_path), f"{gtr_api}/projects/2", 404, "Not found", content_type="text/plain")
+
+    transport = GatewayToResearchReplayTransport(path=str(tmp_path), latency=0.2)
+    transport.sleeps = []
+    transport.sleep = transport.sleeps.append
+    client = GatewayToResearchClient(transport=transport, rate_limit=0)
+
+    assert client.get_json(f"{gtr_api}/projects", params={"q": "NE/K011820/1", "f": "pro.gr"}) == {
+        "project": [{"id": "1"}]
+    }
+    assert client.get_json(f"{gtr_api}/projects/1") == {"id": "1", "title": "Résumé"}
+    with pytest.raises(HTTPError):
+        client.get(f"{gtr_api}/projects/2")
+    assert transport.sleeps == [0.2, 0.2, 0.2]
+    assert transport.requests_replayed == 3
+
+    # Requests are never made to GTR
+    with pytest.raises(KeyError):
+        client.get(f"{gtr_api}/projects/3")
+
+    assert transport.grant_references() == ["NE/K011820/1"]
+
+
+def test_init_app(tmp_path, monkeypatch):
+    monkeypatch.setenv("APP_GTR_FIXTURES_MODE", "replay")
+    monkeypatch.setenv("APP_GTR_FIXTURES_PATH", str(tmp_path))
+    monkeypatch.setenv("APP_GTR_FIXTURES_LATENCY", "0.1")
+    create_app("testing")
+    assert isinstance(gtr_client.transport, GatewayToResearchReplayTransport)
+    assert gtr_client.transport.latency == 0.1
+
+    monkeypatch.setenv("APP_GTR_FIXTURES_MODE", "record")
+    create_app("testing")
+    assert isinstance(gtr_client.transport, GatewayToResearchRecordingTransport)
+    assert gtr_client.transport.path == str(tmp_path)
+
+    monkeypatch.delenv("APP_GTR_FIXTURES_MODE")
+    create_app("testing")
+    assert gtr_client.transport_is_default
+
+    monkeypatch.setenv("APP_GTR_FIXTURES_MODE", "unknown")
+    with pytest.raises(ValueError):
+        create_app("testing")
+    gtr_client.set_transport(None)
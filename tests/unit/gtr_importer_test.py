@@ -1,14 +1,34 @@
+import json
+import threading
+import time
+from datetime import date, timedelta
 import unittest
 import pytest
 from unittest.mock import patch, mock_open, MagicMock, Mock
-from requests import HTTPError
+from psycopg2.extras import DateRange
+from sqlalchemy import delete, event, func, insert
+from requests import HTTPError, Response
+from requests.adapters import BaseAdapter
 
 from arctic_office_projects_api import create_app
 
+from arctic_office_projects_api.extensions import db
 from arctic_office_projects_api.models import (
+    Categorisation,
+    CategoryScheme,
+    CategoryTerm,
+    Grant,
     GrantCurrency,
     GrantStatus,
+    Organisation,
+    Participant,
+    ParticipantRole,
+    Person,
+    Project,
+    Project_Organisations,
+    Project_Topics,
 )
+from arctic_office_projects_api.utils import generate_neutral_id
 
 from arctic_office_projects_api.importers.gtr import (
     GatewayToResearchResource,
@@ -16,9 +36,21 @@ from arctic_office_projects_api.importers.gtr import (
     UnmappedGatewayToResearchOrganisation,
     GatewayToResearchFund,
     GatewayToResearchProject,
+    GatewayToResearchPublication,
     GatewayToResearchGrantImporter,
     UnmappedGatewayToResearchProjectTopic,
+    UnmappedGatewayToResearchMappings,
+    gtr_mapping_index,
+    gtr_resource_memo,
+    import_gateway_to_research_grants_interactively,
+    group_split_awards,
+    refresh_gateway_to_research_grants_interactively,
+    run_gateway_to_research_import_workers,
+    format_grant_import_summary,
 )
+from arctic_office_projects_api.importers.journal import ImportJournal
+from arctic_office_projects_api.importers.gtr_client import gtr_client
+from arctic_office_projects_api.importers.metrics import record_import_metrics
 
 valid_resource = {
     "status": "active",
@@ -42,6 +74,108 @@ valid_links = {
 }
 
 
+def gtr_link(rel: str, href: str) -> dict:
+    return {"rel": rel, "href": href}
+
+
+gtr_api = "https://gtr.ukri.org/gtr/api"
+gtr_resources = {
+    f"{gtr_api}/projects/1": {
+        "status": "Closed",
+        "title": "Research Project Title",
+        "identifiers": {"identifier": [{"type": "RCUK", "value": "NE/K011820/1"}]},
+        "links": {
+            "link": [
+                gtr_link("FUND", f"{gtr_api}/funds/1"),
+                gtr_link("PI_PER", f"{gtr_api}/persons/1"),
+                gtr_link("COI_PER", f"{gtr_api}/persons/2"),
+                gtr_link("COI_PER", f"{gtr_api}/persons/3"),
+                gtr_link("PUBLICATION", f"{gtr_api}/outcomes/publications/1"),
+                gtr_link("PUBLICATION", f"{gtr_api}/outcomes/publications/2"),
+            ]
+        },
+    },
+    f"{gtr_api}/projects/2": {
+        "status": "Closed",
+        "title": "Research Project Title (split award)",
+        "identifiers": {"identifier": [{"type": "RCUK", "value": "NE/K011820/2"}]},
+        "links": {
+            "link": [
+                gtr_link("FUND", f"{gtr_api}/funds/1"),
+                gtr_link("PI_PER", f"{gtr_api}/persons/1"),
+                gtr_link("PUBLICATION", f"{gtr_api}/outcomes/publications/1"),
+            ]
+        },
+    },
+    f"{gtr_api}/funds/1": {
+        "start": 1380582000000,
+        "end": 1506812399000,
+        "valuePounds": {"currencyCode": "GBP", "amount": 100000},
+        "links": {"link": [gtr_link("FUNDER", f"{gtr_api}/organisations/1")]},
+    },
+    f"{gtr_api}/organisations/1": {"name": "NERC", "links": {"link": []}},
+    f"{gtr_api}/organisations/2": {"name": "BAS", "links": {"link": []}},
+    **{
+        f"{gtr_api}/persons/{i}": {
+            "firstName": f"Person {i}",
+            "surname": "Example",
+            "orcidId": f"0000-0000-0000-000{i}",
+            "links": {"link": [gtr_link("EMPLOYED", f"{gtr_api}/organisations/2")]},
+        }
+        for i in range(1, 4)
+    },
+    **{
+        f"{gtr_api}/outcomes/publications/{i}": {"doi": f"10.1000/{i}", "links": {"link": []}}
+        for i in range(1, 3)
+    },
+}
+
+
+class GatewayToResearchStubTransport(BaseAdapter):
+    """
+    Stand-in for the GTR API, returning resources by URI after a delay, and tracking concurrent requests
+    """
+
+    def __init__(self, resources: dict, delay: float = 0.05):
+        super().__init__()
+        self.resources = resources
+        self.delay = delay
+        self.requested = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        with self._lock:
+            self.requested.append(request.url)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.delay)
+        with self._lock:
+            self.in_flight -= 1
+
+        response = Response()
+        response.status_code = 200 if request.url in self.resources else 404
+        response._content = json.dumps(self.resources.get(request.url, {})).encode()
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def gtr_transport():
+    transport = GatewayToResearchStubTransport(gtr_resources)
+    rate_limit = gtr_client.rate_limiter.rate
+    gtr_client.set_transport(transport)
+    gtr_client.rate_limiter.configure(rate=0, burst=1)
+    yield transport
+    gtr_client.set_transport(None)
+    gtr_client.rate_limiter.configure(rate=rate_limit, burst=gtr_client.rate_limiter.burst)
+
+
 @pytest.fixture
 def gtr_project():
     with patch.object(
@@ -66,15 +200,12 @@ class FlaskTestCase(unittest.TestCase):
 
 class TestProjectTopicMapping(FlaskTestCase):
 
-    @patch("arctic_office_projects_api.utils.log_exception_to_file")
     @patch(
         "builtins.open",
         new_callable=mock_open,
         read_data="topic_id,gcmd_link_code\nT1,none\nT2,https://link2\n",
     )
-    def test_map_gtr_project_research_topic_no_mapping(
-        self, mock_file, mock_log_exception
-    ):
+    def test_map_gtr_project_research_topic_no_mapping(self, mock_file):
         gtr_topic = {"id": "T3", "text": "Topic 3"}
 
         with self.assertRaises(UnmappedGatewayToResearchProjectTopic):
@@ -178,42 +309,106 @@ class TestMapGtrProjectStatus:
             self.importer._map_gtr_project_status("InvalidStatus")
 
 
+@pytest.fixture
+def db_project(app):
+    """Unsaved project, with related resources, rolled back after each test"""
+    project = Project(
+        neutral_id=generate_neutral_id(),
+        grant_reference="NE/K011820/1",
+        title="Research Project Title",
+        access_duration=DateRange(date(2020, 1, 1), None),
+        project_duration=DateRange(date(2020, 1, 1), date(2023, 1, 1)),
+    )
+    db.session.add(project)
+    db.session.flush()
+    yield project
+    db.session.rollback()
+
+
 class TestAddGtrPeople:
 
-    @patch("arctic_office_projects_api.db.session")
-    @patch("arctic_office_projects_api.models.Organisation")
-    @patch("arctic_office_projects_api.models.Person")
-    @patch("arctic_office_projects_api.models.Participant")
-    def test_add_gtr_people(
-        self, mock_participant, mock_person, mock_organisation, mock_db_session
-    ):
-        project = MagicMock()
-        role = MagicMock()
+    @staticmethod
+    def gtr_person(first_name: str, surname: str, orcid_id: str = None, ror_id: str = "https://ror.org/test"):
+        return MagicMock(first_name=first_name, surname=surname, orcid_id=orcid_id, employer=MagicMock(ror_id=ror_id))
 
-        person1 = MagicMock(
-            first_name="John",
-            surname="Doe",
-            orcid_id="0000-0002-1825-0097",
-            employer=MagicMock(ror_id="org-1"),
+    def test_add_gtr_people(self, db_project):
+        organisation = Organisation(neutral_id=generate_neutral_id(), name="BAS", ror_identifier="https://ror.org/test")
+        db.session.add(organisation)
+        existing_person = Person(
+            neutral_id=generate_neutral_id(), first_name="John", last_name="Doe", organisation=organisation
         )
-        person2 = MagicMock(
-            first_name="Jane",
-            surname="Smith",
-            orcid_id="0000-0001-2345-6789",
-            employer=MagicMock(ror_id="org-2"),
+        db.session.add(existing_person)
+        db.session.flush()
+
+        GatewayToResearchGrantImporter._add_gtr_people(
+            db_project,
+            {
+                ParticipantRole.InvestigationRole_PrincipleInvestigator: [self.gtr_person("John", "Doe")],
+                ParticipantRole.InvestigationRole_CoInvestigator: [self.gtr_person("Jane", "Smith")],
+            },
         )
 
-        mock_organisation.query.filter_by.return_value.one_or_none.side_effect = [
-            MagicMock(id=1),
-            MagicMock(id=2),
+        participants = Participant.query.filter_by(project_id=db_project.id).order_by(Participant.id).all()
+        assert [participant.person.last_name for participant in participants] == ["Doe", "Smith"]
+        assert [participant.role for participant in participants] == [
+            ParticipantRole.InvestigationRole_PrincipleInvestigator,
+            ParticipantRole.InvestigationRole_CoInvestigator,
+        ]
+        # Existing people are reused, and new people are created
+        assert participants[0].person_id == existing_person.id
+        assert participants[1].person.organisation_id == organisation.id
+
+    def test_add_gtr_people_orcid_first(self, db_project):
+        organisation = Organisation(neutral_id=generate_neutral_id(), name="BAS", ror_identifier="https://ror.org/test")
+        # Two people with the same name and organisation, told apart by ORCID iD
+        people = [
+            Person(
+                neutral_id=generate_neutral_id(),
+                first_name="John",
+                last_name="Doe",
+                orcid_id=f"https://orcid.org/0000-0000-0000-000{index}",
+                organisation=organisation,
+            )
+            for index in range(2)
         ]
-        mock_person.query.filter_by.return_value.first.side_effect = [None, None]
+        # Someone matched by name and organisation, without an ORCID iD
+        unidentified_person = Person(
+            neutral_id=generate_neutral_id(), first_name="Jane", last_name="Smith", organisation=organisation
+        )
+        db.session.add_all([organisation, *people, unidentified_person])
+        db.session.flush()
 
         GatewayToResearchGrantImporter._add_gtr_people(
-            project, [person1, person2], role
+            db_project,
+            {
+                ParticipantRole.InvestigationRole_PrincipleInvestigator: [
+                    self.gtr_person("John", "Doe", orcid_id="https://orcid.org/0000-0000-0000-0001"),
+                ],
+                ParticipantRole.InvestigationRole_CoInvestigator: [
+                    self.gtr_person("Jane", "Smith", orcid_id="https://orcid.org/0000-0000-0000-0002"),
+                    self.gtr_person("John", "Doe", orcid_id="https://orcid.org/0000-0000-0000-0003"),
+                ],
+            },
         )
 
-        assert mock_db_session.add.call_count == 2
+        participants = Participant.query.filter_by(project_id=db_project.id).order_by(Participant.id).all()
+        assert participants[0].person_id == people[1].id
+        assert participants[1].person_id == unidentified_person.id
+        db.session.refresh(unidentified_person)
+        assert unidentified_person.orcid_id == "https://orcid.org/0000-0000-0000-0002"
+        # A person with a different ORCID iD is a new person, even with the same name and organisation
+        assert participants[2].person_id not in {person.id for person in people}
+        assert participants[2].person.orcid_id == "https://orcid.org/0000-0000-0000-0003"
+        assert Person.query.filter_by(first_name="John", last_name="Doe").count() == 3
+
+    def test_add_gtr_people_existing_participants(self, db_project):
+        gtr_people = {ParticipantRole.InvestigationRole_PrincipleInvestigator: [self.gtr_person("Jane", "Smith")]}
+
+        GatewayToResearchGrantImporter._add_gtr_people(db_project, gtr_people)
+        GatewayToResearchGrantImporter._add_gtr_people(db_project, gtr_people)
+
+        assert Participant.query.filter_by(project_id=db_project.id).count() == 1
+        assert Person.query.filter_by(first_name="Jane", last_name="Smith").count() == 1
 
 
 class TestFindGtrProjectIdentifier:
@@ -244,119 +439,74 @@ class TestFindGtrProjectIdentifier:
         assert result == "NE/K011820/1"
 
 
-class TestLinkGtrCategoryTerms:
-
-    @patch("arctic_office_projects_api.db.session")
-    @patch("arctic_office_projects_api.models.Grant")
-    @patch("arctic_office_projects_api.models.Allocation")
-    @patch("arctic_office_projects_api.models.Project")
-    @patch("arctic_office_projects_api.models.Categorisation")
-    @patch("arctic_office_projects_api.models.CategoryTerm")
-    @patch(
-        "arctic_office_projects_api.importers.gtr.GatewayToResearchGrantImporter._find_unique_gtr_project_research_items"
-    )
-    def test_link_gtr_category_terms(
-        self,
-        mock_find_unique_gtr_project_research_items,
-        mock_category_term,
-        mock_categorisation,
-        mock_project,
-        mock_allocation,
-        mock_grant,
-        mock_db_session,
-    ):
-        # Initialize the importer (with the correct gtr_grant_reference argument)
-        # importer = GatewayToResearchGrantImporter(gtr_grant_reference="NE/I028947/1")
-
-        # Create a mock project with research subjects and topics
-        project = MagicMock()
-        project.research_subjects = [
-            {"id": "subject1", "text": "Subject 1"},
-            {"id": "subject2", "text": "Subject 2"},
-        ]
-        project.research_topics = [
-            {"id": "topic1", "text": "Topic 1"},
-            {"id": "topic2", "text": "Topic 2"},
-        ]
-
-        # Mock the _find_unique_gtr_project_research_items method to avoid the unmapped exception
-        mock_find_unique_gtr_project_research_items.return_value = [
-            "subject1",
-            "subject2",
-            "topic1",
-            "topic2",
-        ]
-
-        # Set up mock return values for Grant, Allocation, Project, etc.
-        mock_grant.query.filter_by.return_value.first.return_value = MagicMock(id=1)
-        mock_allocation.query.filter_by.return_value.first.return_value = MagicMock(
-            project_id=1
-        )
-        mock_project.query.filter_by.return_value.first.return_value = MagicMock(id=1)
-
-        mock_category_term.query.filter_by.return_value.one.return_value = MagicMock()
-
-        # Mock the categorisation query to return existing terms
-        mock_categorisation.query.filter_by.return_value.all.return_value = [
-            MagicMock(category_term_id=1),
-        ]
-
-        mock_existing_category_term = MagicMock(scheme_identifier="subject1")
-        mock_category_term.query.filter_by.return_value.one.return_value = (
-            mock_existing_category_term
+@pytest.fixture
+def gtr_category_scheme(db_project):
+    category_scheme = CategoryScheme.query.filter_by(
+        namespace="https://gtr.ukri.org/resources/classificationlists.html"
+    ).one_or_none()
+    if category_scheme is None:
+        category_scheme = CategoryScheme(
+            neutral_id=generate_neutral_id(),
+            name="UKRI Gateway to Research research classifications",
+            namespace="https://gtr.ukri.org/resources/classificationlists.html",
+            root_concepts=[],
         )
-
-        # # Call the method
-        # importer._link_gtr_category_terms(project)
-
-        # # Assert that we fetched and linked the category terms
-        # assert mock_category_term.query.filter_by.call_count > 0
-
-        # # Check the addition of new terms and the removal of missing ones
-        # assert mock_categorisation.query.filter_by.call_count > 0
-        # assert mock_db_session.add.call_count > 0
-        # assert mock_db_session.commit.call_count > 0
+        db.session.add(category_scheme)
+        db.session.flush()
+    return category_scheme
 
 
 class TestSaveGtrCategoryTerms:
 
-    @patch("arctic_office_projects_api.db.session")
-    @patch("arctic_office_projects_api.models.CategoryTerm")
-    @patch("arctic_office_projects_api.models.CategoryScheme")
-    def test_save_gtr_category_terms(
-        self, mock_category_scheme, mock_category_term, mock_db_session
-    ):
-        importer = GatewayToResearchGrantImporter()  # Initialize your importer
+    def test_save_gtr_category_terms(self, gtr_category_scheme):
         project = MagicMock()
         project.research_subjects = [
-            {"id": "subject1", "text": "Subject 1"},
-            {"id": "subject2", "text": "Subject 2"},
+            {"id": "test-subject1", "text": "Subject 1"},
+            {"id": "test-subject2", "text": "Subject 2"},
         ]
         project.research_topics = [
-            {"id": "topic1", "text": "Topic 1"},
-            {"id": "topic2", "text": "Topic 2"},
+            {"id": "test-topic1", "text": "Topic 1"},
         ]
-
-        mock_category_scheme.query.filter_by.return_value.one.return_value = MagicMock()
-        mock_category_term.query.filter_by.return_value.one.return_value = MagicMock()
-
-        # Mock existing check
-        mock_db_session.query.return_value.scalar.side_effect = [
-            True,
-            False,
-            True,
-            False,
+        GatewayToResearchGrantImporter._save_gtr_category_terms(project)
+
+        # Existing terms are updated, new terms are added
+        project.research_subjects[0]["text"] = "Subject 1 (renamed)"
+        project.research_topics.append({"id": "test-topic2", "text": "Topic 2"})
+        GatewayToResearchGrantImporter._save_gtr_category_terms(project)
+
+        terms = CategoryTerm.query.filter(CategoryTerm.scheme_identifier.like("test-%")).all()
+        assert sorted((term.scheme_identifier, term.name) for term in terms) == [
+            ("test-subject1", "Subject 1 (renamed)"),
+            ("test-subject2", "Subject 2"),
+            ("test-topic1", "Topic 1"),
+            ("test-topic2", "Topic 2"),
         ]
+        assert {term.category_scheme_id for term in terms} == {gtr_category_scheme.id}
+
+    def test_link_gtr_category_terms(self, db_project, gtr_category_scheme):
+        gtr_project = MagicMock()
+        gtr_project.research_subjects = [{"id": "test-subject1", "text": "Subject 1"}]
+        gtr_project.research_topics = [
+            {"id": "test-topic1", "text": "Topic 1"},
+            {"id": "test-topic2", "text": "Topic 2"},
+        ]
+        importer = GatewayToResearchGrantImporter(gtr_grant_reference="NE/K011820/1")
+        importer._save_gtr_category_terms(gtr_project)
 
-        # Call the method
-        importer._save_gtr_category_terms(project)
+        with patch.object(
+            GatewayToResearchGrantImporter, "_find_unique_gcmd_project_research_topics", return_value=[]
+        ), patch.object(GatewayToResearchGrantImporter, "_find_unique_gcmd_project_research_subjects", return_value=[]):
+            importer._link_gtr_category_terms(gtr_project, project=db_project)
 
-        # Check that it updated existing research subjects
-        assert mock_category_term.query.filter_by.call_count == 0
-        assert mock_category_term.call_count == 0
+            # Terms no longer associated with the project are unlinked
+            gtr_project.research_topics.pop()
+            importer._link_gtr_category_terms(gtr_project, project=db_project)
 
-        # Check that new category terms were added for topics and subjects
-        assert mock_db_session.add.call_count == 2  # Two new terms added
+        categorisations = Categorisation.query.filter_by(project_id=db_project.id).all()
+        assert sorted(categorisation.category_term.scheme_identifier for categorisation in categorisations) == [
+            "test-subject1",
+            "test-topic1",
+        ]
 
 
 class TestGatewayToResearchGrantImporter:
@@ -400,7 +550,7 @@ class TestGatewayToResearchGrantImporter:
         assert importer.grant_exists is False
 
     # Test the search method (successful request)
-    @patch("requests.get")
+    @patch.object(gtr_client, "get")
     def test_search_success(self, mock_get):
         mock_response = MagicMock()
         mock_response.json.return_value = {"project": [{"id": "12345"}]}
@@ -415,7 +565,7 @@ class TestGatewayToResearchGrantImporter:
         assert importer.gtr_project_id == "12345"
 
     # Test the search method (failure with multiple projects)
-    @patch("requests.get")
+    @patch.object(gtr_client, "get")
     def test_search_multiple_projects(self, mock_get):
         mock_response = MagicMock()
         mock_response.json.return_value = {
@@ -504,9 +654,472 @@ class TestGatewayToResearchGrantImporter:
         # assert mock_add.called
         # assert mock_commit.called
 
+    def test_fetch_new_grant(self, app, gtr_transport):
+        statements = []
+
+        def count_statement(connection, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", count_statement)
+        importer = GatewayToResearchGrantImporter(
+            gtr_grant_reference="NE/K011820/1", gtr_project_id="1", lead_project="1"
+        )
+        with patch.object(GatewayToResearchOrganisation, "_ror_dict", lambda uri: "https://ror.org/example"):
+            with patch.object(db.session, "commit", db.session.flush):
+                importer.fetch()
+        event.remove(db.engine, "before_cursor_execute", count_statement)
+
+        grant = Grant.query.filter_by(reference="NE/K011820/1").one()
+        assert grant.title == "Research Project Title"
+        assert grant.gtr_content_hash is not None
+        project = grant.allocations[0].project
+        assert sorted(participant.person.first_name for participant in project.participants) == [
+            "Person 1",
+            "Person 2",
+            "Person 3",
+        ]
+        # Resources are persisted using a handful of batched statements
+        assert len([statement for statement in statements if not statement.startswith("SELECT")]) == 5
+        db.session.rollback()
+
+    def test_fetch_existing_grant(self, app, gtr_transport):
+        importer = GatewayToResearchGrantImporter(
+            gtr_grant_reference="NE/K011820/1", gtr_project_id="1", lead_project="1"
+        )
+        with patch.object(GatewayToResearchOrganisation, "_ror_dict", lambda uri: "https://ror.org/example"):
+            with patch.object(db.session, "commit", db.session.flush):
+                importer.fetch()
+                # e.g. by another importer that found the grant did not exist at the same time
+                importer.fetch()
+
+        grant = Grant.query.filter_by(reference="NE/K011820/1").one()
+        assert len(grant.allocations) == 1
+        assert Project.query.filter_by(grant_reference="NE/K011820/1").count() == 1
+        assert len(grant.allocations[0].project.participants) == 3
+        db.session.rollback()
+
+    def test_fetch_split_award(self, app, gtr_transport):
+        lead_importer = GatewayToResearchGrantImporter(
+            gtr_grant_reference="NE/K011820/1", gtr_project_id="1", lead_project="1"
+        )
+        importer = GatewayToResearchGrantImporter(
+            gtr_grant_reference="NE/K011820/2",
+            gtr_project_id="2",
+            lead_project="0",
+            parent_grant_reference="NE/K011820/1",
+        )
+        with patch.object(GatewayToResearchOrganisation, "_ror_dict", lambda uri: "https://ror.org/example"):
+            with patch.object(db.session, "commit", db.session.flush):
+                # Grants imported before their parent are linked when next updated, even if unchanged
+                importer.fetch()
+                grant = Grant.query.filter_by(reference="NE/K011820/2").one()
+                assert grant.parent is None
+
+                lead_importer.fetch()
+                assert importer.update(gtr_project_id="2") is False
+
+        db.session.refresh(grant)
+        lead_grant = Grant.query.filter_by(reference="NE/K011820/1").one()
+        assert grant.parent is lead_grant
+        assert lead_grant.children == [grant]
+
+        # Funding for split awards can be aggregated
+        split_award_id = func.coalesce(Grant.parent_id, Grant.id)
+        assert db.session.query(split_award_id, func.sum(Grant.total_funds)).filter(
+            Grant.id.in_([grant.id, lead_grant.id])
+        ).group_by(split_award_id).all() == [(lead_grant.id, 200000)]
+        db.session.rollback()
+
+    def test_fetch_metrics(self, app, gtr_transport):
+        importer = GatewayToResearchGrantImporter(
+            gtr_grant_reference="NE/K011820/1", gtr_project_id="1", lead_project="1"
+        )
+        with patch.object(GatewayToResearchOrganisation, "_ror_dict", lambda uri: "https://ror.org/example"):
+            with patch.object(db.session, "commit", db.session.flush):
+                with record_import_metrics() as metrics:
+                    importer.fetch()
+                importer.fetch()
+
+        # Requests made by threads fetching related resources are included, but not those made after recording ended
+        assert metrics.counters["http_requests"] == len(gtr_transport.requested) / 2
+        assert metrics.counters["http_bytes"] > 0
+        assert metrics.counters["db_statements"] > 0
+        assert metrics.counters["sleep_seconds"] == 0
+        assert metrics.stages["search"] == 0
+        assert all(metrics.stages[stage] > 0 for stage in ("fetch", "map", "persist", "link-categories"))
+        db.session.rollback()
+
+    def test_resolve_stored_project_id(self, app, gtr_transport):
+        importer = GatewayToResearchGrantImporter(
+            gtr_grant_reference="NE/K011820/1", gtr_project_id="1", lead_project="1"
+        )
+        with patch.object(GatewayToResearchOrganisation, "_ror_dict", lambda uri: "https://ror.org/example"):
+            with patch.object(db.session, "commit", db.session.flush):
+                importer.fetch()
+        assert Grant.query.filter_by(reference="NE/K011820/1").one().gtr_project_id == "1"
+
+        # The stored ID is used, without searching GTR
+        gtr_transport.requested.clear()
+        importer = GatewayToResearchGrantImporter(gtr_grant_reference="NE/K011820/1")
+        assert importer.resolve() == "1"
+        assert importer.gtr_project_id_stored is True
+        assert gtr_transport.requested == []
+        db.session.rollback()
+
+    def test_resolve_unknown_grant(self, app, gtr_transport):
+        search_uri = f"{gtr_api}/projects?q=NE%2FK011820%2F1&f=pro.gr"
+        gtr_transport.resources = {**gtr_resources, search_uri: {"project": [{"id": "1"}]}}
+
+        importer = GatewayToResearchGrantImporter(gtr_grant_reference="NE/K011820/1")
+        assert importer.resolve() == "1"
+        assert importer.gtr_project_id_stored is False
+        assert gtr_transport.requested == [search_uri]
+
+    def test_update_stale_project_id(self, app, gtr_transport):
+        search_uri = f"{gtr_api}/projects?q=NE%2FK011820%2F1&f=pro.gr"
+        gtr_transport.resources = {**gtr_resources, search_uri: {"project": [{"id": "1"}]}}
+        importer = GatewayToResearchGrantImporter(
+            gtr_grant_reference="NE/K011820/1", gtr_project_id="1", lead_project="1"
+        )
+        with patch.object(GatewayToResearchOrganisation, "_ror_dict", lambda uri: "https://ror.org/example"):
+            with patch.object(db.session, "commit", db.session.flush):
+                importer.fetch()
+                grant = Grant.query.filter_by(reference="NE/K011820/1").one()
+                # e.g. where GTR have replaced the project for the grant
+                grant.gtr_project_id = "stale"
+                db.session.flush()
+
+                gtr_transport.requested.clear()
+                importer = GatewayToResearchGrantImporter(gtr_grant_reference="NE/K011820/1", lead_project="1")
+                importer.update(gtr_project_id=importer.resolve(), shallow=True)
+
+        assert gtr_transport.requested[:3] == [f"{gtr_api}/projects/stale", search_uri, f"{gtr_api}/projects/1"]
+        db.session.refresh(grant)
+        assert grant.gtr_project_id == "1"
+        db.session.rollback()
+
+    def test_update_related_resource_not_found(self, app, gtr_transport):
+        search_uri = f"{gtr_api}/projects?q=NE%2FK011820%2F1&f=pro.gr"
+        gtr_transport.resources = {**gtr_resources, search_uri: {"project": [{"id": "1"}]}}
+        importer = GatewayToResearchGrantImporter(
+            gtr_grant_reference="NE/K011820/1", gtr_project_id="1", lead_project="1"
+        )
+        with patch.object(GatewayToResearchOrganisation, "_ror_dict", lambda uri: "https://ror.org/example"):
+            with patch.object(db.session, "commit", db.session.flush):
+                importer.fetch()
+
+                # e.g. where GTR have removed the fund for a project, rather than the project itself
+                gtr_transport.resources = {
+                    uri: resource for uri, resource in gtr_transport.resources.items() if uri != f"{gtr_api}/funds/1"
+                }
+                gtr_transport.requested.clear()
+                importer = GatewayToResearchGrantImporter(gtr_grant_reference="NE/K011820/1", lead_project="1")
+                with pytest.raises(HTTPError):
+                    importer.update(gtr_project_id=importer.resolve(), shallow=True)
+
+        # The stored project ID is not treated as stale
+        assert search_uri not in gtr_transport.requested
+        assert gtr_transport.requested.count(f"{gtr_api}/projects/1") == 1
+        db.session.rollback()
+
+    def test_update_shallow(self, app, gtr_transport):
+        project_uri = f"{gtr_api}/projects/1"
+        importer = GatewayToResearchGrantImporter(
+            gtr_grant_reference="NE/K011820/1", gtr_project_id="1", lead_project="1"
+        )
+        with patch.object(GatewayToResearchOrganisation, "_ror_dict", lambda uri: "https://ror.org/example"):
+            with patch.object(db.session, "commit", db.session.flush):
+                importer.fetch()
+                grant = Grant.query.filter_by(reference="NE/K011820/1").one()
+
+                # Only the project and its fund (and funder) are fetched
+                gtr_transport.requested.clear()
+                assert importer.update(gtr_project_id="1", shallow=True) is False
+                assert gtr_transport.requested == [project_uri, f"{gtr_api}/funds/1", f"{gtr_api}/organisations/1"]
+
+                gtr_transport.resources = {**gtr_resources, project_uri: {**gtr_resources[project_uri], "title": "New"}}
+                gtr_transport.requested.clear()
+                assert importer.update(gtr_project_id="1", shallow=True) is True
+                assert len(gtr_transport.requested) == 3
+                assert grant.title == "New"
+                assert grant.publications == ["10.1000/1", "10.1000/2"]
+
+                # People and publications are fetched where the project's links have changed
+                links = [link for link in gtr_resources[project_uri]["links"]["link"] if link["href"][-1] != "2"]
+                gtr_transport.resources = {
+                    **gtr_resources,
+                    project_uri: {**gtr_resources[project_uri], "title": "New", "links": {"link": links}},
+                }
+                gtr_transport.requested.clear()
+                assert importer.update(gtr_project_id="1", shallow=True) is True
+                assert f"{gtr_api}/persons/1" in gtr_transport.requested
+                assert grant.publications == ["10.1000/1"]
+                assert grant.gtr_content_hash == importer.content_hash(
+                    GatewayToResearchProject(gtr_resource_uri=project_uri)
+                )
+        db.session.rollback()
+
+    def test_update_shallow_fetches_before_locking(self, app, gtr_transport):
+        project_uri = f"{gtr_api}/projects/1"
+        importer = GatewayToResearchGrantImporter(
+            gtr_grant_reference="NE/K011820/1", gtr_project_id="1", lead_project="1"
+        )
+        events = []
+
+        def fetch_people_and_publications(gtr_project):
+            events.append("fetch")
+            original_fetch_people_and_publications(gtr_project)
+
+        original_fetch_people_and_publications = GatewayToResearchProject.fetch_people_and_publications
+        with patch.object(GatewayToResearchOrganisation, "_ror_dict", lambda uri: "https://ror.org/example"):
+            with patch.object(db.session, "commit", db.session.flush):
+                importer.fetch()
+
+                links = [link for link in gtr_resources[project_uri]["links"]["link"] if link["href"][-1] != "2"]
+                gtr_transport.resources = {
+                    **gtr_resources,
+                    project_uri: {**gtr_resources[project_uri], "links": {"link": links}},
+                }
+                with patch.object(
+                    GatewayToResearchProject, "fetch_people_and_publications", fetch_people_and_publications
+                ), patch.object(
+                    GatewayToResearchGrantImporter,
+                    "_lock_grant_reference",
+                    staticmethod(lambda grant_reference: events.append("lock")),
+                ):
+                    assert importer.update(gtr_project_id="1", shallow=True) is True
+
+        # The grant is only locked once resources have been fetched from GTR
+        assert events == ["fetch", "lock"]
+        db.session.rollback()
+
+    def test_fetch_projects_without_grant_reference(self, app, gtr_transport):
+        # Projects not imported from GTR have an empty grant reference, which is not unique
+        db.session.execute(
+            insert(Project).values(
+                [
+                    {
+                        "neutral_id": generate_neutral_id(),
+                        "grant_reference": "",
+                        "title": title,
+                        "access_duration": DateRange(date(2020, 1, 1), None),
+                        "project_duration": DateRange(date(2020, 1, 1), date(2021, 1, 1)),
+                    }
+                    for title in ["Project without a grant 1", "Project without a grant 2"]
+                ]
+            )
+        )
+
+        importer = GatewayToResearchGrantImporter(
+            gtr_grant_reference="NE/K011820/1", gtr_project_id="1", lead_project="1"
+        )
+        with patch.object(GatewayToResearchOrganisation, "_ror_dict", lambda uri: "https://ror.org/example"):
+            with patch.object(db.session, "commit", db.session.flush):
+                importer.fetch()
+                importer.fetch()
+
+        assert Project.query.filter_by(grant_reference="").count() == 2
+        assert Project.query.filter_by(grant_reference="NE/K011820/1").count() == 1
+        db.session.rollback()
+
+    def test_fetch_person_added_concurrently(self, app, gtr_transport):
+        orcid_id = "https://orcid.org/0000-0000-0000-0001"
+        added_person_ids = []
+
+        def add_person(connection, cursor, statement, *args):
+            # e.g. by an importer for another grant with the same person, after this importer looked them up
+            if statement.startswith("INSERT INTO people") and not added_person_ids:
+                added_person_ids.append(None)
+                with db.engine.begin() as other_connection:
+                    added_person_ids[0] = other_connection.execute(
+                        insert(Person)
+                        .values(
+                            neutral_id=generate_neutral_id(), first_name="Person 1", last_name="Example", orcid_id=orcid_id
+                        )
+                        .returning(Person.id)
+                    ).scalar_one()
+
+        importer = GatewayToResearchGrantImporter(
+            gtr_grant_reference="NE/K011820/1", gtr_project_id="1", lead_project="1"
+        )
+        event.listen(db.engine, "before_cursor_execute", add_person)
+        try:
+            with patch.object(GatewayToResearchOrganisation, "_ror_dict", lambda uri: "https://ror.org/example"):
+                with patch.object(db.session, "commit", db.session.flush):
+                    importer.fetch()
+
+            # The person added by the other importer is used, rather than failing on their ORCID iD
+            project = Project.query.filter_by(grant_reference="NE/K011820/1").one()
+            assert added_person_ids[0] in [participant.person_id for participant in project.participants]
+            assert len(project.participants) == 3
+        finally:
+            event.remove(db.engine, "before_cursor_execute", add_person)
+            db.session.rollback()
+            with db.engine.begin() as connection:
+                connection.execute(delete(Person).where(Person.orcid_id == orcid_id))
+
+    def test_lock_grant_reference(self, app):
+        locked = threading.Event()
+
+        def lock_grant_reference():
+            with app.app_context():
+                GatewayToResearchGrantImporter._lock_grant_reference("NE/K011820/1")
+                locked.set()
+                db.session.rollback()
+
+        GatewayToResearchGrantImporter._lock_grant_reference("NE/K011820/1")
+        thread = threading.Thread(target=lock_grant_reference)
+        thread.start()
+        # Other importers wait until the lock is released (i.e. at the end of the transaction holding it)
+        assert not locked.wait(timeout=0.5)
+        db.session.rollback()
+        assert locked.wait(timeout=5)
+        thread.join()
+
+    @patch("arctic_office_projects_api.importers.gtr.Project")
+    @patch("arctic_office_projects_api.importers.gtr.db")
+    @patch("arctic_office_projects_api.importers.gtr.GatewayToResearchProject")
+    def test_update_unchanged(self, mock_gtr_project, mock_db, mock_project):
+        mock_grant_data = MagicMock(gtr_content_hash="abc", title="Old Title")
+        mock_db.session.query.return_value.filter_by.return_value.first.return_value = mock_grant_data
+        mock_db.session.execute.return_value.one.return_value = MagicMock(gtr_content_hash="abc")
+        importer = GatewayToResearchGrantImporter(gtr_grant_reference="NE/K011820/1")
+
+        with patch.object(GatewayToResearchGrantImporter, "content_hash", return_value="abc"):
+            assert importer.update(gtr_project_id="1") is False
+
+        # Only the sync time is updated
+        assert mock_grant_data.title == "Old Title"
+        assert mock_grant_data.gtr_synced_at is not None
+        mock_project.query.filter_by.assert_not_called()
+        mock_db.session.commit.assert_called_once()
+
 
 class TestGatewayToResearchProject:
 
+    def test_init_fetches_dependents_concurrently(self, gtr_transport):
+        with patch.object(GatewayToResearchOrganisation, "_ror_dict", lambda uri: "https://ror.org/example"):
+            project = GatewayToResearchProject(f"{gtr_api}/projects/1")
+
+        assert project.title == "Research Project Title"
+        assert project.publications == ["10.1000/1", "10.1000/2"]
+        assert project.fund.amount == 100000
+        assert project.fund.funder.name == "NERC"
+        assert [person.first_name for person in project.principle_investigators] == ["Person 1"]
+        assert [person.first_name for person in project.co_investigators] == ["Person 2", "Person 3"]
+        assert project.co_investigators[0].employer.name == "BAS"
+
+        assert len(gtr_transport.requested) == 11
+        assert gtr_transport.max_in_flight > 1
+        assert gtr_transport.max_in_flight <= gtr_client.fetch_workers
+
+    def test_init_memoised_resources(self, gtr_transport):
+        with patch.object(GatewayToResearchOrganisation, "_ror_dict", lambda uri: "https://ror.org/example"):
+            with gtr_resource_memo.run():
+                project_1 = GatewayToResearchProject(f"{gtr_api}/projects/1")
+                project_2 = GatewayToResearchProject(f"{gtr_api}/projects/2")
+
+                assert len(gtr_resource_memo) == 7
+                assert gtr_resource_memo.hits == 5
+                assert gtr_resource_memo.misses == 7
+
+            assert len(gtr_resource_memo) == 0
+
+            # Employers shared by people are fetched once, and only the project and fund for the second project
+            assert len(gtr_transport.requested) == 11
+            assert project_2.fund.funder is project_1.fund.funder
+            assert project_2.principle_investigators[0] is project_1.principle_investigators[0]
+            assert project_2.publications == ["10.1000/1"]
+
+            # Outside of a run, resources are not reused
+            GatewayToResearchProject(f"{gtr_api}/projects/2")
+            assert len(gtr_transport.requested) == 17
+
+    def test_init_compact(self, gtr_transport):
+        with patch.object(GatewayToResearchOrganisation, "_ror_dict", lambda uri: "https://ror.org/example"):
+            with gtr_resource_memo.run():
+                project = GatewayToResearchProject(f"{gtr_api}/projects/1")
+                resources = list(gtr_resource_memo._resources.values())
+
+        # Only extracted attributes are kept, with raw GTR responses released
+        assert len(resources) == 7
+        for resource in [project, *resources]:
+            assert not hasattr(resource, "__dict__")
+            assert resource.resource is None
+            if resource is not project:
+                assert resource.resource_links is None
+        assert project.resource_links["FUND"] == [f"{gtr_api}/funds/1"]
+        assert project.co_investigators[0].employer.name == "BAS"
+        assert project.fund.funder.ror_id == "https://ror.org/example"
+
+    def test_init_dependent_error(self, gtr_transport):
+        resources = dict(gtr_resources)
+        resources.pop(f"{gtr_api}/outcomes/publications/2")
+        gtr_transport.resources = resources
+
+        with patch.object(GatewayToResearchOrganisation, "_ror_dict", lambda uri: "https://ror.org/example"):
+            with gtr_resource_memo.run():
+                with pytest.raises(HTTPError):
+                    GatewayToResearchProject(f"{gtr_api}/projects/1")
+
+                # Resources that failed are not kept
+                with pytest.raises(HTTPError):
+                    gtr_resource_memo.get(GatewayToResearchPublication, f"{gtr_api}/outcomes/publications/2")
+                assert gtr_resource_memo.misses - len(gtr_resource_memo) == 2
+
+    def test_init_unmapped(self, gtr_transport, gtr_mappings):
+        resources = dict(gtr_resources)
+        resources[f"{gtr_api}/projects/1"] = {
+            **gtr_resources[f"{gtr_api}/projects/1"],
+            "researchTopics": {
+                "researchTopic": [
+                    {"id": "test-topic-1", "text": "Topic 1"},
+                    # Mapped as unclassified
+                    {"id": "test-topic-2", "text": "Topic 2"},
+                    {"id": "unknown-topic", "text": "Unknown topic"},
+                    {"id": "unknown-topic", "text": "Unknown topic"},
+                ]
+            },
+            "researchSubjects": {"researchSubject": [{"id": "subject-1", "text": "Unknown subject"}]},
+        }
+        resources[f"{gtr_api}/projects/1"]["links"] = {
+            "link": [
+                *gtr_resources[f"{gtr_api}/projects/1"]["links"]["link"],
+                gtr_link("LEAD_ORG", f"{gtr_api}/organisations/test-org-1"),
+                gtr_link("LEAD_ORG", f"{gtr_api}/organisations/unknown-org"),
+            ]
+        }
+        gtr_transport.resources = resources
+
+        with gtr_mapping_index.run():
+            with pytest.raises(UnmappedGatewayToResearchMappings) as e:
+                GatewayToResearchProject(f"{gtr_api}/projects/1")
+
+        # All missing mappings are reported at once, without fetching any other resources. Lead organisations are not
+        # imported, so do not need mapping.
+        assert e.value.meta["unmapped"] == [
+            {"mapping": "topics", "key": "unknown-topic", "name": "Unknown topic"},
+            {"mapping": "subjects", "key": "Unknown subject", "name": "Unknown subject"},
+        ]
+        assert gtr_transport.requested == [f"{gtr_api}/projects/1"]
+
+    def test_content_hash(self, gtr_transport):
+        with patch.object(GatewayToResearchOrganisation, "_ror_dict", lambda uri: "https://ror.org/example"):
+            project = GatewayToResearchProject(f"{gtr_api}/projects/1")
+            unchanged_project = GatewayToResearchProject(f"{gtr_api}/projects/1")
+
+        assert project.content["fund"]["amount"] == 100000
+        assert project.content["principle_investigators"][0]["resource_uri"] == f"{gtr_api}/persons/1"
+
+        importer = GatewayToResearchGrantImporter(gtr_grant_reference="NE/K011820/1", lead_project="1")
+        assert importer.content_hash(project) == importer.content_hash(unchanged_project)
+        assert len(importer.content_hash(project)) == 64
+
+        unchanged_project.title = "Changed Title"
+        assert importer.content_hash(project) != importer.content_hash(unchanged_project)
+        other_importer = GatewayToResearchGrantImporter(gtr_grant_reference="NE/K011820/1", lead_project="0")
+        assert importer.content_hash(project) != other_importer.content_hash(project)
+
     def test_initialization(self, gtr_project):
         gtr_project.status = valid_resource["status"]
         gtr_project.title = valid_resource["title"]
@@ -572,7 +1185,7 @@ class TestGatewayToResearchFund:
 
 class TestGatewayToResearchResource:
 
-    @patch("requests.get")
+    @patch.object(gtr_client, "get")
     def test_init_success(self, mock_get):
         mock_get.return_value.json.return_value = {
             "links": {
@@ -589,21 +1202,21 @@ class TestGatewayToResearchResource:
         assert resource.resource_links["publication"] == ["http://example.com/pub"]
         assert resource.resource_links["person"] == ["http://example.com/person"]
 
-    @patch("requests.get")
+    @patch.object(gtr_client, "get")
     def test_init_http_error(self, mock_get):
         mock_get.side_effect = HTTPError("HTTP error occurred")
 
         with pytest.raises(HTTPError):
             GatewayToResearchResource("http://example.com/resource")
 
-    @patch("requests.get")
+    @patch.object(gtr_client, "get")
     def test_process_resource_links_key_error(self, mock_get):
         mock_get.return_value.json.return_value = {}
 
         with pytest.raises(KeyError):
             GatewayToResearchResource("http://example.com/resource")
 
-    @patch("requests.get")
+    @patch.object(gtr_client, "get")
     def test_process_resource_links_missing_rel(self, mock_get):
         mock_get.return_value.json.return_value = {
             "links": {"link": [{"href": "http://example.com/pub"}]}
@@ -615,7 +1228,7 @@ class TestGatewayToResearchResource:
 
 class TestGatewayToResearchOrganisation(FlaskTestCase):
 
-    @patch("requests.get")
+    @patch.object(gtr_client, "get")
     def test_init_missing_name(self, mock_get):
         mock_get.return_value.json.return_value = {"links": {"link": []}}
         mock_get.return_value.status_code = 200
@@ -624,7 +1237,7 @@ class TestGatewayToResearchOrganisation(FlaskTestCase):
             GatewayToResearchOrganisation("http://gtr.ukri.org/gtr/api/organisations/1")
 
     def test_map_to_ror_unmapped_organisation(app_context):
-        with patch("requests.get") as mock_get:
+        with patch.object(gtr_client, "get") as mock_get:
             mock_get.return_value.json.return_value = {
                 "name": "Test Organisation",
                 "links": {"link": []},
@@ -641,5 +1254,241 @@ class TestGatewayToResearchOrganisation(FlaskTestCase):
                     )
 
 
+@pytest.fixture
+def gtr_mappings(app):
+    mappings = [
+        Project_Organisations(organisation_id="test-org-1", organisation_ror="https://ror.org/01"),
+        Project_Organisations(organisation_id="test-org-2", organisation_ror="https://ror.org/02"),
+        Project_Topics(topic_id="test-topic-1", gcmd_link_code="gcmd.earthdata.nasa.gov/kms/concept/1"),
+        Project_Topics(topic_id="test-topic-2", gcmd_link_code="none"),
+    ]
+    db.session.add_all(mappings)
+    db.session.commit()
+    yield mappings
+    for mapping in mappings:
+        db.session.delete(mapping)
+    db.session.commit()
+
+
+class TestGatewayToResearchMappingIndex:
+
+    def test_lookup(self, gtr_mappings):
+        # Later rows are found too
+        assert GatewayToResearchOrganisation._ror_dict(f"{gtr_api}/organisations/test-org-2") == "https://ror.org/02"
+        assert GatewayToResearchOrganisation._ror_dict(f"{gtr_api}/organisations/unknown") is None
+
+        assert GatewayToResearchGrantImporter._map_gtr_project_research_topic_to_category_term(
+            {"id": "test-topic-1", "text": "Topic 1"}
+        ) == "https://gcmd.earthdata.nasa.gov/kms/concept/1"
+        assert GatewayToResearchGrantImporter._map_gtr_project_research_topic_to_category_term(
+            {"id": "test-topic-2", "text": "Topic 2"}
+        ) is None
+        with pytest.raises(UnmappedGatewayToResearchProjectTopic):
+            GatewayToResearchGrantImporter._map_gtr_project_research_topic_to_category_term(
+                {"id": "unknown", "text": "Unknown"}
+            )
+
+    def test_lookup_in_run(self, gtr_mappings):
+        with gtr_mapping_index.run():
+            loads = gtr_mapping_index.loads
+            assert gtr_mapping_index.lookup("organisations", "test-org-1") == "https://ror.org/01"
+            assert gtr_mapping_index.lookup("organisations", "test-org-2") == "https://ror.org/02"
+            assert gtr_mapping_index.lookup("topics", "test-topic-2") == "none"
+            # Each table is loaded once
+            assert gtr_mapping_index.loads == loads + 2
+
+            # Changed mappings are not seen until invalidated
+            gtr_mappings[0].organisation_ror = "https://ror.org/03"
+            db.session.commit()
+            assert gtr_mapping_index.lookup("organisations", "test-org-1") == "https://ror.org/01"
+            gtr_mapping_index.invalidate("organisations")
+            assert gtr_mapping_index.lookup("organisations", "test-org-1") == "https://ror.org/03"
+            assert gtr_mapping_index.loads == loads + 3
+
+        assert not gtr_mapping_index.active
+        assert gtr_mapping_index._indexes == {}
+
+    def test_refresh(self, gtr_mappings):
+        with gtr_mapping_index.run():
+            gtr_mapping_index.refresh()
+            assert gtr_mapping_index.lookup("organisations", "test-org-1") == "https://ror.org/01"
+            assert gtr_mapping_index.lookup("topics", "test-topic-2") == "none"
+            assert gtr_mapping_index.refresh() == []
+
+            # e.g. by a '/post-organisation-data' request to another process, which cannot invalidate this index
+            gtr_mappings[0].organisation_ror = "https://ror.org/03"
+            db.session.commit()
+            assert gtr_mapping_index.lookup("organisations", "test-org-1") == "https://ror.org/01"
+            assert gtr_mapping_index.refresh() == ["organisations"]
+            assert gtr_mapping_index.lookup("organisations", "test-org-1") == "https://ror.org/03"
+
+            mapping = Project_Organisations(organisation_id="test-org-3", organisation_ror="https://ror.org/04")
+            db.session.add(mapping)
+            db.session.commit()
+            assert gtr_mapping_index.refresh() == ["organisations"]
+            assert gtr_mapping_index.lookup("organisations", "test-org-3") == "https://ror.org/04"
+            # Unchanged tables are kept
+            assert "topics" in gtr_mapping_index._indexes
+
+            db.session.delete(mapping)
+            db.session.commit()
+            assert gtr_mapping_index.refresh() == ["organisations"]
+
+
+class TestImportGatewayToResearchGrants:
+
+    def test_import_grants(self, app):
+        def fake_import(gtr_grant_reference, lead_project, journal, parent_grant_reference):
+            assert gtr_resource_memo.active
+            journal.grant_started(gtr_grant_reference, lead_project=lead_project == "1")
+            if gtr_grant_reference == "NE/K011820/3":
+                journal.grant_finished(gtr_grant_reference, status="failed", error="HTTPError")
+                raise HTTPError("HTTP error occurred")
+            status = "imported" if lead_project == "1" else "unmapped-topic"
+            journal.grant_finished(gtr_grant_reference, status=status)
+            return status
+
+        with patch(
+            "arctic_office_projects_api.importers.gtr.import_gateway_to_research_grant_interactively",
+            side_effect=fake_import,
+        ) as mock_import:
+            results = import_gateway_to_research_grants_interactively(
+                [
+                    {"grant-reference": "NE/K011820/2", "lead-project": 0, "parent-grant-reference": "NE/K011820/1"},
+                    {"grant-reference": "NE/K011820/3", "lead-project": 0},
+                    {"grant-reference": "NE/K011820/1", "lead-project": 1},
+                ],
+                workers=2,
+            )
+
+        # Grants in a split award are imported together, lead grant first
+        split_award_calls = [
+            (call.args[0], call.kwargs["parent_grant_reference"])
+            for call in mock_import.call_args_list
+            if call.args[0] != "NE/K011820/3"
+        ]
+        assert split_award_calls == [("NE/K011820/1", None), ("NE/K011820/2", "NE/K011820/1")]
+
+        assert sorted((result["grant_reference"], result["status"], result["error"]) for result in results) == [
+            ("NE/K011820/1", "imported", None),
+            ("NE/K011820/2", "unmapped-topic", None),
+            ("NE/K011820/3", "failed", "HTTPError"),
+        ]
+        assert not gtr_resource_memo.active
+
+    def test_import_workers(self, app):
+        journal = ImportJournal.start(source="/post-gtr-grant-bulk")
+        journal.enqueue(
+            [
+                {"grant-reference": "NE/K011820/1", "lead-project": 1},
+                {"grant-reference": "NE/K011820/2", "lead-project": 0},
+                {"grant-reference": "NE/K011820/3", "lead-project": 0},
+            ]
+        )
+
+        def fake_import(gtr_grant_reference, lead_project, journal, parent_grant_reference):
+            assert gtr_resource_memo.active
+            journal.grant_started(gtr_grant_reference, lead_project=lead_project == "1")
+            if gtr_grant_reference == "NE/K011820/3":
+                journal.grant_finished(gtr_grant_reference, status="failed", error="HTTPError")
+                raise HTTPError("HTTP error occurred")
+            journal.grant_finished(gtr_grant_reference, status="imported")
+            return "imported"
+
+        with patch(
+            "arctic_office_projects_api.importers.gtr.import_gateway_to_research_grant_interactively",
+            side_effect=fake_import,
+        ) as mock_import:
+            assert run_gateway_to_research_import_workers(workers=2, burst=True) == 3
+
+        assert sorted(call.args[:2] for call in mock_import.call_args_list) == [
+            ("NE/K011820/1", "1"),
+            ("NE/K011820/2", "0"),
+            ("NE/K011820/3", "0"),
+        ]
+        # Failed grants are not retried, and the run is finished once its queue is empty
+        progress = journal.progress()
+        assert progress["status"] == "finished"
+        assert progress["queued"] == 0
+        assert sorted((grant["grant_reference"], grant["status"]) for grant in progress["grants"]) == [
+            ("NE/K011820/1", "imported"),
+            ("NE/K011820/2", "imported"),
+            ("NE/K011820/3", "failed"),
+        ]
+        assert not gtr_resource_memo.active
+
+    @patch.object(Grant, "query")
+    @patch("arctic_office_projects_api.importers.gtr.db")
+    def test_refresh_grants(self, mock_db, mock_grant_query, app):
+        mock_db.session.query.return_value.filter.return_value.order_by.return_value.all.return_value = [
+            ("NE/K011820/1", True),
+            ("NE/K011820/2", False),
+            ("NE/K011820/3", False),
+            ("NE/K011820/4", False),
+        ]
+        journal = MagicMock()
+
+        def fake_import(gtr_grant_reference, lead_project, journal, shallow):
+            assert shallow is True
+            gtr_client.requests_made += 10
+            return "not-found" if gtr_grant_reference == "NE/K011820/2" else "unchanged"
+
+        with patch(
+            "arctic_office_projects_api.importers.gtr.import_gateway_to_research_grant_interactively",
+            side_effect=fake_import,
+        ) as mock_import:
+            results = refresh_gateway_to_research_grants_interactively(
+                stale_after=timedelta(hours=24), max_requests=25, journal=journal, shallow=True
+            )
+
+        # Budget is checked before each grant
+        assert [call.args[:2] for call in mock_import.call_args_list] == [
+            ("NE/K011820/1", "1"),
+            ("NE/K011820/2", "0"),
+            ("NE/K011820/3", "0"),
+        ]
+        # Grants that could not be refreshed are marked as synced, so they do not block others
+        mock_grant_query.filter_by.assert_called_once_with(reference="NE/K011820/2")
+        journal.finish.assert_called_once()
+        assert results == journal.grants.return_value
+
+    def test_group_split_awards(self):
+        assert group_split_awards(
+            [
+                {"grant-reference": "NE/I028653/1", "parent-grant-reference": "NE/I028858/1"},
+                {"grant-reference": "NE/I029137/1", "parent-grant-reference": None},
+                {"grant-reference": "NE/I028858/1", "parent-grant-reference": None},
+                {"grant-reference": "NE/I028696/1", "parent-grant-reference": "NE/I028858/1"},
+                {"grant-reference": "NE/K000179/1"},
+            ]
+        ) == [
+            [
+                {"grant-reference": "NE/I028858/1", "parent-grant-reference": None},
+                {"grant-reference": "NE/I028653/1", "parent-grant-reference": "NE/I028858/1"},
+                {"grant-reference": "NE/I028696/1", "parent-grant-reference": "NE/I028858/1"},
+            ],
+            [{"grant-reference": "NE/I029137/1", "parent-grant-reference": None}],
+            [{"grant-reference": "NE/K000179/1"}],
+        ]
+
+    def test_format_grant_import_summary(self):
+        summary = format_grant_import_summary(
+            [
+                {"grant_reference": "NE/K011820/1", "status": "imported", "error": None, "duration": 2},
+                {"grant_reference": "NE/K011820/2", "status": "imported", "error": None, "duration": 3},
+                {"grant_reference": "NE/K011820/3", "status": "failed", "error": "HTTPError", "duration": 1},
+            ]
+        )
+        assert summary.splitlines() == [
+            "Status           Grants  Seconds",
+            "imported         2       5.0",
+            "failed           1       1.0",
+            "total            3       6.0",
+            "",
+            "Grant reference  Status  Error",
+            "NE/K011820/3     failed  HTTPError",
+        ]
+
+
 if __name__ == "__main__":
     pytest.main()
@@ -0,0 +1,213 @@
+import pytest
+
+from pathlib import Path
+
+from arctic_office_projects_api.bulk_importer.import_grants import gtr_csv_to_json
+from arctic_office_projects_api.importers.journal import (
+    ImportJournal,
+    claim_queued_grant,
+    failed_grant_import_details,
+    unmapped_mappings,
+)
+from arctic_office_projects_api.importers.metrics import record_import_counters, record_import_metrics
+
+
+def test_import_journal(app):
+    journal = ImportJournal.start(source="grants.csv")
+
+    journal.grant_started("NE/K011820/1", lead_project=True)
+    journal.grant_finished("NE/K011820/1", status="imported")
+    journal.grant_started("NE/K011820/2", lead_project=False)
+    journal.grant_finished(
+        "NE/K011820/2", status="unmapped-topic", error="UnmappedGatewayToResearchProjectTopic", detail="Topic T3"
+    )
+    # Interrupted before finishing
+    journal.grant_started("NE/K011820/3", lead_project=False)
+    journal.finish()
+
+    assert [(grant["grant_reference"], grant["status"], grant["error"]) for grant in journal.grants()] == [
+        ("NE/K011820/1", "imported", None),
+        ("NE/K011820/2", "unmapped-topic", "UnmappedGatewayToResearchProjectTopic"),
+        ("NE/K011820/3", None, None),
+    ]
+    assert journal.finished_grant_references() == ["NE/K011820/1", "NE/K011820/2"]
+    assert journal.failed_grant_references() == ["NE/K011820/2", "NE/K011820/3"]
+    assert failed_grant_import_details(run_id=journal.run_id) == ["Topic T3"]
+
+
+def test_import_journal_resume(app):
+    journal = ImportJournal.start()
+    journal.grant_started("NE/K011820/1")
+    journal.grant_finished("NE/K011820/1", status="failed", error="HTTPError", detail="HTTP error occurred")
+    journal.finish()
+
+    # Importing a grant again replaces its previous outcome
+    journal = ImportJournal.resume(run_id=journal.run_id)
+    journal.grant_started("NE/K011820/1")
+    assert journal.grants()[0]["status"] is None
+    journal.grant_finished("NE/K011820/1", status="updated")
+
+    assert [(grant["grant_reference"], grant["status"], grant["detail"]) for grant in journal.grants()] == [
+        ("NE/K011820/1", "updated", None),
+    ]
+    assert journal.failed_grant_references() == []
+
+
+def test_import_journal_resume_unknown_run(app):
+    with pytest.raises(KeyError):
+        ImportJournal.resume(run_id=-1)
+
+
+def test_import_journal_queue(app):
+    journal = ImportJournal.start(source="/post-gtr-grant-bulk")
+    journal.enqueue(
+        [
+            {"grant-reference": "NE/K011820/1", "lead-project": 1},
+            {"grant-reference": "NE/K011820/2", "lead-project": "0"},
+            {"grant-reference": "NE/K011820/3"},
+        ]
+    )
+    assert journal.queued_grant_count() == 3
+    assert journal.progress()["status"] == "queued"
+
+    with claim_queued_grant() as first_grant:
+        # Grants claimed by other workers are skipped
+        with claim_queued_grant() as second_grant:
+            assert second_grant["grant_reference"] == "NE/K011820/2"
+            assert second_grant["lead_project"] is False
+        assert first_grant["grant_reference"] == "NE/K011820/1"
+        assert first_grant["lead_project"] is True
+        assert first_grant["run_id"] == journal.run_id
+
+    # Grants are released if a claim ends with an error
+    with pytest.raises(RuntimeError):
+        with claim_queued_grant() as third_grant:
+            raise RuntimeError()
+    assert journal.queued_grant_count() == 1
+
+    with claim_queued_grant() as queued_grant:
+        assert queued_grant["id"] == third_grant["id"]
+    with claim_queued_grant() as queued_grant:
+        assert queued_grant is None
+    assert journal.queued_grant_count() == 0
+
+
+def test_import_journal_progress(app):
+    journal = ImportJournal.start(source="/post-gtr-grant-bulk")
+    journal.grant_started("NE/K011820/1")
+    journal.grant_finished("NE/K011820/1", status="imported")
+    journal.finish()
+
+    progress = journal.progress()
+    assert progress["run"] == journal.run_id
+    assert progress["source"] == "/post-gtr-grant-bulk"
+    assert progress["status"] == "finished"
+    assert progress["queued"] == 0
+    assert progress["finished_at"] is not None
+    assert [grant["status"] for grant in progress["grants"]] == ["imported"]
+
+    with pytest.raises(KeyError):
+        ImportJournal(run_id=-1).progress()
+
+
+def test_import_journal_unmapped(app):
+    journal = ImportJournal.start()
+    for grant_reference, unmapped in [
+        ("NE/K011820/1", [{"mapping": "topics", "key": "T1", "name": "Topic 1"}]),
+        (
+            "NE/K011820/2",
+            [
+                {"mapping": "topics", "key": "T1", "name": "Topic 1"},
+                {"mapping": "organisations", "key": "O1", "name": None},
+            ],
+        ),
+    ]:
+        journal.grant_started(grant_reference)
+        journal.grant_finished(grant_reference, status="unmapped", unmapped=unmapped)
+    journal.grant_started("NE/K011820/3")
+    journal.grant_finished("NE/K011820/3", status="imported")
+
+    assert [grant["unmapped"] for grant in journal.grants()][2] == []
+    # Mappings missing for many grants are listed once
+    assert unmapped_mappings(journal.grants()) == [
+        {"mapping": "organisations", "key": "O1", "name": None, "grant_references": ["NE/K011820/2"]},
+        {"mapping": "topics", "key": "T1", "name": "Topic 1", "grant_references": ["NE/K011820/1", "NE/K011820/2"]},
+    ]
+    assert journal.progress()["unmapped"] == unmapped_mappings(journal.grants())
+
+    # Importing a grant again clears its missing mappings
+    journal.grant_started("NE/K011820/1")
+    assert journal.grants()[0]["unmapped"] == []
+
+
+def test_import_journal_queue_split_award(app):
+    journal = ImportJournal.start(source="/post-gtr-grant-bulk")
+    journal.enqueue(
+        [
+            {"grant-reference": "NE/I028653/1", "lead-project": 0, "parent-grant-reference": "NE/I028858/1"},
+            {"grant-reference": "NE/I028858/1", "lead-project": 1, "parent-grant-reference": None},
+        ]
+    )
+
+    # Grants are not claimed until their parent is imported
+    with claim_queued_grant() as lead_grant:
+        assert lead_grant["grant_reference"] == "NE/I028858/1"
+        with claim_queued_grant() as queued_grant:
+            assert queued_grant is None
+    with claim_queued_grant() as queued_grant:
+        assert queued_grant["grant_reference"] == "NE/I028653/1"
+        assert queued_grant["parent_grant_reference"] == "NE/I028858/1"
+    assert journal.queued_grant_count() == 0
+
+
+def test_import_journal_queue_own_parent(app):
+    journal = ImportJournal.start(source="/post-gtr-grant-bulk")
+    journal.enqueue([{"grant-reference": "NE/N016211/1", "lead-project": 1, "parent-grant-reference": "NE/N016211/1"}])
+
+    # A grant given as its own parent is not waiting on itself
+    with claim_queued_grant() as queued_grant:
+        assert queued_grant["grant_reference"] == "NE/N016211/1"
+    assert journal.queued_grant_count() == 0
+
+
+def test_import_journal_queue_bulk_importer_csv(app):
+    csv_path = Path(__file__).parents[2].joinpath(
+        "arctic_office_projects_api/bulk_importer/csvs/all-projects-2024-10-17.csv"
+    )
+    grants = gtr_csv_to_json(csv_path)["data"]
+    # e.g. row 188, which is its own parent
+    assert not [grant for grant in grants if grant["parent-grant-reference"] == grant["grant-reference"]]
+
+    journal = ImportJournal.start(source="/post-gtr-grant-bulk")
+    journal.enqueue(grants)
+    claimed = 0
+    while True:
+        with claim_queued_grant() as queued_grant:
+            if queued_grant is None:
+                break
+            claimed += 1
+
+    # Every grant can be claimed, parents before the other grants in their split award
+    assert claimed == len(grants)
+    assert journal.queued_grant_count() == 0
+
+
+def test_import_journal_metrics(app):
+    journal = ImportJournal.start()
+    journal.grant_started("NE/K011820/1")
+    with record_import_metrics():
+        record_import_counters(http_requests=4, http_bytes=2048)
+        journal.grant_finished("NE/K011820/1", status="imported")
+    # Metrics are only recorded where they are being recorded
+    journal.grant_started("NE/K011820/2")
+    journal.grant_finished("NE/K011820/2", status="invalid")
+
+    metrics = [grant["metrics"] for grant in journal.grants()]
+    assert metrics[0]["http_requests"] == 4
+    assert metrics[0]["http_bytes"] == 2048
+    assert metrics[1] is None
+    assert journal.progress()["metrics"]["counters"]["http_requests"]["total"] == 4
+
+    # Importing a grant again clears its metrics
+    journal.grant_started("NE/K011820/1")
+    assert journal.grants()[0]["metrics"] is None
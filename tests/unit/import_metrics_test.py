@@ -0,0 +1,107 @@
+import json
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from arctic_office_projects_api.extensions import db
+from arctic_office_projects_api.importers.gtr import in_app_context
+from arctic_office_projects_api.importers.metrics import (
+    current_import_metrics,
+    format_import_metrics_summary,
+    import_stage,
+    record_import_counters,
+    record_import_metrics,
+    summarise_import_metrics,
+    with_import_metrics,
+)
+
+
+def test_record_import_metrics(app):
+    # Nothing is recorded outside of a recording context
+    record_import_counters(http_requests=1)
+    assert current_import_metrics() is None
+
+    with record_import_metrics() as metrics:
+        record_import_counters(http_requests=1, http_bytes=100)
+        with import_stage("persist"):
+            db.session.execute(db.text("SELECT 1"))
+        with import_stage("persist"):
+            pass
+
+        # Work done in other threads is recorded where they run in a copy of the context
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            list(executor.map(in_app_context(lambda _: record_import_counters(http_requests=1)), range(4)))
+    assert current_import_metrics() is None
+
+    metrics = metrics.as_dict()
+    assert metrics["http_requests"] == 5
+    assert metrics["http_bytes"] == 100
+    assert metrics["db_statements"] == 1
+    assert metrics["stages"]["persist"] > 0
+    assert metrics["stages"]["fetch"] == 0
+    # Metrics are stored as JSON
+    assert json.loads(json.dumps(metrics)) == metrics
+
+
+def test_import_stage_nested(app):
+    with record_import_metrics() as metrics:
+        with import_stage("fetch"):
+            time.sleep(0.02)
+            # Time in an inner stage is not counted towards the outer stage
+            with import_stage("map"):
+                time.sleep(0.05)
+
+            # Time in stages entered by other threads is not subtracted from the outer stage
+            def _map():
+                with import_stage("map"):
+                    time.sleep(0.05)
+
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                executor.submit(in_app_context(_map)).result()
+
+    stages = metrics.as_dict()["stages"]
+    assert 0.1 <= stages["map"] < 0.15
+    assert 0.07 <= stages["fetch"] < 0.12
+
+
+def test_with_import_metrics(app):
+    @with_import_metrics
+    def _import_grant():
+        record_import_counters(http_requests=1)
+        return current_import_metrics()
+
+    metrics = _import_grant()
+    assert metrics.counters["http_requests"] == 1
+    assert _import_grant() is not metrics
+    assert current_import_metrics() is None
+
+
+def test_summarise_import_metrics():
+    metrics = {
+        "http_requests": 8,
+        "http_bytes": 1000,
+        "http_seconds": 1.5,
+        "sleep_seconds": 0,
+        "parse_seconds": 0.01,
+        "db_statements": 30,
+        "db_seconds": 0.2,
+        "stages": {"search": 0.5, "fetch": 1.0, "map": 0.01, "persist": 0.1, "link-categories": 0.05},
+    }
+    results = [
+        {"grant_reference": "NE/K011820/1", "metrics": metrics},
+        {"grant_reference": "NE/K011820/2", "metrics": {**metrics, "http_requests": 2}},
+        # e.g. grants with an invalid reference
+        {"grant_reference": "invalid", "metrics": None},
+    ]
+
+    summary = summarise_import_metrics(results)
+    assert summary["grants"] == 2
+    assert summary["counters"]["http_requests"] == {"total": 10, "mean": 5.0, "max": 8}
+    assert summary["stages"]["fetch"] == {"total": 2.0, "mean": 1.0, "max": 1.0}
+
+    table = format_import_metrics_summary(summary).split("\n")
+    assert table[0] == "Metric                            Total  Mean    Max"
+    assert table[1] == "http_requests                     10     5.0     8"
+    assert table[-1] == "stage: link-categories (seconds)  0.1    0.05    0.05"
+
+    assert summarise_import_metrics([])["counters"]["http_requests"] == {"total": 0, "mean": 0, "max": 0}
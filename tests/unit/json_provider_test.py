@@ -0,0 +1,60 @@
+import pytest
+
+from datetime import date
+from decimal import Decimal
+from enum import Enum
+
+from flask import Flask
+
+from arctic_office_projects_api.representations import JSONProvider
+
+
+class SampleEnum(Enum):
+    OPTION1 = "option1"
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.json = JSONProvider(app)
+
+    @app.route("/values")
+    def values():
+        return app.json.response(
+            {"date": date(2012, 3, 1), "decimal": Decimal("120000.00"), "enum": SampleEnum.OPTION1}
+        )
+
+    return app
+
+
+def test_json_provider_default():
+    assert JSONProvider.default(SampleEnum.OPTION1) == "option1"
+    assert JSONProvider.default(Decimal("1.50")) == "1.50"
+    assert JSONProvider.default(date(2012, 3, 1)) == "Thu, 01 Mar 2012 00:00:00 GMT"
+
+    with pytest.raises(TypeError):
+        JSONProvider.default(object())
+
+
+def test_json_provider_msgpack_consistent_with_json(app):
+    msgpack = pytest.importorskip("msgpack")
+    client = app.test_client()
+
+    response_json = client.get("/values")
+    assert response_json.mimetype == "application/json"
+
+    response_msgpack = client.get("/values", headers={"Accept": "application/msgpack"})
+    assert response_msgpack.mimetype == "application/msgpack"
+    assert msgpack.unpackb(response_msgpack.get_data()) == response_json.json
+    assert response_json.json == {
+        "date": "Thu, 01 Mar 2012 00:00:00 GMT",
+        "decimal": "120000.00",
+        "enum": "option1",
+    }
+
+
+def test_json_provider_outside_request(app):
+    with app.app_context():
+        response = app.json.response({"foo": "bar"})
+        assert response.mimetype == "application/json"
+        assert "Accept" not in response.vary
@@ -57,6 +57,21 @@ def test_schema_initialization(sample_schema):
     assert sample_schema.resource_linkage is None
 
 
+def test_schema_compact_initialization(sample_schema):
+    assert sample_schema.compact is False
+
+    schema = MySchema(compact=True)
+    assert schema.compact is True
+
+
+def test_schema_compact_serialization():
+    schema = MySchema(compact=True)
+    data = {"id": "123", "field1": MyEnum.VALUE1, "cost_currency": "GBP"}
+    result = schema.dump(data)
+
+    assert result == {"data": {"id": "123", "field1": "value1", "cost_currency": "GBP"}}
+
+
 def test_enum_field_serialization():
     schema = MySchema()
     data = {"id": "123", "field1": MyEnum.VALUE1}
@@ -1,6 +1,7 @@
 from enum import Enum
 from arctic_office_projects_api.utils import (
     conditional_decorator,
+    format_table,
     generate_neutral_id,
     generate_countries_enum
 )
@@ -23,6 +24,16 @@ def test_conditional_decorator():
     assert test_function_decorated() == "decorated"
 
 
+def test_format_table():
+    table = format_table([("Status", "Grants", "Error"), ("imported", "12", ""), ("failed", "1", "KeyError")])
+
+    assert table.split("\n") == [
+        "Status    Grants  Error",
+        "imported  12",
+        "failed    1       KeyError",
+    ]
+
+
 # Test for generate_neutral_id
 def test_generate_neutral_id():
     # Call the function